@@ -3,9 +3,13 @@ Motor de IA Avançado para Processamento de Planilhas
 NLP em Português + Aprendizado + Contexto
 """
 import re
+from functools import lru_cache
 from typing import List, Dict, Any, Tuple, Optional
 import json
-from datetime import datetime
+
+from app.core.config import INTENT_CACHE_SIZE
+from app.services.sessions import SessionContext
+from app.services.text import normalize_text, cache_metrics
 
 class SpreadsheetAI:
     def __init__(self):
@@ -23,31 +27,37 @@ class SpreadsheetAI:
             'minuscula': ['minúscula', 'minusculo', 'lower', 'caixa baixa'],
         }
         
-        # Contexto da conversa
-        self.context = {
-            'last_columns_created': [],
-            'last_operations': [],
-            'user_patterns': {}
-        }
+        # Contexto da conversa e histórico ficam por sessão (app.services.sessions)
         
-        # Histórico para aprendizado
-        self.command_history = []
+        # Cache LRU: texto normalizado -> (intenção, parâmetros do texto normalizado)
+        self._classify_cached = lru_cache(maxsize=INTENT_CACHE_SIZE)(self._classify)
     
     def normalize_command(self, command: str) -> str:
         """Normaliza comando removendo acentos e caracteres especiais"""
-        command = command.lower().strip()
-        replacements = {
-            'á': 'a', 'é': 'e', 'í': 'i', 'ó': 'o', 'ú': 'u',
-            'â': 'a', 'ê': 'e', 'ô': 'o', 'ã': 'a', 'õ': 'o',
-            'ç': 'c'
-        }
-        for old, new in replacements.items():
-            command = command.replace(old, new)
-        return command
+        return normalize_text(command.strip())
     
     def extract_intent(self, command: str) -> Tuple[str, Dict[str, Any]]:
         """Extrai a intenção e parâmetros do comando"""
-        normalized = self.normalize_command(command)
+        intent, params = self._classify_cached(self.normalize_command(command))
+        params = dict(params)
+        
+        # O valor sai do comando original (preserva maiúsculas), fora do cache
+        if intent == 'CREATE_COLUMN':
+            match = re.search(r'(?:com|valor|=)\s+["\']?([^"\']+)["\']?', command)
+            if match:
+                params['value'] = match.group(1).strip()
+        
+        return intent, params
+    
+    def cache_metrics(self) -> Dict[str, Any]:
+        return cache_metrics(self._classify_cached)
+    
+    def _classify(self, normalized: str) -> Tuple[str, Tuple]:
+        """Cascata de sinônimos sobre o comando normalizado (parâmetros como tupla de pares)"""
+        intent, params = self._classify_params(normalized)
+        return intent, tuple(params.items())
+    
+    def _classify_params(self, normalized: str) -> Tuple[str, Dict[str, Any]]:
         params = {}
         
         # Detectar CRIAR COLUNA
@@ -58,11 +68,6 @@ class SpreadsheetAI:
                 if match:
                     params['column_name'] = match.group(1).upper()
                 
-                # Extrair valor opcional
-                match = re.search(r'(?:com|valor|=)\s+["\']?([^"\']+)["\']?', command)
-                if match:
-                    params['value'] = match.group(1).strip()
-                
                 return 'CREATE_COLUMN', params
         
         # Detectar SEPARAR
@@ -141,20 +146,9 @@ class SpreadsheetAI:
         
         return suggestions
     
-    def learn_from_command(self, command: str, intent: str, success: bool):
-        """Aprende com comandos executados"""
-        self.command_history.append({
-            'timestamp': datetime.now().isoformat(),
-            'command': command,
-            'intent': intent,
-            'success': success
-        })
-        
-        # Salvar padrões de sucesso
-        if success:
-            if intent not in self.context['user_patterns']:
-                self.context['user_patterns'][intent] = []
-            self.context['user_patterns'][intent].append(command)
+    def learn_from_command(self, command: str, intent: str, success: bool, session: SessionContext):
+        """Aprende com comandos executados (histórico e padrões de sucesso da sessão)"""
+        session.record(command, intent, success)
     
     def get_smart_suggestions(self, columns: List[str], data_sample: List[Dict]) -> List[str]:
         """Gera sugestões inteligentes baseadas nos dados"""
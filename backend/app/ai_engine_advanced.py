@@ -2,10 +2,15 @@
 Motor de IA AVANÇADO - Comandos Expandidos + Contexto Inteligente
 """
 import re
+from functools import lru_cache
 from typing import List, Dict, Any, Tuple, Optional
-from datetime import datetime
 import json
 
+from app.core.config import INTENT_CACHE_SIZE
+from app.services.columns import column_index
+from app.services.sessions import SessionContext
+from app.services.text import normalize_text, cache_metrics
+
 class AdvancedAI:
     def __init__(self):
         # Base de comandos expandida
@@ -22,6 +27,11 @@ class AdvancedAI:
                 r'cnpj.*v[aá]lid[oa]',
                 r'check.*cnpj'
             ],
+            'validar_cpf': [
+                r'valid[ao]r?\s+cpf',
+                r'cpf.*v[aá]lid[oa]',
+                r'check.*cpf'
+            ],
             'validar_telefone': [
                 r'valid[ao]r?\s+telefone',
                 r'telefone.*v[aá]lid[oa]',
@@ -171,56 +181,77 @@ class AdvancedAI:
             ]
         }
         
-        # Contexto da conversa
-        self.context = {
-            'last_command': None,
-            'last_columns_modified': [],
-            'last_intent': None,
-            'conversation_history': [],
-            'data_insights': {}
-        }
+        # Contexto da conversa fica por sessão (app.services.sessions)
+        self._compile_patterns()
+    
+    def _compile_patterns(self):
+        """Compila a tabela de padrões uma vez (chamar de novo se a tabela mudar)
+        
+        Lista plana (intenção, regex compilada) na ordem da tabela. Uma regex
+        única com uma alternativa por padrão sai mais lenta no `re` do CPython
+        (testa todas as alternativas em cada posição do texto e perde a busca
+        pelo prefixo literal de cada padrão), ver benchmarks/bench_intents.py.
+        
+        O cache LRU (comando normalizado -> casamento) é recriado junto.
+        """
+        self._compiled = [
+            (intent, re.compile(pattern))
+            for intent, patterns in self.command_patterns.items()
+            for pattern in patterns
+        ]
+        self._match_cached = lru_cache(maxsize=INTENT_CACHE_SIZE)(self.match_intent)
+    
+    def match_intent(self, cmd_lower: str) -> Optional[Tuple[str, Tuple]]:
+        """Primeira intenção (ordem da tabela) cujo padrão aparece no comando normalizado
+        
+        Retorna (intenção, grupos capturados pelo padrão) ou None.
+        """
+        for intent, pattern in self._compiled:
+            match = pattern.search(cmd_lower)
+            if match:
+                return intent, match.groups()
+        return None
     
-    def detect_intent_advanced(self, command: str, columns: List[str], data_sample: List[Dict]) -> Tuple[str, Dict]:
-        """Detecta intenção com contexto avançado"""
+    def cache_metrics(self) -> Dict[str, Any]:
+        return cache_metrics(self._match_cached)
+    
+    def detect_intent_advanced(self, command: str, columns: List[str], data_sample: List[Dict],
+                               session: Optional[SessionContext] = None) -> Tuple[str, Dict]:
+        """Detecta intenção com contexto avançado (contexto da sessão, ou descartável)"""
+        session = session if session is not None else SessionContext()
         cmd_lower = self.normalize(command)
         params = {}
         
-        # Analisar dados para contexto
-        self._analyze_data_context(columns, data_sample)
+        # Tentar cada padrão (compilados, primeira intenção da tabela; cache por comando)
+        found = self._match_cached(cmd_lower)
+        if found:
+            intent, groups = found
+            
+            # Extrair parâmetros do match
+            if groups:
+                params['extracted'] = groups
+            
+            # Detectar coluna mencionada (depende das colunas, fora do cache)
+            target = column_index(columns).mentioned(cmd_lower)
+            if target is not None:
+                params['target_column'] = target
+            
+            # Adicionar ao contexto
+            session.record(command, intent)
+            
+            return intent, params
         
-        # Tentar cada padrão
-        for intent, patterns in self.command_patterns.items():
-            for pattern in patterns:
-                match = re.search(pattern, cmd_lower)
-                if match:
-                    # Extrair parâmetros do match
-                    if match.groups():
-                        params['extracted'] = match.groups()
-                    
-                    # Detectar coluna mencionada
-                    for col in columns:
-                        if col.lower() in cmd_lower:
-                            params['target_column'] = col
-                            break
-                    
-                    # Adicionar ao contexto
-                    self.context['last_intent'] = intent
-                    self.context['conversation_history'].append({
-                        'command': command,
-                        'intent': intent,
-                        'timestamp': datetime.now().isoformat()
-                    })
-                    
-                    return intent, params
+        # Analisar dados para contexto (só as sugestões usam)
+        self._analyze_data_context(columns, data_sample, session)
         
         # Se não encontrou, tentar sugerir
-        suggestions = self._suggest_based_on_context(cmd_lower, columns)
+        suggestions = self._suggest_based_on_context(cmd_lower, columns, session)
         if suggestions:
             params['suggestions'] = suggestions
         
         return 'UNKNOWN', params
     
-    def _analyze_data_context(self, columns: List[str], data_sample: List[Dict]):
+    def _analyze_data_context(self, columns: List[str], data_sample: List[Dict], session: SessionContext):
         """Analisa dados para criar contexto inteligente"""
         if not data_sample:
             return
@@ -241,47 +272,40 @@ class AdvancedAI:
                 else:
                     insights[col] = 'text'
         
-        self.context['data_insights'] = insights
+        session.data_insights = insights
     
-    def _suggest_based_on_context(self, command: str, columns: List[str]) -> List[str]:
+    def _suggest_based_on_context(self, command: str, columns: List[str], session: SessionContext) -> List[str]:
         """Sugere ações baseado no contexto"""
         suggestions = []
         
         # Se mencionou coluna específica
-        for col in columns:
-            if col.lower() in command:
-                col_type = self.context['data_insights'].get(col, 'unknown')
-                
-                if col_type == 'email':
-                    suggestions.append(f"Validar emails na coluna {col}?")
-                    suggestions.append(f"Extrair domínio de {col}?")
-                elif col_type == 'numeric':
-                    suggestions.append(f"Calcular média de {col}?")
-                    suggestions.append(f"Somar valores de {col}?")
-                elif col_type == 'identifier':
-                    suggestions.append(f"Validar formato de {col}?")
-                    suggestions.append(f"Limpar {col}?")
+        for col in column_index(columns).mentions(command):
+            col_type = session.data_insights.get(col, 'unknown')
+            
+            if col_type == 'email':
+                suggestions.append(f"Validar emails na coluna {col}?")
+                suggestions.append(f"Extrair domínio de {col}?")
+            elif col_type == 'numeric':
+                suggestions.append(f"Calcular média de {col}?")
+                suggestions.append(f"Somar valores de {col}?")
+            elif col_type == 'identifier':
+                suggestions.append(f"Validar formato de {col}?")
+                suggestions.append(f"Limpar {col}?")
         
         return suggestions[:3]
     
     def normalize(self, text: str) -> str:
         """Normaliza texto"""
-        replacements = {
-            'á': 'a', 'é': 'e', 'í': 'i', 'ó': 'o', 'ú': 'u',
-            'â': 'a', 'ê': 'e', 'ô': 'o', 'ã': 'a', 'õ': 'o',
-            'ç': 'c'
-        }
-        text = text.lower()
-        for old, new in replacements.items():
-            text = text.replace(old, new)
-        return text
+        return normalize_text(text)
     
-    def get_smart_suggestions(self, columns: List[str], data_sample: List[Dict]) -> List[str]:
+    def get_smart_suggestions(self, columns: List[str], data_sample: List[Dict],
+                              session: Optional[SessionContext] = None) -> List[str]:
         """Gera sugestões inteligentes baseadas nos dados"""
-        self._analyze_data_context(columns, data_sample)
+        session = session if session is not None else SessionContext()
+        self._analyze_data_context(columns, data_sample, session)
         
         suggestions = []
-        insights = self.context['data_insights']
+        insights = session.data_insights
         
         for col, col_type in insights.items():
             if col_type == 'email' and len(suggestions) < 5:
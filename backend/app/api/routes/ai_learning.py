@@ -2,9 +2,12 @@ from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 from app.supabase_client import get_supabase
-from supabase import Client
+from app.db import AsyncSupabase
+from app.core.config import SIMILARITY_THRESHOLD, SIMILARITY_TOP_K
+from app.services.learning_buffer import learning_buffer
+from app.services.similarity import similarity_index
+import asyncio
 import re
-from difflib import SequenceMatcher
 
 router = APIRouter()
 
@@ -37,10 +40,6 @@ def extrair_palavras_chave(texto: str) -> List[str]:
     palavras = [p for p in texto_limpo.split() if p not in stopwords and len(p) > 2]
     return palavras
 
-def calcular_similaridade(texto1: str, texto2: str) -> float:
-    """Calcula similaridade entre dois textos (0 a 1)"""
-    return SequenceMatcher(None, texto1.lower(), texto2.lower()).ratio()
-
 def detectar_intencao(texto: str, keywords: List[str]) -> str:
     """Detecta a intenção baseado no texto e palavras-chave"""
     texto_lower = texto.lower()
@@ -66,91 +65,55 @@ def detectar_intencao(texto: str, keywords: List[str]) -> str:
     
     return 'geral'
 
-async def buscar_resposta_similar(
-    supabase: Client,
+def buscar_resposta_similar(
     input_text: str,
-    threshold: float = 0.7
+    threshold: float = SIMILARITY_THRESHOLD
 ) -> Optional[Dict[str, Any]]:
-    """Busca resposta similar no conhecimento acumulado"""
+    """Busca resposta similar no conhecimento acumulado (índice em memória)"""
     try:
-        # Buscar todos os padrões aprendidos
-        result = supabase.table('ai_learning')\
-            .select('*')\
-            .order('confidence', desc=True)\
-            .limit(50)\
-            .execute()
-        
-        if not result.data:
-            return None
-        
-        # Encontrar a mais similar
-        melhor_match = None
-        melhor_score = 0
-        
-        for pattern in result.data:
-            score = calcular_similaridade(input_text, pattern['input_text'])
-            if score > threshold and score > melhor_score:
-                melhor_score = score
-                melhor_match = pattern
-        
-        return melhor_match
+        return similarity_index.best(input_text, threshold, k=SIMILARITY_TOP_K)
     except Exception as e:
         print(f"Erro ao buscar resposta similar: {e}")
         return None
 
-async def aprender_interacao(
-    supabase: Client,
+async def confianca_atual(conhecimento: Dict[str, Any]) -> float:
+    """Confiança do padrão no banco + o ajuste deste worker ainda não gravado
+
+    O índice só enxerga os feedbacks deste worker; o valor do banco inclui
+    os dos outros.
+    """
+    try:
+        confianca = await similarity_index.refresh_confidence(get_supabase(), conhecimento['id'])
+    except Exception as e:
+        print(f"Erro ao ler confiança do padrão: {e}")
+        return conhecimento['confidence']
+    if confianca is None:
+        return 0.0   # padrão removido do banco
+    pendente = learning_buffer.pending_confidence(conhecimento['id'])
+    return min(1.0, max(0.1, confianca + pendente)) if pendente else confianca
+
+def aprender_interacao(
     input_text: str,
     response: str,
     intent: str,
     keywords: List[str],
     context: Optional[Dict[str, Any]] = None
 ):
-    """Salva interação no conhecimento"""
-    try:
-        data = {
-            'input_text': input_text,
-            'intent': intent,
-            'response': response,
-            'keywords': keywords,
-            'context': context,
-            'confidence': 0.7
-        }
-        
-        supabase.table('ai_learning').insert(data).execute()
-        
-        # Atualizar vocabulário
-        for palavra in keywords:
-            result = supabase.table('ai_vocabulary')\
-                .select('*')\
-                .eq('word', palavra)\
-                .execute()
-            
-            if result.data:
-                # Incrementar frequência
-                supabase.table('ai_vocabulary')\
-                    .update({'frequency': result.data[0]['frequency'] + 1})\
-                    .eq('word', palavra)\
-                    .execute()
-            else:
-                # Adicionar nova palavra
-                supabase.table('ai_vocabulary').insert({
-                    'word': palavra,
-                    'synonyms': [],
-                    'related_intents': [intent],
-                    'frequency': 1
-                }).execute()
-                
-    except Exception as e:
-        print(f"Erro ao aprender: {e}")
+    """Salva interação no conhecimento (gravada em lote pelo learning_buffer)"""
+    data = {
+        'input_text': input_text,
+        'intent': intent,
+        'response': response,
+        'keywords': keywords,
+        'context': context,
+        'confidence': 0.7
+    }
+    learning_buffer.add_pattern(data, keywords, intent)
 
 # ==================== ROTAS ====================
 
 @router.post("/learn")
-async def aprender(
-    payload: LearnRequest,
-    supabase: Client = Depends(get_supabase)
-):
+async def aprender(payload: LearnRequest):
     """IA aprende e gera resposta inteligente"""
     try:
         input_text = payload.input_text
@@ -163,17 +126,16 @@ async def aprender(
         intent = detectar_intencao(input_text, keywords)
         
         # Buscar resposta similar no conhecimento
-        conhecimento = await buscar_resposta_similar(supabase, input_text)
+        conhecimento = buscar_resposta_similar(input_text)
+        if conhecimento:
+            conhecimento['confidence'] = await confianca_atual(conhecimento)
         
         if conhecimento and conhecimento['confidence'] > 0.6:
             # Usar resposta aprendida
             response = conhecimento['response'].replace('[USER]', user_name)
             
             # Incrementar contador de sucesso
-            supabase.table('ai_learning')\
-                .update({'success_count': conhecimento['success_count'] + 1})\
-                .eq('id', conhecimento['id'])\
-                .execute()
+            learning_buffer.bump_pattern(conhecimento['id'], success=1)
             
             return {
                 "response": response,
@@ -225,7 +187,7 @@ async def aprender(
         response = random.choice(respostas_por_intencao.get(intent, respostas_por_intencao['geral']))
         
         # Aprender esta interação
-        await aprender_interacao(supabase, input_text, response, intent, keywords, payload.context)
+        aprender_interacao(input_text, response, intent, keywords, payload.context)
         
         return {
             "response": response,
@@ -245,60 +207,38 @@ async def aprender(
 @router.post("/feedback")
 async def registrar_feedback(
     payload: FeedbackRequest,
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncSupabase = Depends(get_supabase)
 ):
     """Registra feedback do usuário para melhorar"""
     try:
         # Salvar feedback
-        supabase.table('ai_feedback').insert({
+        learning_buffer.add_feedback({
             'conversation_id': payload.conversation_id,
             'user_input': payload.user_input,
             'ai_response': payload.ai_response,
             'feedback': payload.feedback,
             'correction': payload.correction
-        }).execute()
+        })
+        
+        if payload.feedback not in ('negative', 'positive'):
+            return {"message": "Feedback registrado com sucesso"}
+        
+        result = await supabase.table('ai_learning')\
+            .select('*')\
+            .eq('input_text', payload.user_input)\
+            .execute()
         
         # Se feedback negativo, reduzir confiança da resposta
         if payload.feedback == 'negative':
-            keywords = extrair_palavras_chave(payload.user_input)
-            intent = detectar_intencao(payload.user_input, keywords)
-            
-            # Buscar padrão correspondente
-            result = supabase.table('ai_learning')\
-                .select('*')\
-                .eq('input_text', payload.user_input)\
-                .execute()
-            
             if result.data:
-                pattern = result.data[0]
-                nova_confidence = max(0.1, pattern['confidence'] - 0.1)
-                
-                supabase.table('ai_learning')\
-                    .update({
-                        'confidence': nova_confidence,
-                        'fail_count': pattern['fail_count'] + 1
-                    })\
-                    .eq('id', pattern['id'])\
-                    .execute()
+                learning_buffer.bump_pattern(result.data[0]['id'], fail=1, confidence=-0.1)
+                similarity_index.adjust(result.data[0]['id'], -0.1)
         
         # Se feedback positivo, aumentar confiança
         elif payload.feedback == 'positive':
-            result = supabase.table('ai_learning')\
-                .select('*')\
-                .eq('input_text', payload.user_input)\
-                .execute()
-            
             if result.data:
-                pattern = result.data[0]
-                nova_confidence = min(1.0, pattern['confidence'] + 0.1)
-                
-                supabase.table('ai_learning')\
-                    .update({
-                        'confidence': nova_confidence,
-                        'success_count': pattern['success_count'] + 1
-                    })\
-                    .eq('id', pattern['id'])\
-                    .execute()
+                learning_buffer.bump_pattern(result.data[0]['id'], success=1, confidence=0.1)
+                similarity_index.adjust(result.data[0]['id'], 0.1)
         
         return {"message": "Feedback registrado com sucesso"}
         
@@ -307,22 +247,20 @@ async def registrar_feedback(
 
 @router.get("/statistics")
 async def estatisticas_aprendizado(
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncSupabase = Depends(get_supabase)
 ):
     """Retorna estatísticas do aprendizado"""
     try:
-        # Total de padrões aprendidos
-        patterns = supabase.table('ai_learning').select('*').execute()
-        
-        # Vocabulário
-        vocab = supabase.table('ai_vocabulary')\
-            .select('*')\
-            .order('frequency', desc=True)\
-            .limit(10)\
-            .execute()
-        
-        # Feedback
-        feedback = supabase.table('ai_feedback').select('*').execute()
+        # Padrões aprendidos, vocabulário e feedback (consultas em paralelo)
+        patterns, vocab, feedback = await asyncio.gather(
+            supabase.table('ai_learning').select('*').execute(),
+            supabase.table('ai_vocabulary')\
+                .select('*')\
+                .order('frequency', desc=True)\
+                .limit(10)\
+                .execute(),
+            supabase.table('ai_feedback').select('*').execute()
+        )
         
         return {
             "total_patterns": len(patterns.data) if patterns.data else 0,
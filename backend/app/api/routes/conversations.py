@@ -2,7 +2,7 @@ from fastapi import APIRouter, HTTPException, Depends
 from typing import Dict, Any, List, Optional
 from app.supabase_client import get_supabase
 from app.crud import conversation_crud
-from supabase import Client
+from app.db import AsyncSupabase
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -30,7 +30,7 @@ class MessageCreate(BaseModel):
 @router.post("/")
 async def create_conversation(
     payload: ConversationCreate,
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncSupabase = Depends(get_supabase)
 ):
     """Criar nova conversa"""
     try:
@@ -48,7 +48,7 @@ async def create_conversation(
 @router.get("/")
 async def list_conversations(
     limit: int = 50,
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncSupabase = Depends(get_supabase)
 ):
     """Listar todas conversas"""
     try:
@@ -63,7 +63,7 @@ async def list_conversations(
 @router.get("/{conversation_id}")
 async def get_conversation(
     conversation_id: int,
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncSupabase = Depends(get_supabase)
 ):
     """Buscar conversa específica"""
     try:
@@ -83,7 +83,7 @@ async def get_conversation(
 async def update_conversation(
     conversation_id: int,
     payload: ConversationUpdate,
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncSupabase = Depends(get_supabase)
 ):
     """Atualizar conversa"""
     try:
@@ -104,7 +104,7 @@ async def update_conversation(
 @router.delete("/{conversation_id}")
 async def delete_conversation(
     conversation_id: int,
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncSupabase = Depends(get_supabase)
 ):
     """Deletar conversa"""
     try:
@@ -126,7 +126,7 @@ async def delete_conversation(
 async def add_message(
     conversation_id: int,
     payload: MessageCreate,
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncSupabase = Depends(get_supabase)
 ):
     """Adicionar mensagem à conversa"""
     try:
@@ -146,7 +146,7 @@ async def add_message(
 async def get_messages(
     conversation_id: int,
     limit: int = 100,
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncSupabase = Depends(get_supabase)
 ):
     """Buscar mensagens de uma conversa"""
     try:
@@ -163,7 +163,7 @@ async def get_messages(
 async def get_conversation_context(
     conversation_id: int,
     limit: int = 10,
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncSupabase = Depends(get_supabase)
 ):
     """Buscar contexto recente (últimas N mensagens)"""
     try:
@@ -180,7 +180,7 @@ async def get_conversation_context(
 async def search_conversations(
     query: str,
     limit: int = 20,
-    supabase: Client = Depends(get_supabase)
+    supabase: AsyncSupabase = Depends(get_supabase)
 ):
     """Buscar conversas"""
     try:
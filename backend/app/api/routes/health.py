@@ -1,7 +1,30 @@
 from fastapi import APIRouter
+from app.ai_engine import ai_engine
+from app.ai_engine_advanced import advanced_ai
+from app.excel_assistant import excel_assistant
+from app.services.dispatch import work_dispatcher
+from app.services.jobs import job_queue
+from app.services.learning_buffer import learning_buffer
+from app.services.similarity import similarity_index
+from app.services.parallel import parallel_executor
+from app.services.sessions import session_store
 
 router = APIRouter()
 
 @router.get("/")
 async def health():
     return {"status": "healthy"}
+
+@router.get("/metrics")
+async def metrics():
+    """Fila do despachante (espera/execução), jobs, pool de processos, lotes do aprendizado, índice de similaridade, sessões, cache de intenção e base do Excel"""
+    return {
+        "dispatch": work_dispatcher.metrics(),
+        "jobs": dict(job_queue.stats),
+        "parallel": dict(parallel_executor.stats),
+        "learning": dict(learning_buffer.stats, pending=learning_buffer.pending),
+        "similarity": dict(similarity_index.stats),
+        "sessions": session_store.metrics(),
+        "intent_cache": {"ai_engine": ai_engine.cache_metrics(), "advanced_ai": advanced_ai.cache_metrics()},
+        "excel_knowledge": excel_assistant.metrics(),
+    }
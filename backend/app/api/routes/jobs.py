@@ -0,0 +1,117 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any
+import asyncio
+import json
+from app.core.config import JOB_EVENTS_INTERVAL
+from app.services.dataset_store import dataset_store
+from app.services.jobs import job_queue, public_view, FINISHED
+from app.api.routes import ai_commands_v2, templates
+
+router = APIRouter()
+
+
+# Com `dataset_id` no payload as rotas registram o resultado como nova
+# versão e devolvem só ID + preview, sem usar o request
+def _command_job(payload: Dict[str, Any]):
+    return ai_commands_v2._run_command(None, payload)
+
+
+def _template_job(payload: Dict[str, Any]):
+    return templates._apply_template(None, payload)
+
+
+JOB_KINDS = {
+    'command': ('command', _command_job),
+    'template': ('template_id', _template_job),
+}
+
+
+# O estado dos jobs pode estar no Redis (cliente síncrono): toda chamada ao
+# job_queue sai do event loop por asyncio.to_thread
+async def _job_or_404(job_id: str) -> Dict[str, Any]:
+    job = await asyncio.to_thread(job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado (ou expirado)")
+    return job
+
+
+@router.post("", status_code=202)
+async def submit_job(payload: Dict[str, Any]):
+    """Enfileirar um comando (MULTIONE, COMERCIAL...) ou template sobre um dataset
+
+    `{"kind": "command", "dataset_id": ..., "command": "multione"}` ou
+    `{"kind": "template", "dataset_id": ..., "template_id": "clean_all"}`.
+    O mesmo comando no mesmo dataset, com um job igual ainda ativo, devolve
+    esse job (`deduplicated: true`).
+    """
+    kind = payload.get('kind', 'command')
+    if kind not in JOB_KINDS:
+        raise HTTPException(status_code=400, detail=f"Tipo de job inválido: {kind}")
+    field, func = JOB_KINDS[kind]
+
+    dataset_id = payload.get('dataset_id')
+    if not dataset_id:
+        raise HTTPException(status_code=400, detail="Jobs trabalham sobre um dataset registrado (dataset_id)")
+    try:
+        dataset_store.info(dataset_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Dataset não encontrado")
+
+    command = str(payload.get(field) or '')
+    if not command:
+        raise HTTPException(status_code=400, detail=f"Campo '{field}' obrigatório")
+
+    job_payload = {'dataset_id': dataset_id, field: command}
+    return await asyncio.to_thread(job_queue.submit, kind, dataset_id, command, func, job_payload)
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str):
+    """Status, etapa e progresso (0 a 1)"""
+    return public_view(await _job_or_404(job_id))
+
+
+@router.get("/{job_id}/events")
+async def job_events(job_id: str):
+    """Progresso em Server-Sent Events até o job terminar"""
+    await _job_or_404(job_id)
+
+    async def stream():
+        last = None
+        while True:
+            job = await asyncio.to_thread(job_queue.get, job_id)
+            if job is None:
+                yield "event: expired\ndata: {}\n\n"
+                return
+            view = public_view(job)
+            if view != last:
+                event = job['status'] if job['status'] in FINISHED else 'progress'
+                yield f"event: {event}\ndata: {json.dumps(view, default=str)}\n\n"
+                last = view
+            if job['status'] in FINISHED:
+                return
+            await asyncio.sleep(JOB_EVENTS_INTERVAL)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+
+@router.get("/{job_id}/result")
+async def get_job_result(job_id: str):
+    """Resultado do job (mesmo corpo da rota síncrona: dataset_id + preview)"""
+    job = await _job_or_404(job_id)
+    if job['status'] == 'failed':
+        raise HTTPException(status_code=422, detail=job['error'])
+    if job['status'] == 'cancelled':
+        raise HTTPException(status_code=410, detail="Job cancelado")
+    if job['status'] != 'done':
+        raise HTTPException(status_code=409, detail=f"Job ainda em andamento ({job['stage']})")
+    return job['result']
+
+
+@router.delete("/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancelar job na fila ou rodando (para no próximo checkpoint)"""
+    await _job_or_404(job_id)
+    return public_view(await asyncio.to_thread(job_queue.cancel, job_id))
@@ -14,20 +14,20 @@ class ProjectCreate(BaseModel):
 
 @router.post("/")
 async def create_project(project: ProjectCreate):
-    return project_crud.create_project(project.name, project.data, project.columns, project.file_name)
+    return await project_crud.create_project(project.name, project.data, project.columns, project.file_name)
 
 @router.get("/")
 async def list_projects(skip: int = 0, limit: int = 100):
-    return project_crud.get_all_projects(skip, limit)
+    return await project_crud.get_all_projects(skip, limit)
 
 @router.get("/{project_id}")
 async def get_project(project_id: int):
-    project = project_crud.get_project(project_id)
+    project = await project_crud.get_project(project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Projeto não encontrado")
     return project
 
 @router.delete("/{project_id}")
 async def delete_project(project_id: int):
-    project_crud.delete_project(project_id)
+    await project_crud.delete_project(project_id)
     return {"message": "Projeto deletado"}
@@ -1,32 +1,209 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from typing import Dict, Any
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from typing import Dict, Any, List, Optional
+import re
 import pandas as pd
-from io import BytesIO
+from app.core.config import ROWS_WINDOW_MAX, SPLIT_MAX_PARTS
+from app.services.excel_stream import spool_upload, summarize_excel
+from app.services.dataset_store import dataset_store, frame_from_payload, dataset_response
+from app.services.dispatch import work_dispatcher
+from app.services.json_serializer import frame_json_response
+from app.services.split_export import FORMATS, EXCEL_MAX_ROWS, iter_split_zip, split_bounds, split_rows
+from app.services.wire_format import read_payload
 
 router = APIRouter()
 
 @router.post("/upload")
-async def upload_spreadsheet(file: UploadFile = File(...)):
-    """Upload e processar planilha"""
+async def upload_spreadsheet(file: UploadFile = File(...), registrar: bool = True):
+    """Upload e processar planilha (leitura em streaming)
+
+    Com `registrar=true` (padrão) o DataFrame fica no servidor e a resposta
+    traz o `dataset_id` para os próximos comandos.
+    """
     try:
-        contents = await file.read()
-        df = pd.read_excel(BytesIO(contents))
-        
-        return {
-            "filename": file.filename,
-            "rows": len(df),
-            "columns": list(df.columns),
-            "data": df.head(100).to_dict('records')
-        }
+        async with spool_upload(file) as path:
+            # Parse fora do event loop (fila limitada: 503 quando cheia)
+            return await work_dispatcher.run(_read_upload, path, file.filename, registrar)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Erro: {str(e)}")
 
+
+def _read_upload(path: str, filename: str, registrar: bool) -> Response:
+    resumo = summarize_excel(path, collect=registrar)
+
+    body = {
+        "filename": filename,
+        "rows": resumo["rows"],
+        "columns": resumo["columns"],
+    }
+    if registrar:
+        body["dataset_id"] = dataset_store.put(resumo["frame"])
+    return frame_json_response(body, resumo["preview"])
+
 @router.post("/transform")
 async def transform_data(payload: Dict[str, Any]):
     """Aplicar transformações"""
     try:
+        return await work_dispatcher.run(_transform, payload)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _transform(payload: Dict[str, Any]):
+    df, dataset_id = frame_from_payload(payload)
+    if df is None:
         df = pd.DataFrame(payload['data'])
-        # TODO: Aplicar transformações
-        return {"success": True, "data": df.to_dict('records')}
+    # TODO: Aplicar transformações
+    if dataset_id:
+        return dataset_response(df, dataset_id, {"success": True})
+    return {"success": True, "data": df.to_dict('records')}
+
+@router.get("/dataset/{dataset_id}")
+async def get_dataset_info(dataset_id: str):
+    """Metadados de um dataset registrado"""
+    try:
+        return dataset_store.info(dataset_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Dataset não encontrado")
+
+@router.get("/dataset/{dataset_id}/rows")
+async def get_dataset_rows(
+    dataset_id: str,
+    start: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1),
+    columns: Optional[List[str]] = Query(None),
+    sort_by: Optional[str] = None,
+    descending: bool = False,
+    filter_column: Optional[str] = None,
+    filter_value: Optional[str] = None
+):
+    """Janela de linhas para o editor (scroll sem reenviar a planilha)
+
+    Ordenação/filtro usam uma permutação pré-calculada e cacheada por
+    dataset, então cada página custa O(janela). Montar a permutação na
+    primeira página é pandas pesado: roda no despachante.
+    """
+    try:
+        return await work_dispatcher.run(
+            _dataset_rows, dataset_id, start, limit, columns,
+            sort_by, descending, filter_column, filter_value
+        )
+    except HTTPException:
+        raise
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Dataset não encontrado")
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+def _dataset_rows(dataset_id: str, start: int, limit: int, columns: Optional[List[str]],
+                  sort_by: Optional[str], descending: bool,
+                  filter_column: Optional[str], filter_value: Optional[str]) -> Response:
+    df_columns = dataset_store.info(dataset_id)['columns']
+    for col in (columns or []) + [c for c in (sort_by, filter_column) if c]:
+        if col not in df_columns:
+            raise HTTPException(status_code=400, detail=f"Coluna '{col}' não encontrada")
+
+    positions = dataset_store.row_index(
+        dataset_id, sort_by=sort_by, ascending=not descending,
+        filter_column=filter_column, filter_value=filter_value
+    )
+    stop = start + min(limit, ROWS_WINDOW_MAX)
+    window, total = dataset_store.window(dataset_id, start, stop, columns, positions)
+
+    return frame_json_response({
+        "dataset_id": dataset_id,
+        "start": start,
+        "end": start + len(window),
+        "total": total,
+        "columns": list(window.columns),
+    }, window)
+
+@router.delete("/dataset/{dataset_id}")
+async def delete_dataset(dataset_id: str):
+    """Remover dataset do servidor"""
+    if not dataset_store.delete(dataset_id):
+        raise HTTPException(status_code=404, detail="Dataset não encontrado")
+    return {"message": "Dataset removido"}
+
+@router.post("/split")
+async def split_export(request: Request):
+    """Baixar dividido em N partes: ZIP em streaming (JSON ou Arrow IPC)
+
+    Payload: `dataset_id` (ou `data`), `partes` (padrão 8), `formato`
+    ('xlsx' ou 'csv', padrão xlsx) e `nome` (prefixo dos arquivos). As
+    partes têm o mesmo número de linhas (diferença de no máximo 1) e entram
+    no ZIP à medida que ficam prontas. Com `linhas_por_parte` (ex.: 49 no
+    MULTIONE) cada parte tem esse número de linhas e `partes` é ignorado;
+    `linha_vazia` põe uma linha vazia abaixo do cabeçalho em cada parte.
+    """
+    try:
+        payload = await read_payload(request)
+        df, bounds, formato, nome = await work_dispatcher.run(_split, payload)
+        # A vaga do despachante fica presa até o último byte do ZIP
+        chunks = work_dispatcher.stream(iter_split_zip, df, bounds, formato, nome,
+                                        blank_row=bool(payload.get('linha_vazia')))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return StreamingResponse(
+        chunks,
+        media_type='application/zip',
+        headers={
+            'Content-Disposition': f'attachment; filename="{nome}_{len(bounds)}_partes.zip"',
+            'X-Split-Parts': str(len(bounds)),
+        }
+    )
+
+
+def _split(payload: Dict[str, Any]):
+    """Valida o pedido: (DataFrame, limites das partes, formato, nome)"""
+    # Exportação só lê: sem cópia do dataset
+    df, _ = frame_from_payload(payload, copy=False)
+    if df is None:
+        raise HTTPException(status_code=400, detail="Nenhum dado para dividir")
+
+    formato = str(payload.get('formato') or 'xlsx').lower()
+    if formato not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Formato '{formato}' inválido (use xlsx ou csv)")
+    if payload.get('linhas_por_parte') is not None:
+        try:
+            linhas = int(payload['linhas_por_parte'])
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="'linhas_por_parte' deve ser um número")
+        if linhas < 1:
+            raise HTTPException(status_code=400, detail="'linhas_por_parte' deve ser pelo menos 1")
+        bounds = split_rows(len(df), linhas)
+        if len(bounds) > SPLIT_MAX_PARTS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Com {linhas} linhas por parte seriam {len(bounds)} partes; "
+                       f"o máximo é {SPLIT_MAX_PARTS}"
+            )
+    else:
+        try:
+            partes = int(payload.get('partes', 8))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="'partes' deve ser um número")
+        if not 1 <= partes <= SPLIT_MAX_PARTS:
+            raise HTTPException(status_code=400, detail=f"'partes' deve estar entre 1 e {SPLIT_MAX_PARTS}")
+        bounds = split_bounds(len(df), partes)
+
+    # Cabeçalho (e a linha vazia, se pedida) também ocupam linhas da aba
+    maior = bounds[0][1] - bounds[0][0] + bool(payload.get('linha_vazia'))
+    if formato == 'xlsx' and maior >= EXCEL_MAX_ROWS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cada parte teria {maior} linhas; o Excel aceita até {EXCEL_MAX_ROWS - 1}. "
+                   f"Use mais partes ou CSV."
+        )
+
+    # Só ASCII no nome: vai no cabeçalho Content-Disposition
+    nome = re.sub(r'[^A-Za-z0-9_-]+', '_', str(payload.get('nome') or 'planilha')).strip('_')[:80] or 'planilha'
+    return df, bounds, formato, nome
@@ -1,117 +1,162 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from typing import Dict, Any
-import pandas as pd
-import re
+from app.services.columns import column_index
+from app.services.dataset_store import frame_from_payload
+from app.services.dispatch import work_dispatcher
+from app.services.formula_engine import EvaluationError, bind_template, evaluate
+from app.services.formulas import FormulaError
+from app.services.parallel import parallel_executor
+from app.services.transforms import (
+    normalize_contact_columns, commercial_columns, strip_special_chars
+)
+from app.services.wire_format import read_payload, respond_frame
 
 router = APIRouter()
 
 @router.post("/template")
-async def apply_template(payload: Dict[str, Any]):
+async def apply_template(request: Request):
     try:
-        template_id = payload.get('template_id')
-        data = payload.get('data', [])
-        columns = payload.get('columns', [])
+        payload = await read_payload(request)
+        # pandas roda fora do event loop (fila limitada: 503 quando cheia)
+        return await work_dispatcher.run(_apply_template, request, payload)
         
-        if not data:
-            raise HTTPException(status_code=400, detail="Nenhum dado fornecido")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _apply_template(request: Request, payload: Dict[str, Any]):
+    template_id = payload.get('template_id')
+    columns = payload.get('columns', [])
+    
+    df, dataset_id = frame_from_payload(payload)
+    if df is None:
+        raise HTTPException(status_code=400, detail="Nenhum dado fornecido")
+    
+    changes = []
+    
+    if template_id == 'normalize_contacts':
+        # Normalizar contatos
+        antes = len(df)
         
-        df = pd.DataFrame(data)
-        changes = []
+        # Remover duplicatas
+        df = df.drop_duplicates()
+        if len(df) < antes:
+            changes.append(f"Removidas {antes - len(df)} duplicatas")
         
-        if template_id == 'normalize_contacts':
-            # Normalizar contatos
-            antes = len(df)
-            
-            # Remover duplicatas
-            df = df.drop_duplicates()
-            if len(df) < antes:
-                changes.append(f"Removidas {antes - len(df)} duplicatas")
-            
-            # Limpar emails
-            for col in df.columns:
-                if 'email' in col.lower():
-                    df[col] = df[col].str.lower().str.strip()
-                    changes.append(f"Emails normalizados em '{col}'")
-            
-            # Padronizar nomes
-            for col in df.columns:
-                if 'nome' in col.lower() or 'name' in col.lower():
-                    df[col] = df[col].str.title()
-                    changes.append(f"Nomes padronizados em '{col}'")
+        # Limpar emails e padronizar nomes (por linha, pode ir para o pool)
+        df = parallel_executor.apply_rows(df, normalize_contact_columns)
+        columns = column_index(df.columns)
+        for col in columns.find_all('email'):
+            changes.append(f"Emails normalizados em '{col}'")
+        for col in columns.role_columns('nome'):
+            changes.append(f"Nomes padronizados em '{col}'")
+    
+    elif template_id == 'commercial_base':
+        # Base comercial
+        antes = len(df)
         
-        elif template_id == 'commercial_base':
-            # Base comercial
-            antes = len(df)
-            
-            # Limpar CNPJ
-            for col in df.columns:
-                if 'cnpj' in col.lower():
-                    df[col] = df[col].str.replace(r'[^0-9]', '', regex=True)
-                    changes.append(f"CNPJ limpo em '{col}'")
-            
-            # Padronizar empresas
-            for col in df.columns:
-                if 'empresa' in col.lower() or 'company' in col.lower():
-                    df[col] = df[col].str.upper().str.strip()
-                    changes.append(f"Empresas padronizadas em '{col}'")
-            
-            # Ordenar
-            if 'empresa' in df.columns:
-                df = df.sort_values('empresa')
-                changes.append("Ordenado por empresa")
-            
-            # Remover duplicatas
-            df = df.drop_duplicates()
-            if len(df) < antes:
-                changes.append(f"Removidas {antes - len(df)} duplicatas")
+        # Limpar CNPJ e padronizar empresas (por linha)
+        df = parallel_executor.apply_rows(df, commercial_columns)
+        columns = column_index(df.columns)
+        for col in columns.role_columns('cnpj'):
+            changes.append(f"CNPJ limpo em '{col}'")
+        for col in columns.role_columns('empresa'):
+            changes.append(f"Empresas padronizadas em '{col}'")
         
-        elif template_id == 'powerbi_ready':
-            # Preparar para Power BI
-            antes = len(df)
-            
-            # Remover linhas vazias
-            df = df.dropna(how='all')
-            if len(df) < antes:
-                changes.append(f"Removidas {antes - len(df)} linhas vazias")
-            
-            # Remover colunas totalmente vazias
-            antes_cols = len(df.columns)
-            df = df.dropna(axis=1, how='all')
-            if len(df.columns) < antes_cols:
-                changes.append(f"Removidas {antes_cols - len(df.columns)} colunas vazias")
-            
-            changes.append("Dados prontos para Power BI")
+        # Ordenar
+        if 'empresa' in df.columns:
+            df = df.sort_values('empresa')
+            changes.append("Ordenado por empresa")
         
-        elif template_id == 'clean_all':
-            # Limpeza completa
-            antes = len(df)
-            
-            # Remover linhas vazias
-            df = df.dropna(how='all')
-            changes.append(f"Removidas {antes - len(df)} linhas vazias")
-            
-            # Remover duplicatas
-            antes = len(df)
-            df = df.drop_duplicates()
+        # Remover duplicatas
+        df = df.drop_duplicates()
+        if len(df) < antes:
             changes.append(f"Removidas {antes - len(df)} duplicatas")
-            
-            # Remover caracteres especiais
-            for col in df.columns:
-                if df[col].dtype == 'object':
-                    df[col] = df[col].str.replace(r'[^a-zA-Z0-9\s@._-]', '', regex=True)
-            changes.append("Caracteres especiais removidos")
+    
+    elif template_id == 'powerbi_ready':
+        # Preparar para Power BI
+        antes = len(df)
         
-        else:
-            raise HTTPException(status_code=400, detail="Template não encontrado")
+        # Remover linhas vazias
+        df = df.dropna(how='all')
+        if len(df) < antes:
+            changes.append(f"Removidas {antes - len(df)} linhas vazias")
+        
+        # Remover colunas totalmente vazias
+        antes_cols = len(df.columns)
+        df = df.dropna(axis=1, how='all')
+        if len(df.columns) < antes_cols:
+            changes.append(f"Removidas {antes_cols - len(df.columns)} colunas vazias")
+        
+        changes.append("Dados prontos para Power BI")
+    
+    elif template_id == 'clean_all':
+        # Limpeza completa
+        antes = len(df)
         
-        # Substituir NaN
-        df = df.replace({pd.NA: None, pd.NaT: None})
-        df = df.where(pd.notna(df), None)
+        # Remover linhas vazias
+        df = df.dropna(how='all')
+        changes.append(f"Removidas {antes - len(df)} linhas vazias")
         
-        return {
-            "data": df.to_dict('records'),
-            "changes": changes
-        }
+        # Remover duplicatas
+        antes = len(df)
+        df = df.drop_duplicates()
+        changes.append(f"Removidas {antes - len(df)} duplicatas")
         
+        # Remover caracteres especiais
+        df = parallel_executor.apply_rows(df, strip_special_chars)
+        changes.append("Caracteres especiais removidos")
+    
+    else:
+        raise HTTPException(status_code=400, detail="Template não encontrado")
+    
+    return respond_frame(request, df, dataset_id, {"changes": changes})
+
+
+@router.post("/formula")
+async def apply_formula(request: Request):
+    """Calcula uma coluna nova a partir de uma fórmula Excel (vetorizada, numa passada)
+
+    Payload: `formula` (ex.: o `formula_template` de suggest_formula),
+    `column` (coluna que substitui `{col}` no modelo) e `target_column`
+    (nome da coluna nova, padrão "Resultado").
+    """
+    try:
+        payload = await read_payload(request)
+        return await work_dispatcher.run(_apply_formula, request, payload)
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+def _apply_formula(request: Request, payload: Dict[str, Any]):
+    formula = payload.get('formula') or ''
+    target = payload.get('target_column') or 'Resultado'
+
+    df, dataset_id = frame_from_payload(payload)
+    if df is None:
+        raise HTTPException(status_code=400, detail="Nenhum dado fornecido")
+
+    try:
+        if payload.get('column') is not None:
+            formula = bind_template(formula, payload['column'])
+        values = evaluate(df, formula)
+    except (FormulaError, EvaluationError) as e:
+        raise HTTPException(status_code=400, detail=f"Fórmula inválida: {e}")
+
+    df[target] = values
+    errors = int(values.isna().sum())
+    message = f"Coluna '{target}' calculada com {formula}"
+    if errors:
+        message += f" ({errors} linhas com erro ficaram vazias)"
+
+    return respond_frame(request, df, dataset_id, {
+        "message": message,
+        "formula": formula,
+        "column": target,
+        "errors": errors
+    })
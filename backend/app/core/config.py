@@ -0,0 +1,84 @@
+"""
+Configurações do backend (variáveis de ambiente)
+"""
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Ingestão de planilhas
+UPLOAD_CHUNK_ROWS = int(os.getenv("UPLOAD_CHUNK_ROWS", "5000"))
+UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_BYTES", str(1024 * 1024)))
+PREVIEW_ROWS = int(os.getenv("PREVIEW_ROWS", "100"))
+
+# Datasets no servidor (LRU em memória + spill para disco)
+DATASET_MEMORY_BYTES = int(os.getenv("DATASET_MEMORY_BYTES", str(512 * 1024 * 1024)))
+DATASET_DISK_BYTES = int(os.getenv("DATASET_DISK_BYTES", str(4 * 1024 * 1024 * 1024)))
+DATASET_SPILL_DIR = os.getenv("DATASET_SPILL_DIR", "")
+ROWS_WINDOW_MAX = int(os.getenv("ROWS_WINDOW_MAX", "5000"))
+ROW_INDEXES_PER_DATASET = int(os.getenv("ROW_INDEXES_PER_DATASET", "4"))
+
+# Serialização das respostas
+JSON_STREAM_ROWS = int(os.getenv("JSON_STREAM_ROWS", "50000"))
+JSON_BATCH_ROWS = int(os.getenv("JSON_BATCH_ROWS", "10000"))
+
+# Presets MULTIONE / COMERCIAL (execução por blocos, spill para disco)
+PRESET_CHUNK_ROWS = int(os.getenv("PRESET_CHUNK_ROWS", "50000"))
+PRESET_MEMORY_BYTES = int(os.getenv("PRESET_MEMORY_BYTES", str(256 * 1024 * 1024)))
+
+# Pool de processos para etapas por linha (0 = um worker por núcleo)
+PARALLEL_WORKERS = int(os.getenv("PARALLEL_WORKERS", "0")) or (os.cpu_count() or 1)
+PARALLEL_MIN_ROWS = int(os.getenv("PARALLEL_MIN_ROWS", "200000"))
+PARALLEL_SHM_DIR = os.getenv("PARALLEL_SHM_DIR", "")
+
+# Despacho do trabalho pesado das rotas (fora do event loop)
+DISPATCH_WORKERS = int(os.getenv("DISPATCH_WORKERS", "4"))
+DISPATCH_QUEUE_DEPTH = int(os.getenv("DISPATCH_QUEUE_DEPTH", "16"))
+DISPATCH_RETRY_AFTER = int(os.getenv("DISPATCH_RETRY_AFTER", "5"))
+DISPATCH_SAMPLES = int(os.getenv("DISPATCH_SAMPLES", "1024"))
+
+# Jobs em segundo plano (estado em Redis se REDIS_URL responder, senão em memória)
+REDIS_URL = os.getenv("REDIS_URL", "")
+REDIS_TIMEOUT = float(os.getenv("REDIS_TIMEOUT", "2"))   # conexão e cada comando (s)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", "100"))
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", "3600"))
+JOB_EVENTS_INTERVAL = float(os.getenv("JOB_EVENTS_INTERVAL", "0.5"))
+
+# Supabase (PostgREST assíncrono com pool de conexões)
+SUPABASE_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", "10"))
+SUPABASE_MAX_CONNECTIONS = int(os.getenv("SUPABASE_MAX_CONNECTIONS", "20"))
+
+# Escritas do aprendizado da IA (write-behind: lote a cada intervalo ou tamanho)
+LEARNING_FLUSH_INTERVAL = float(os.getenv("LEARNING_FLUSH_INTERVAL", "2"))
+LEARNING_FLUSH_SIZE = int(os.getenv("LEARNING_FLUSH_SIZE", "500"))
+LEARNING_BUFFER_MAX = int(os.getenv("LEARNING_BUFFER_MAX", "20000"))
+
+# Índice de similaridade das respostas aprendidas (n-gramas de caracteres + TF-IDF)
+# O limiar é de cosseno (escala diferente do antigo SequenceMatcher 0.7)
+SIMILARITY_INDEX_PATH = os.getenv("SIMILARITY_INDEX_PATH", "")
+SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.5"))
+SIMILARITY_TOP_K = int(os.getenv("SIMILARITY_TOP_K", "5"))
+
+# Contexto de conversa por sessão (LRU + TTL + teto de memória)
+SESSION_MAX = int(os.getenv("SESSION_MAX", "1000"))
+SESSION_TTL = float(os.getenv("SESSION_TTL", "3600"))
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", str(64 * 1024 * 1024)))
+SESSION_HISTORY = int(os.getenv("SESSION_HISTORY", "50"))
+
+# Cache de intenção por comando normalizado (LRU, por motor)
+INTENT_CACHE_SIZE = int(os.getenv("INTENT_CACHE_SIZE", "2048"))
+
+# Cache do AST das fórmulas Excel (por texto da fórmula)
+FORMULA_CACHE_SIZE = int(os.getenv("FORMULA_CACHE_SIZE", "1024"))
+
+# Snapshot compilado da base de conhecimento do Excel (vazio = app/excel_knowledge.snapshot)
+EXCEL_KNOWLEDGE_SNAPSHOT = os.getenv("EXCEL_KNOWLEDGE_SNAPSHOT", "")
+# Token das rotas administrativas (header X-Admin-Token); vazio = rotas desligadas
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Exportação dividida em N partes (ZIP em streaming)
+SPLIT_MAX_PARTS = int(os.getenv("SPLIT_MAX_PARTS", "1000"))
+SPLIT_CHUNK_ROWS = int(os.getenv("SPLIT_CHUNK_ROWS", "5000"))
+SPLIT_PARALLEL_MIN_ROWS = int(os.getenv("SPLIT_PARALLEL_MIN_ROWS", "50000"))
+SPLIT_EXPORT_DIR = os.getenv("SPLIT_EXPORT_DIR", "")
@@ -1,25 +1,6 @@
 """CRUD IA Learning"""
-from app.supabase_client import get_supabase
-
-supabase = get_supabase()
+from app.services.learning_buffer import learning_buffer
 
 def save_command_usage(command: str, intent: str, success: bool, columns: list):
-    existing = supabase.table("ai_commands")\
-        .select("*")\
-        .eq("command_text", command)\
-        .execute()
-    
-    if existing.data:
-        cmd_id = existing.data[0]["id"]
-        current_count = existing.data[0]["usage_count"]
-        supabase.table("ai_commands").update({
-            "usage_count": current_count + 1
-        }).eq("id", cmd_id).execute()
-    else:
-        supabase.table("ai_commands").insert({
-            "command_text": command,
-            "intent_detected": intent,
-            "success": success,
-            "columns_available": columns,
-            "usage_count": 1
-        }).execute()
+    # usage_count é somado no banco pelo lote do learning_buffer (sem ler antes)
+    learning_buffer.add_command(command, intent, success, columns)
@@ -1,11 +1,11 @@
-from supabase import Client
+from app.db import AsyncSupabase
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
 # ==================== CONVERSAS ====================
 
 async def create_conversation(
-    supabase: Client,
+    supabase: AsyncSupabase,
     name: str,
     user_name: str,
     description: Optional[str] = None,
@@ -21,16 +21,16 @@ async def create_conversation(
         'project_id': project_id
     }
     
-    result = supabase.table('conversations').insert(data).execute()
+    result = await supabase.table('conversations').insert(data).execute()
     return result.data[0] if result.data else None
 
 async def get_all_conversations(
-    supabase: Client,
+    supabase: AsyncSupabase,
     user_id: str = 'anonymous',
     limit: int = 50
 ) -> List[Dict[str, Any]]:
     """Listar todas conversas"""
-    result = supabase.table('conversations')\
+    result = await supabase.table('conversations')\
         .select('*')\
         .eq('user_id', user_id)\
         .order('updated_at', desc=True)\
@@ -40,11 +40,11 @@ async def get_all_conversations(
     return result.data if result.data else []
 
 async def get_conversation(
-    supabase: Client,
+    supabase: AsyncSupabase,
     conversation_id: int
 ) -> Optional[Dict[str, Any]]:
     """Buscar conversa específica"""
-    result = supabase.table('conversations')\
+    result = await supabase.table('conversations')\
         .select('*')\
         .eq('id', conversation_id)\
         .single()\
@@ -53,7 +53,7 @@ async def get_conversation(
     return result.data if result.data else None
 
 async def update_conversation(
-    supabase: Client,
+    supabase: AsyncSupabase,
     conversation_id: int,
     name: Optional[str] = None,
     description: Optional[str] = None
@@ -68,7 +68,7 @@ async def update_conversation(
     if not data:
         return None
     
-    result = supabase.table('conversations')\
+    result = await supabase.table('conversations')\
         .update(data)\
         .eq('id', conversation_id)\
         .execute()
@@ -76,11 +76,11 @@ async def update_conversation(
     return result.data[0] if result.data else None
 
 async def delete_conversation(
-    supabase: Client,
+    supabase: AsyncSupabase,
     conversation_id: int
 ) -> bool:
     """Deletar conversa"""
-    result = supabase.table('conversations')\
+    result = await supabase.table('conversations')\
         .delete()\
         .eq('id', conversation_id)\
         .execute()
@@ -90,7 +90,7 @@ async def delete_conversation(
 # ==================== MENSAGENS ====================
 
 async def add_message(
-    supabase: Client,
+    supabase: AsyncSupabase,
     conversation_id: int,
     role: str,
     content: str,
@@ -106,16 +106,16 @@ async def add_message(
         'metadata': metadata
     }
     
-    result = supabase.table('conversation_messages').insert(data).execute()
+    result = await supabase.table('conversation_messages').insert(data).execute()
     return result.data[0] if result.data else None
 
 async def get_conversation_messages(
-    supabase: Client,
+    supabase: AsyncSupabase,
     conversation_id: int,
     limit: int = 100
 ) -> List[Dict[str, Any]]:
     """Buscar todas mensagens de uma conversa"""
-    result = supabase.table('conversation_messages')\
+    result = await supabase.table('conversation_messages')\
         .select('*')\
         .eq('conversation_id', conversation_id)\
         .order('created_at', desc=False)\
@@ -125,12 +125,12 @@ async def get_conversation_messages(
     return result.data if result.data else []
 
 async def get_recent_messages(
-    supabase: Client,
+    supabase: AsyncSupabase,
     conversation_id: int,
     limit: int = 10
 ) -> List[Dict[str, Any]]:
     """Buscar últimas N mensagens para contexto"""
-    result = supabase.table('conversation_messages')\
+    result = await supabase.table('conversation_messages')\
         .select('*')\
         .eq('conversation_id', conversation_id)\
         .order('created_at', desc=True)\
@@ -140,11 +140,11 @@ async def get_recent_messages(
     return list(reversed(result.data)) if result.data else []
 
 async def delete_message(
-    supabase: Client,
+    supabase: AsyncSupabase,
     message_id: int
 ) -> bool:
     """Deletar mensagem específica"""
-    result = supabase.table('conversation_messages')\
+    result = await supabase.table('conversation_messages')\
         .delete()\
         .eq('id', message_id)\
         .execute()
@@ -152,13 +152,13 @@ async def delete_message(
     return len(result.data) > 0 if result.data else False
 
 async def search_conversations(
-    supabase: Client,
+    supabase: AsyncSupabase,
     query: str,
     user_id: str = 'anonymous',
     limit: int = 20
 ) -> List[Dict[str, Any]]:
     """Buscar conversas por nome ou usuário"""
-    result = supabase.table('conversations')\
+    result = await supabase.table('conversations')\
         .select('*')\
         .eq('user_id', user_id)\
         .or_(f'name.ilike.%{query}%,user_name.ilike.%{query}%')\
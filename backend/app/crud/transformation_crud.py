@@ -1,10 +1,8 @@
 """CRUD Transformações"""
 from app.supabase_client import get_supabase
 
-supabase = get_supabase()
-
-def save_transformation(project_id: int, command: str, intent: str, success: bool, message: str, execution_time: int):
-    response = supabase.table("transformations").insert({
+async def save_transformation(project_id: int, command: str, intent: str, success: bool, message: str, execution_time: int):
+    response = await get_supabase().table("transformations").insert({
         "project_id": project_id,
         "command": command,
         "intent": intent,
@@ -14,8 +12,8 @@ def save_transformation(project_id: int, command: str, intent: str, success: boo
     }).execute()
     return response.data[0] if response.data else None
 
-def get_project_history(project_id: int):
-    response = supabase.table("transformations")\
+async def get_project_history(project_id: int):
+    response = await get_supabase().table("transformations")\
         .select("*")\
         .eq("project_id", project_id)\
         .order("created_at", desc=True)\
@@ -0,0 +1,4 @@
+"""Acesso assíncrono ao Supabase (PostgREST via HTTP ou stand-in em memória)"""
+from app.db.query import AsyncSupabase, DatabaseError, Query, Response
+from app.db.rest import RestSupabase
+from app.db.memory import MemorySupabase
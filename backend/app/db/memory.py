@@ -0,0 +1,195 @@
+"""
+Stand-in do Supabase em memória
+
+Mesma API de tabelas do cliente PostgREST (`table().select()...execute()`),
+com as tabelas em listas de dicts. Serve para rodar o backend e o
+benchmark sem banco (`SUPABASE_URL=memory://`). Cobre o que o backend usa:
+eq/neq/gt/gte/lt/lte/ilike, `or_` simples, order, limit/range e single.
+As funções chamadas por `rpc()` são reimplementadas aqui (mesma semântica
+do SQL em `app/db/sql/`).
+
+`latency` simula o round trip de rede por chamada (respeitando o timeout
+da chamada, como o cliente HTTP).
+"""
+import asyncio
+import copy
+import re
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from app.db.query import AsyncSupabase, DatabaseError, Query, Response
+
+# Defaults das colunas que o backend lê sem ter gravado
+TABLE_DEFAULTS = {
+    'ai_learning': {'success_count': 0, 'fail_count': 0},
+    'ai_commands': {'usage_count': 0},
+    'ai_vocabulary': {'frequency': 0, 'synonyms': [], 'related_intents': []},
+}
+
+
+def _same(a: Any, b: Any) -> bool:
+    # PostgREST compara pelo tipo da coluna; aqui '1' e 1 também batem
+    return a == b or (a is not None and b is not None and str(a) == str(b))
+
+
+def _like(value: Any, pattern: str) -> bool:
+    if value is None:
+        return False
+    regex = '.*'.join(re.escape(part) for part in re.split(r'[%*]', pattern))
+    return re.fullmatch(regex, str(value), flags=re.IGNORECASE | re.DOTALL) is not None
+
+
+def _compare(value: Any, op: str, target: Any) -> bool:
+    if op == 'eq':
+        return _same(value, target)
+    if op == 'neq':
+        return not _same(value, target)
+    if op == 'is':
+        return value is None if target in (None, 'null') else _same(value, target)
+    if op == 'ilike':
+        return _like(value, target)
+    if value is None:
+        return False
+    if isinstance(value, (int, float)) and isinstance(target, str):
+        target = float(target)
+    return {
+        'gt': value > target, 'gte': value >= target,
+        'lt': value < target, 'lte': value <= target,
+    }[op]
+
+
+def _or_matches(row: Dict[str, Any], filters: str) -> bool:
+    for condition in filters.split(','):
+        column, op, value = condition.strip().split('.', 2)
+        if _compare(row.get(column), op, value):
+            return True
+    return False
+
+
+def _sort_key(value: Any):
+    # Nulos por último (ordem padrão do PostgREST em asc)
+    return (value is None, value if value is not None else 0)
+
+
+class MemorySupabase(AsyncSupabase):
+    def __init__(self, latency: float = 0.0, defaults: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.latency = latency
+        self.defaults = TABLE_DEFAULTS if defaults is None else defaults
+        self.tables: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._ids: Dict[str, int] = defaultdict(int)
+        self.calls = 0
+
+    def _matches(self, row: Dict[str, Any], query: Query) -> bool:
+        if not all(_compare(row.get(column), op, value) for column, op, value in query.filters):
+            return False
+        return query.or_filters is None or _or_matches(row, query.or_filters)
+
+    def _insert(self, query: Query) -> List[Dict[str, Any]]:
+        records = query.payload if isinstance(query.payload, list) else [query.payload]
+        now = datetime.now(timezone.utc).isoformat()
+        inserted = []
+        for record in records:
+            self._ids[query.table] += 1
+            row = {'id': self._ids[query.table], 'created_at': now, 'updated_at': now}
+            row.update(copy.deepcopy(self.defaults.get(query.table, {})))
+            row.update(copy.deepcopy(record))
+            self.tables[query.table].append(row)
+            inserted.append(row)
+        return inserted
+
+    def _apply_learning_batch(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        """Equivalente de `sql/apply_learning_batch.sql`"""
+        applied = {row['batch_id']: row for row in self.tables['ai_learning_batches']}
+        if batch.get('batch_id') in applied:
+            return applied[batch['batch_id']]['result']
+
+        def insert(table, rows):
+            return len(self._insert(self.table(table).insert(rows))) if rows else 0
+
+        patterns = batch.get('patterns') or []
+        inserted = self._insert(self.table('ai_learning').insert(patterns)) if patterns else []
+        result = {
+            'patterns': len(inserted),
+            'pattern_ids': [row['id'] for row in inserted],
+            'feedback': insert('ai_feedback', batch.get('feedback') or []),
+            'vocabulary': 0, 'counters': 0, 'commands': 0,
+        }
+
+        vocabulary = {row['word']: row for row in self.tables['ai_vocabulary']}
+        for entry in batch.get('vocabulary') or []:
+            row = vocabulary.get(entry['word'])
+            if row is None:
+                vocabulary[entry['word']] = self._insert(self.table('ai_vocabulary').insert(entry))[0]
+            else:
+                row['frequency'] += entry['frequency']
+                row['related_intents'] = sorted(set(row['related_intents']) | set(entry['related_intents']))
+            result['vocabulary'] += 1
+
+        patterns = {row['id']: row for row in self.tables['ai_learning']}
+        for entry in batch.get('counters') or []:
+            row = patterns.get(entry['id'])
+            if row is None:
+                continue
+            row['success_count'] += entry['success_count']
+            row['fail_count'] += entry['fail_count']
+            if entry['confidence']:
+                row['confidence'] = min(1.0, max(0.1, row['confidence'] + entry['confidence']))
+            result['counters'] += 1
+
+        commands = {row['command_text']: row for row in self.tables['ai_commands']}
+        for entry in batch.get('commands') or []:
+            row = commands.get(entry['command_text'])
+            if row is None:
+                commands[entry['command_text']] = self._insert(self.table('ai_commands').insert(entry))[0]
+            else:
+                row['usage_count'] += entry['usage_count']
+            result['commands'] += 1
+
+        self.tables['ai_learning_batches'].append({'batch_id': batch.get('batch_id'), 'result': result})
+        return result
+
+    def _rpc(self, query: Query) -> Any:
+        functions = {'apply_learning_batch': self._apply_learning_batch}
+        if query.table not in functions:
+            raise DatabaseError(f"Função '{query.table}' não existe", status=404, code='PGRST202')
+        return functions[query.table](**query.payload)
+
+    def _run(self, query: Query) -> Any:
+        if query.method == 'rpc':
+            return copy.deepcopy(self._rpc(query))
+        if query.method == 'insert':
+            data = self._insert(query)
+        else:
+            rows = self.tables[query.table]
+            data = [row for row in rows if self._matches(row, query)]
+            if query.method == 'update':
+                for row in data:
+                    row.update(copy.deepcopy(query.payload))
+            elif query.method == 'delete':
+                self.tables[query.table] = [row for row in rows if not self._matches(row, query)]
+            else:
+                for column, desc in reversed(query.orders):
+                    data = sorted(data, key=lambda row: _sort_key(row.get(column)), reverse=desc)
+                start = query.offset_rows or 0
+                stop = start + query.limit_rows if query.limit_rows is not None else None
+                data = data[start:stop]
+                if query.columns.strip() != '*':
+                    columns = [c.strip() for c in query.columns.split(',')]
+                    data = [{c: row.get(c) for c in columns} for row in data]
+
+        if query.single_row:
+            if len(data) != 1:
+                raise DatabaseError('JSON object requested, multiple (or no) rows returned',
+                                    status=406, code='PGRST116')
+            data = data[0]
+        return copy.deepcopy(data)
+
+    async def _execute(self, query: Query, timeout: Optional[float]) -> Response:
+        self.calls += 1
+        if self.latency:
+            try:
+                await asyncio.wait_for(asyncio.sleep(self.latency), timeout)
+            except asyncio.TimeoutError:
+                raise DatabaseError(f"Timeout consultando '{query.table}'", code='timeout')
+        return Response(self._run(query))
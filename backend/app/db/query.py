@@ -0,0 +1,136 @@
+"""
+Builder de consultas no formato do supabase-py
+
+`client.table('x').select('*').eq('id', 1).order('created_at', desc=True)`
+monta uma descrição neutra da consulta; `await ... .execute()` entrega para
+o executor do cliente (PostgREST via HTTP ou o stand-in em memória).
+"""
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+Payload = Union[Dict[str, Any], List[Dict[str, Any]]]
+
+
+class DatabaseError(Exception):
+    """Erro do banco (HTTP, timeout ou resposta de erro do PostgREST)"""
+
+    def __init__(self, message: str, status: Optional[int] = None, code: Optional[str] = None):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+
+class Response:
+    """Resultado de `execute()` (mesmo campo `data` do supabase-py)"""
+
+    def __init__(self, data: Any):
+        self.data = data
+
+
+class Query:
+    def __init__(self, client: "AsyncSupabase", table: str):
+        self.client = client
+        self.table = table
+        self.method = 'select'
+        self.columns = '*'
+        self.payload: Optional[Payload] = None
+        self.filters: List[Tuple[str, str, Any]] = []
+        self.or_filters: Optional[str] = None
+        self.orders: List[Tuple[str, bool]] = []
+        self.limit_rows: Optional[int] = None
+        self.offset_rows: Optional[int] = None
+        self.single_row = False
+
+    # Operações
+    def select(self, columns: str = '*') -> "Query":
+        self.method, self.columns = 'select', columns
+        return self
+
+    def insert(self, data: Payload) -> "Query":
+        self.method, self.payload = 'insert', data
+        return self
+
+    def update(self, data: Dict[str, Any]) -> "Query":
+        self.method, self.payload = 'update', data
+        return self
+
+    def delete(self) -> "Query":
+        self.method = 'delete'
+        return self
+
+    # Filtros
+    def _filter(self, column: str, op: str, value: Any) -> "Query":
+        self.filters.append((column, op, value))
+        return self
+
+    def eq(self, column: str, value: Any) -> "Query":
+        return self._filter(column, 'eq', value)
+
+    def neq(self, column: str, value: Any) -> "Query":
+        return self._filter(column, 'neq', value)
+
+    def gt(self, column: str, value: Any) -> "Query":
+        return self._filter(column, 'gt', value)
+
+    def gte(self, column: str, value: Any) -> "Query":
+        return self._filter(column, 'gte', value)
+
+    def lt(self, column: str, value: Any) -> "Query":
+        return self._filter(column, 'lt', value)
+
+    def lte(self, column: str, value: Any) -> "Query":
+        return self._filter(column, 'lte', value)
+
+    def ilike(self, column: str, pattern: str) -> "Query":
+        return self._filter(column, 'ilike', pattern)
+
+    def or_(self, filters: str) -> "Query":
+        """Sintaxe do PostgREST: 'name.ilike.%x%,user_name.ilike.%x%'"""
+        self.or_filters = filters
+        return self
+
+    # Ordenação / paginação
+    def order(self, column: str, desc: bool = False) -> "Query":
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, rows: int) -> "Query":
+        self.limit_rows = rows
+        return self
+
+    def range(self, start: int, end: int) -> "Query":
+        """Linhas de `start` a `end`, inclusive (como no supabase-py)"""
+        self.offset_rows, self.limit_rows = start, end - start + 1
+        return self
+
+    def single(self) -> "Query":
+        """Exatamente uma linha: `data` vira o objeto (erro se 0 ou várias)"""
+        self.single_row = True
+        return self
+
+    async def execute(self, timeout: Optional[float] = None) -> Response:
+        """Executa a consulta; `timeout` (s) vale só para esta chamada"""
+        return await self.client._execute(self, timeout)
+
+
+class AsyncSupabase(ABC):
+    """Interface comum dos clientes (`table()` + executor assíncrono)
+
+    Cada cliente implementa `_execute`.
+    """
+
+    def table(self, name: str) -> Query:
+        return Query(self, name)
+
+    def rpc(self, function: str, params: Optional[Dict[str, Any]] = None) -> Query:
+        """Chama uma função do banco (`POST /rest/v1/rpc/<função>`)"""
+        query = Query(self, function)
+        query.method, query.payload = 'rpc', params or {}
+        return query
+
+    @abstractmethod
+    async def _execute(self, query: Query, timeout: Optional[float]) -> Response:
+        """Executa a consulta descrita por `query`"""
+
+    async def close(self):
+        pass
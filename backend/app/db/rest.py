@@ -0,0 +1,102 @@
+"""
+Cliente PostgREST (Supabase) assíncrono
+
+Um único `httpx.AsyncClient` por processo, com pool de conexões keep-alive
+(SUPABASE_MAX_CONNECTIONS): cada chamada reaproveita uma conexão aberta em
+vez de bloquear o event loop em um round trip síncrono. Consultas
+independentes podem ser disparadas juntas com `asyncio.gather` e seguem em
+paralelo pelo pool.
+"""
+from typing import Any, List, Optional, Tuple
+
+import httpx
+
+from app.db.query import AsyncSupabase, DatabaseError, Query, Response
+
+METHODS = {'select': 'GET', 'insert': 'POST', 'update': 'PATCH', 'delete': 'DELETE', 'rpc': 'POST'}
+
+
+def _literal(value: Any) -> str:
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+def query_params(query: Query) -> List[Tuple[str, str]]:
+    """Parâmetros de URL do PostgREST para a consulta"""
+    params = []
+    if query.method == 'select':
+        params.append(('select', query.columns))
+    for column, op, value in query.filters:
+        op = 'is' if value is None and op == 'eq' else op
+        params.append((column, f'{op}.{_literal(value)}'))
+    if query.or_filters:
+        params.append(('or', f'({query.or_filters})'))
+    if query.orders:
+        params.append(('order', ','.join(
+            f'{column}.{"desc" if desc else "asc"}' for column, desc in query.orders
+        )))
+    if query.limit_rows is not None:
+        params.append(('limit', str(query.limit_rows)))
+    if query.offset_rows:
+        params.append(('offset', str(query.offset_rows)))
+    return params
+
+
+class RestSupabase(AsyncSupabase):
+    def __init__(self, url: str, key: str, timeout: float, max_connections: int):
+        self.base_url = url.rstrip('/') + '/rest/v1/'
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._headers = {'apikey': key, 'Authorization': f'Bearer {key}'}
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _http(self) -> httpx.AsyncClient:
+        # Criado no primeiro uso (já dentro do event loop do servidor)
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self._headers,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+            )
+        return self._client
+
+    async def _execute(self, query: Query, timeout: Optional[float]) -> Response:
+        headers = {}
+        if query.method not in ('select', 'rpc'):
+            headers['Prefer'] = 'return=representation'
+        if query.single_row:
+            headers['Accept'] = 'application/vnd.pgrst.object+json'
+
+        try:
+            response = await self._http().request(
+                METHODS[query.method],
+                f'rpc/{query.table}' if query.method == 'rpc' else query.table,
+                params=query_params(query),
+                json=query.payload,
+                headers=headers,
+                timeout=timeout if timeout is not None else self.timeout,
+            )
+        except httpx.TimeoutException:
+            raise DatabaseError(f"Timeout consultando '{query.table}'", code='timeout')
+        except httpx.HTTPError as e:
+            raise DatabaseError(f"Falha de conexão com o Supabase: {e}")
+
+        if response.status_code >= 400:
+            try:
+                body = response.json()
+            except ValueError:
+                body = {'message': response.text}
+            raise DatabaseError(body.get('message') or response.text,
+                                status=response.status_code, code=body.get('code'))
+
+        return Response(response.json() if response.content else [])
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,112 @@
+-- Lote de escritas do aprendizado da IA (app/services/learning_buffer.py)
+--
+-- Aplica numa transação só o que o buffer acumulou entre dois flushes:
+-- novos padrões e feedbacks (insert em lote), frequência do vocabulário e
+-- contadores de ai_learning / ai_commands como incrementos atômicos
+-- (coluna = coluna + delta), sem ler antes de gravar. Vários workers podem
+-- mandar lotes ao mesmo tempo sem perder atualização.
+--
+-- Cada lote traz um `batch_id`, gravado em ai_learning_batches na mesma
+-- transação. O buffer reenvia com o mesmo id um lote cuja resposta não
+-- chegou (ex.: timeout depois do commit); um id já aplicado não soma de
+-- novo e devolve o resultado da primeira vez.
+--
+-- Rodar uma vez no SQL Editor do Supabase. Os índices únicos exigem que
+-- não haja palavras / comandos duplicados nas tabelas.
+
+create unique index if not exists ai_vocabulary_word_key on ai_vocabulary (word);
+create unique index if not exists ai_commands_command_text_key on ai_commands (command_text);
+
+create table if not exists ai_learning_batches (
+    batch_id uuid primary key,
+    result jsonb,
+    applied_at timestamptz not null default now()
+);
+
+create or replace function apply_learning_batch(batch jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+    n_patterns int := 0;
+    n_feedback int := 0;
+    n_vocabulary int := 0;
+    n_counters int := 0;
+    n_commands int := 0;
+    pattern_ids jsonb;
+    applied jsonb;
+begin
+    -- Lote já aplicado? (um reenvio concorrente espera o primeiro no índice único)
+    insert into ai_learning_batches (batch_id)
+    values ((batch->>'batch_id')::uuid)
+    on conflict (batch_id) do nothing;
+    if not found then
+        select result into applied from ai_learning_batches
+        where batch_id = (batch->>'batch_id')::uuid;
+        return applied;
+    end if;
+
+    -- Padrões novos, inseridos na ordem do lote: os ids (crescentes) casam
+    -- posição a posição com batch->'patterns' no índice de similaridade
+    with inserted as (
+        insert into ai_learning (input_text, intent, response, keywords, context, confidence)
+        select p.input_text, p.intent, p.response, p.keywords, p.context, p.confidence
+        from jsonb_populate_recordset(null::ai_learning, coalesce(batch->'patterns', '[]'))
+            with ordinality as p
+        order by p.ordinality
+        returning id
+    )
+    select coalesce(jsonb_agg(id order by id), '[]') into pattern_ids from inserted;
+    n_patterns := jsonb_array_length(pattern_ids);
+
+    -- Feedbacks
+    insert into ai_feedback (conversation_id, user_input, ai_response, feedback, correction)
+    select conversation_id, user_input, ai_response, feedback, correction
+    from jsonb_populate_recordset(null::ai_feedback, coalesce(batch->'feedback', '[]'));
+    get diagnostics n_feedback = row_count;
+
+    -- Vocabulário: soma a frequência e junta as intenções
+    insert into ai_vocabulary as v (word, synonyms, related_intents, frequency)
+    select word, coalesce(synonyms, '{}'), coalesce(related_intents, '{}'), frequency
+    from jsonb_populate_recordset(null::ai_vocabulary, coalesce(batch->'vocabulary', '[]'))
+    on conflict (word) do update set
+        frequency = v.frequency + excluded.frequency,
+        related_intents = array(
+            select distinct unnest(v.related_intents || excluded.related_intents)
+        );
+    get diagnostics n_vocabulary = row_count;
+
+    -- Contadores dos padrões (confiança limitada a [0.1, 1.0], como nas rotas)
+    update ai_learning l set
+        success_count = l.success_count + c.success_count,
+        fail_count = l.fail_count + c.fail_count,
+        confidence = case
+            when c.confidence = 0 then l.confidence
+            else least(1.0, greatest(0.1, l.confidence + c.confidence))
+        end
+    from jsonb_to_recordset(coalesce(batch->'counters', '[]'))
+        as c(id bigint, success_count int, fail_count int, confidence float8)
+    where l.id = c.id;
+    get diagnostics n_counters = row_count;
+
+    -- Uso de comandos
+    insert into ai_commands as a (command_text, intent_detected, success, columns_available, usage_count)
+    select command_text, intent_detected, success, columns_available, usage_count
+    from jsonb_populate_recordset(null::ai_commands, coalesce(batch->'commands', '[]'))
+    on conflict (command_text) do update set
+        usage_count = a.usage_count + excluded.usage_count;
+    get diagnostics n_commands = row_count;
+
+    applied := jsonb_build_object(
+        'patterns', n_patterns,
+        'pattern_ids', pattern_ids,
+        'feedback', n_feedback,
+        'vocabulary', n_vocabulary,
+        'counters', n_counters,
+        'commands', n_commands
+    );
+    update ai_learning_batches set result = applied
+    where batch_id = (batch->>'batch_id')::uuid;
+    return applied;
+end;
+$$;
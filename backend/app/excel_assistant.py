@@ -1,87 +1,52 @@
 """
 Assistente Excel com Base de Conhecimento
 """
-import json
-import re
+import threading
+import time
+from datetime import datetime
 from typing import List, Dict, Tuple, Optional
 from pathlib import Path
 
+from app.services.columns import column_index
+from app.services.formulas import function_key, functions_used
+from app.services.knowledge_base import KNOWLEDGE_PATH, SNAPSHOT_PATH, KnowledgeBase, load_knowledge
+
 class ExcelAssistant:
-    def __init__(self):
-        # Carregar base de conhecimento
-        knowledge_path = Path(__file__).parent / 'excel_knowledge.json'
-        with open(knowledge_path, 'r', encoding='utf-8') as f:
-            self.knowledge = json.load(f)
+    def __init__(self, base: Optional[KnowledgeBase] = None):
+        # Base de conhecimento: snapshot compilado (mmap) ou montada do JSON
+        self.base = base or KnowledgeBase.from_json()
         
-        # Criar índice invertido para busca rápida
-        self.index = self._build_index()
+        # Índice invertido (BM25) para busca rápida
+        self.index = self.base.index
     
-    def _build_index(self) -> Dict[str, List[Tuple[str, str]]]:
-        """Constrói índice invertido para busca"""
-        index = {}
-        
-        for categoria, funcoes in self.knowledge.items():
-            if categoria == 'dicas_avancadas':
-                continue
-            
-            for func_name, func_data in funcoes.items():
-                # Indexar por nome da função
-                if func_name not in index:
-                    index[func_name.lower()] = []
-                index[func_name.lower()].append((categoria, func_name))
-                
-                # Indexar por palavras-chave em português
-                if 'pt' in func_data:
-                    for palavra in func_data['pt']:
-                        if palavra not in index:
-                            index[palavra.lower()] = []
-                        index[palavra.lower()].append((categoria, func_name))
-        
-        return index
+    @property
+    def knowledge(self) -> Dict:
+        """Base de conhecimento no formato do JSON"""
+        return self.base.knowledge
     
-    def search_function(self, query: str) -> List[Dict]:
-        """Busca funções baseado em query em português"""
-        query_lower = query.lower()
+    @property
+    def functions(self) -> List[Tuple[str, str]]:
+        """(categoria, função) de cada documento do índice"""
+        return [self.base.function(doc) for doc in range(len(self.base))]
+    
+    def search_function(self, query: str, limit: int = 5) -> List[Dict]:
+        """Busca funções baseado em query em português (melhor score primeiro)"""
         results = []
         
-        # Remover acentos para busca mais flexível
-        query_normalized = self._normalize(query_lower)
-        
-        for keyword, functions in self.index.items():
-            keyword_norm = self._normalize(keyword)
-            if keyword_norm in query_normalized or query_normalized in keyword_norm:
-                for categoria, func_name in functions:
-                    func_data = self.knowledge[categoria][func_name]
-                    results.append({
-                        'funcao': func_name,
-                        'categoria': categoria,
-                        'sintaxe': func_data.get('sintaxe', ''),
-                        'descricao': func_data.get('descricao', ''),
-                        'exemplos': func_data.get('exemplos', []),
-                        'formula': func_data.get('formula', '')
-                    })
+        for doc, score in self.index.search(query, limit):
+            categoria, func_name = self.base.function(doc)
+            func_data = self.base.record(doc)
+            results.append({
+                'funcao': func_name,
+                'categoria': categoria,
+                'sintaxe': func_data.get('sintaxe', ''),
+                'descricao': func_data.get('descricao', ''),
+                'exemplos': func_data.get('exemplos', []),
+                'formula': func_data.get('formula', ''),
+                'score': round(score, 4)
+            })
         
-        # Remover duplicatas
-        seen = set()
-        unique_results = []
-        for r in results:
-            key = r['funcao']
-            if key not in seen:
-                seen.add(key)
-                unique_results.append(r)
-        
-        return unique_results[:5]  # Top 5 resultados
-    
-    def _normalize(self, text: str) -> str:
-        """Remove acentos e normaliza texto"""
-        replacements = {
-            'á': 'a', 'é': 'e', 'í': 'i', 'ó': 'o', 'ú': 'u',
-            'â': 'a', 'ê': 'e', 'ô': 'o', 'ã': 'a', 'õ': 'o',
-            'ç': 'c', 'ü': 'u'
-        }
-        for old, new in replacements.items():
-            text = text.replace(old, new)
-        return text
+        return results
     
     def suggest_formula(self, intent: str, columns: List[str]) -> Optional[Dict]:
         """Sugere fórmula baseado na intenção"""
@@ -92,37 +57,34 @@ class ExcelAssistant:
             return {
                 'descricao': 'Extrair domínio do email',
                 'formula_template': '=DIREITA({col}; NÚM.CARACT({col}) - LOCALIZAR("@"; {col}))',
-                'coluna_sugerida': next((c for c in columns if 'email' in c.lower()), None)
+                'coluna_sugerida': column_index(columns).find('email')
             }
         
         elif 'ddd' in intent_lower:
             return {
                 'descricao': 'Extrair DDD do telefone',
                 'formula_template': '=EXT.TEXTO({col}; LOCALIZAR("("; {col})+1; 2)',
-                'coluna_sugerida': next((c for c in columns if 'telefone' in c.lower()), None)
+                'coluna_sugerida': column_index(columns).find('telefone')
             }
         
         elif 'primeiro nome' in intent_lower:
             return {
                 'descricao': 'Extrair primeiro nome',
                 'formula_template': '=ESQUERDA({col}; LOCALIZAR(" "; {col})-1)',
-                'coluna_sugerida': next((c for c in columns if 'nome' in c.lower()), None)
+                'coluna_sugerida': column_index(columns).find('nome')
             }
         
         return None
     
     def explain_formula(self, formula: str) -> str:
-        """Explica uma fórmula Excel"""
+        """Explica uma fórmula Excel (funções na ordem em que aparecem)"""
         explanation = []
-        formula_upper = formula.upper()
         
-        # Detectar funções na fórmula
-        for categoria, funcoes in self.knowledge.items():
-            if categoria == 'dicas_avancadas':
-                continue
-            for func_name, func_data in funcoes.items():
-                if func_name in formula_upper:
-                    explanation.append(f"• {func_name}: {func_data.get('descricao', '')}")
+        # Funções da fórmula (AST em cache), cada uma buscada por hash na base
+        for name in functions_used(formula):
+            doc = self.base.find_key(function_key(name))
+            if doc is not None:
+                explanation.append(f"• {self.base.names[doc]}: {self.base.record(doc).get('descricao', '')}")
         
         if explanation:
             return "Essa fórmula usa:\n" + "\n".join(explanation)
@@ -131,7 +93,61 @@ class ExcelAssistant:
     
     def get_tips(self) -> List[str]:
         """Retorna dicas avançadas"""
-        return self.knowledge.get('dicas_avancadas', [])
+        return list(self.base.tips)
+
+
+class AssistantLoader:
+    """Assistente carregado no primeiro uso e trocado por inteiro no reload
+
+    Atributos que não são do loader vão para o assistente atual, então
+    `excel_assistant.search_function(...)` continua igual para as rotas.
+    O reload monta o assistente novo fora do lock e troca a referência de
+    uma vez: requisições em andamento terminam com o antigo (o mmap antigo
+    fica aberto enquanto alguém o usa). Cada worker recarrega o seu.
+    """
+
+    def __init__(self, path: Path = KNOWLEDGE_PATH, snapshot: Path = SNAPSHOT_PATH):
+        self.path = path
+        self.snapshot = snapshot
+        self._assistant: Optional[ExcelAssistant] = None
+        self._lock = threading.Lock()
+        self.stats = {'loads': 0, 'source': None, 'functions': 0, 'load_ms': 0.0, 'loaded_at': None}
+
+    def _load(self) -> ExcelAssistant:
+        inicio = time.perf_counter()
+        assistant = ExcelAssistant(load_knowledge(self.path, self.snapshot))
+        self._loaded(assistant, (time.perf_counter() - inicio) * 1000)
+        return assistant
+
+    def _loaded(self, assistant: ExcelAssistant, elapsed_ms: float):
+        self.stats.update(loads=self.stats['loads'] + 1, source=assistant.base.source,
+                          functions=len(assistant.base), load_ms=round(elapsed_ms, 2),
+                          loaded_at=datetime.now().isoformat())
+
+    def get(self) -> ExcelAssistant:
+        assistant = self._assistant
+        if assistant is None:
+            with self._lock:
+                if self._assistant is None:
+                    self._assistant = self._load()
+                assistant = self._assistant
+        return assistant
+
+    def reload(self) -> Dict:
+        """Abre o snapshot atual (ou o JSON) e troca o assistente sem reiniciar o worker"""
+        inicio = time.perf_counter()
+        assistant = ExcelAssistant(load_knowledge(self.path, self.snapshot))
+        with self._lock:
+            self._assistant = assistant
+            self._loaded(assistant, (time.perf_counter() - inicio) * 1000)
+        return self.metrics()
+
+    def metrics(self) -> Dict:
+        return dict(self.stats, loaded=self._assistant is not None)
+
+    def __getattr__(self, name: str):
+        return getattr(self.get(), name)
+
 
-# Instância global
-excel_assistant = ExcelAssistant()
+# Instância global (carrega no primeiro uso)
+excel_assistant = AssistantLoader()
@@ -1,8 +1,16 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.routes import health, spreadsheet, ml, templates, projects, conversations
 from app.api.routes import ai_learning
 from app.api.routes import ai_commands_v2
+from app.api.routes import jobs
+from app.services.dispatch import work_dispatcher
+from app.services.jobs import job_queue
+from app.services.learning_buffer import learning_buffer
+from app.services.similarity import similarity_index
+from app.services.parallel import parallel_executor
+from app.supabase_client import get_supabase, close_supabase
 
 app = FastAPI(title="Smart Spreadsheet API", version="0.5.0 - Supabase")
 
@@ -12,6 +20,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Número de partes da exportação dividida (lido pelo frontend)
+    expose_headers=["X-Split-Parts"],
 )
 
 app.include_router(health.router, tags=["health"])
@@ -22,3 +32,32 @@ app.include_router(spreadsheet.router, prefix="/api/spreadsheet", tags=["spreads
 app.include_router(ml.router, prefix="/api/ml", tags=["ml"])
 app.include_router(ai_commands_v2.router, prefix="/api/ml", tags=["ai"])
 app.include_router(templates.router, prefix="/api/transform", tags=["templates"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["jobs"])
+
+
+@app.on_event("startup")
+def check_database():
+    # Falha na subida se SUPABASE_URL/SUPABASE_KEY não estiverem configurados
+    get_supabase()
+
+
+@app.on_event("startup")
+async def load_similarity_index():
+    # Índice das respostas aprendidas: disco + padrões novos do banco
+    await similarity_index.warm(get_supabase())
+
+
+@app.on_event("shutdown")
+async def close_database():
+    # Grava o que ficou no buffer do aprendizado antes de fechar o pool
+    await learning_buffer.close()
+    await close_supabase()
+    await asyncio.to_thread(similarity_index.save)
+
+
+@app.on_event("shutdown")
+def shutdown_workers():
+    # Encerra as threads do despachante/jobs e o pool de processos (se chegou a ser criado)
+    work_dispatcher.shutdown()
+    job_queue.shutdown()
+    parallel_executor.shutdown()
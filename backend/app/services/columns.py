@@ -0,0 +1,180 @@
+"""
+Índice de colunas da planilha (menções no comando + papéis semânticos)
+
+As rotas e os motores achavam colunas com `col.lower() in comando` (ou
+`'email' in col.lower()`) para cada coluna, a cada comando. Em exports com
+1.000+ colunas isso é lento e ambíguo: "Nome" e "Nome Empresa" casam ao
+mesmo tempo e ganha a que vier primeiro.
+
+`ColumnIndex` é montado uma vez por conjunto de colunas (`column_index`,
+LRU pela tupla de colunas):
+
+- um autômato Aho-Corasick sobre os nomes normalizados (`normalize_text`):
+  as menções num comando saem numa passada, linear no tamanho do comando;
+  a menção precisa começar no início de uma palavra ("id" não casa dentro
+  de "validar") e, entre menções sobrepostas, ganha a mais longa
+- listas de colunas por palavra-chave (email, telefone, cnpj, empresa,
+  nome...), montadas com um segundo autômato sobre os nomes; `role` e
+  `find` devolvem a primeira coluna (na ordem da planilha) sem varrer
+  todas de novo
+"""
+from collections import deque
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from app.services.text import normalize_text
+
+# Papel semântico -> palavras-chave no nome da coluna
+ROLES = {
+    'email': ('email', 'mail'),
+    'telefone': ('telefone', 'phone', 'fone'),
+    'cnpj': ('cnpj',),
+    'cpf': ('cpf',),
+    'empresa': ('empresa', 'company'),
+    'nome': ('nome', 'name'),
+}
+
+
+class AhoCorasick:
+    """Autômato de busca de várias palavras numa passada pelo texto"""
+
+    def __init__(self, words: Iterable[str]):
+        self.words: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._out: List[List[int]] = [[]]
+        for word in words:
+            self._insert(word)
+        self._link()
+
+    def _insert(self, word: str):
+        node = 0
+        for char in word:
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][char] = nxt
+                self._goto.append({})
+                self._out.append([])
+            node = nxt
+        self._out[node].append(len(self.words))
+        self.words.append(word)
+
+    def _link(self):
+        # Links de falha em largura; a saída de cada nó inclui a do seu link
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+                queue.append(child)
+
+    def iter(self, text: str) -> Iterator[Tuple[int, int]]:
+        """(início, índice da palavra) de cada ocorrência, inclusive sobrepostas"""
+        goto, fail, out, words = self._goto, self._fail, self._out, self.words
+        node = 0
+        for end, char in enumerate(text, 1):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for word in out[node]:
+                yield end - len(words[word]), word
+
+
+class ColumnIndex:
+    def __init__(self, columns: Sequence[Any]):
+        self.columns = list(columns)
+        self.names = [normalize_text(str(col)).strip() for col in self.columns]
+
+        # Nome normalizado -> primeira coluna com esse nome
+        first: Dict[str, int] = {}
+        for i, name in enumerate(self.names):
+            if name:
+                first.setdefault(name, i)
+        self._name_columns = list(first.values())
+        self._mentions = AhoCorasick(first)
+
+        # Palavra-chave -> colunas que a contêm (na ordem da planilha)
+        keywords = {kw for kws in ROLES.values() for kw in kws}
+        self._postings: Dict[str, List[int]] = {kw: [] for kw in keywords}
+        automaton = AhoCorasick(keywords)
+        self._keywords: List[frozenset] = []
+        for i, name in enumerate(self.names):
+            found = frozenset(automaton.words[w] for _, w in automaton.iter(name))
+            for kw in found:
+                self._postings[kw].append(i)
+            self._keywords.append(found)
+        self._position = {}
+        for i, col in enumerate(self.columns):
+            self._position.setdefault(col, i)
+
+    def _matches(self, text: str) -> List[Tuple[int, int]]:
+        """Menções sem sobreposição: (posição, coluna), da esquerda para a direita, a mais longa primeiro"""
+        text = normalize_text(text)
+        found = [
+            (start, -len(self._mentions.words[word]), self._name_columns[word])
+            for start, word in self._mentions.iter(text)
+            if start == 0 or not text[start - 1].isalnum()
+        ]
+        found.sort()
+        result, end = [], 0
+        for start, neg_len, col in found:
+            if start >= end:
+                result.append((start, col))
+                end = start - neg_len
+        return result
+
+    def mentioned(self, text: str) -> Optional[Any]:
+        """Coluna citada no texto (a primeira menção; a mais longa se sobrepostas)"""
+        matches = self._matches(text)
+        return self.columns[matches[0][1]] if matches else None
+
+    def mentions(self, text: str) -> List[Any]:
+        """Todas as colunas citadas no texto, na ordem da planilha"""
+        return [self.columns[i] for i in sorted({col for _, col in self._matches(text)})]
+
+    def _posting(self, keyword: str) -> List[int]:
+        posting = self._postings.get(keyword)
+        if posting is None:
+            # Palavra fora de ROLES: uma varredura, guardada para as próximas
+            posting = self._postings[keyword] = [i for i, name in enumerate(self.names) if keyword in name]
+        return posting
+
+    def find_all(self, *keywords: str, exclude: Sequence[str] = ()) -> List[Any]:
+        """Colunas cujo nome contém alguma das palavras e nenhuma de `exclude`"""
+        hits = sorted({i for kw in keywords for i in self._posting(normalize_text(kw))})
+        if exclude:
+            excluded = {i for kw in exclude for i in self._posting(normalize_text(kw))}
+            hits = [i for i in hits if i not in excluded]
+        return [self.columns[i] for i in hits]
+
+    def find(self, *keywords: str, exclude: Sequence[str] = ()) -> Optional[Any]:
+        """Primeira coluna (ordem da planilha) de `find_all`"""
+        found = self.find_all(*keywords, exclude=exclude)
+        return found[0] if found else None
+
+    def role(self, role: str, exclude: Sequence[str] = ()) -> Optional[Any]:
+        """Primeira coluna com o papel (palavras-chave de ROLES)"""
+        return self.find(*ROLES[role], exclude=[kw for r in exclude for kw in ROLES[r]])
+
+    def role_columns(self, role: str) -> List[Any]:
+        """Todas as colunas com o papel, na ordem da planilha"""
+        return self.find_all(*ROLES[role])
+
+    def keywords(self, col: Any) -> frozenset:
+        """Palavras-chave de ROLES contidas no nome da coluna"""
+        return self._keywords[self._position[col]]
+
+
+@lru_cache(maxsize=64)
+def _cached_index(columns: Tuple) -> ColumnIndex:
+    return ColumnIndex(columns)
+
+
+def column_index(columns: Iterable[Any]) -> ColumnIndex:
+    """Índice das colunas (reaproveitado enquanto o conjunto de colunas for o mesmo)"""
+    return _cached_index(tuple(columns))
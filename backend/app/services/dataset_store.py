@@ -0,0 +1,320 @@
+"""
+Armazenamento de datasets no servidor
+
+O upload registra o DataFrame aqui e devolve um `dataset_id`. Comandos e
+templates trabalham sobre esse ID e cada resultado vira uma nova versão,
+então a planilha inteira não precisa trafegar como JSON a cada comando.
+
+Os datasets ficam em um LRU limitado por bytes. Quando o orçamento de
+memória estoura, os menos usados são gravados em disco (pickle) e recarregados
+sob demanda.
+"""
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+
+from app.core.config import (
+    DATASET_MEMORY_BYTES, DATASET_DISK_BYTES, DATASET_SPILL_DIR, PREVIEW_ROWS,
+    ROW_INDEXES_PER_DATASET
+)
+from app.services.json_serializer import frame_records
+
+
+class DatasetStore:
+    def __init__(self, max_memory_bytes: int, max_disk_bytes: int, spill_dir: str):
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.spill_dir = spill_dir or os.path.join(tempfile.gettempdir(), 'smart-spreadsheet-datasets')
+        os.makedirs(self.spill_dir, exist_ok=True)
+
+        # dataset_id -> {'df', 'path', 'bytes', 'parent_id', 'rows', 'columns',
+        #                'created_at', 'indexes'}
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._spilling_bytes = 0    # em memória, com o pickle sendo gravado
+        self._lock = threading.RLock()
+
+        self.stats = {'hits': 0, 'misses': 0, 'spills': 0, 'reloads': 0, 'evictions': 0}
+
+    def put(self, df: pd.DataFrame, parent_id: Optional[str] = None) -> str:
+        """Registra um DataFrame e retorna o novo ID"""
+        dataset_id = uuid.uuid4().hex
+        size = int(df.memory_usage(index=True, deep=True).sum())
+
+        with self._lock:
+            self._entries[dataset_id] = {
+                'df': df,
+                'path': None,
+                'bytes': size,
+                'parent_id': parent_id,
+                'rows': len(df),
+                'columns': list(df.columns),
+                'created_at': time.time(),
+                'indexes': OrderedDict(),
+                'spilling': False,
+            }
+            self._memory_bytes += size
+            spills = self._enforce_budget(keep=dataset_id)
+
+        self._write_spills(spills)
+        return dataset_id
+
+    def get(self, dataset_id: str) -> pd.DataFrame:
+        """Retorna o DataFrame (recarrega do disco se necessário)"""
+        with self._lock:
+            entry = self._entries.get(dataset_id)
+            if entry is None:
+                self.stats['misses'] += 1
+                raise KeyError(dataset_id)
+
+            self._entries.move_to_end(dataset_id)
+            self.stats['hits'] += 1
+
+            if entry['df'] is not None:
+                return entry['df']
+            path = entry['path']
+
+        # Leitura do disco fora do lock: os outros datasets seguem acessíveis
+        try:
+            df = pd.read_pickle(path)
+        except OSError:
+            # Descartado do disco enquanto isso
+            raise KeyError(dataset_id)
+
+        spills = []
+        with self._lock:
+            if entry['df'] is not None:
+                df = entry['df']            # outra thread recarregou antes
+            elif self._entries.get(dataset_id) is entry:
+                entry['df'] = df
+                self._memory_bytes += entry['bytes']
+                self.stats['reloads'] += 1
+                spills = self._enforce_budget(keep=dataset_id)
+        self._write_spills(spills)
+        return df
+
+    def info(self, dataset_id: str) -> Dict[str, Any]:
+        """Metadados do dataset sem carregar os dados"""
+        with self._lock:
+            entry = self._entries.get(dataset_id)
+            if entry is None:
+                raise KeyError(dataset_id)
+            return {
+                'dataset_id': dataset_id,
+                'parent_id': entry['parent_id'],
+                'rows': entry['rows'],
+                'columns': entry['columns'],
+                'bytes': entry['bytes'],
+                'in_memory': entry['df'] is not None,
+            }
+
+    def row_index(self, dataset_id: str, sort_by: Optional[str] = None, ascending: bool = True,
+                  filter_column: Optional[str] = None,
+                  filter_value: Optional[str] = None) -> Optional[np.ndarray]:
+        """Permutação de linhas (filtro + ordenação) calculada uma vez por dataset
+
+        Retorna None quando não há filtro nem ordenação (ordem original).
+        """
+        if not sort_by and not filter_column:
+            return None
+
+        key = (sort_by, ascending, filter_column, filter_value)
+        df = self.get(dataset_id)
+        with self._lock:
+            indexes = self._entries[dataset_id]['indexes']
+            if key in indexes:
+                indexes.move_to_end(key)
+                return indexes[key]
+
+        positions = np.arange(len(df))
+        if filter_column:
+            values = df[filter_column].astype(str)
+            mask = values.str.contains(filter_value or '', case=False, regex=False, na=False)
+            mask &= df[filter_column].notna()
+            positions = np.flatnonzero(mask.to_numpy())
+
+        if sort_by:
+            column = pd.Series(df[sort_by].to_numpy()[positions])
+            try:
+                order = column.sort_values(kind='stable', ascending=ascending, na_position='last')
+            except TypeError:
+                # Colunas com tipos misturados: ordenar como texto
+                order = column.where(column.isna(), column.astype(str)).sort_values(
+                    kind='stable', ascending=ascending, na_position='last'
+                )
+            positions = positions[order.index.to_numpy()]
+
+        with self._lock:
+            entry = self._entries.get(dataset_id)
+            if entry is not None:
+                entry['indexes'][key] = positions
+                while len(entry['indexes']) > ROW_INDEXES_PER_DATASET:
+                    entry['indexes'].popitem(last=False)
+        return positions
+
+    def window(self, dataset_id: str, start: int, stop: int,
+               columns: Optional[List[str]] = None,
+               positions: Optional[np.ndarray] = None) -> Tuple[pd.DataFrame, int]:
+        """Fatia [start, stop) das linhas (opcionalmente via permutação) - O(janela)"""
+        df = self.get(dataset_id)
+        col_idx = (
+            [df.columns.get_loc(c) for c in columns] if columns
+            else slice(None)
+        )
+        if positions is None:
+            return df.iloc[start:stop, col_idx], len(df)
+        return df.iloc[positions[start:stop], col_idx], len(positions)
+
+    def delete(self, dataset_id: str) -> bool:
+        with self._lock:
+            entry = self._entries.pop(dataset_id, None)
+            if entry is None:
+                return False
+            self._release(entry)
+            return True
+
+    def usage(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'datasets': len(self._entries),
+                'memory_bytes': self._memory_bytes,
+                'disk_bytes': self._disk_bytes,
+                **self.stats,
+            }
+
+    # ==================== EVICÇÃO ====================
+
+    def _enforce_budget(self, keep: str) -> List[Tuple[str, Dict[str, Any], pd.DataFrame]]:
+        """Escolhe os menos usados para sair da memória (chamado com o lock)
+
+        Os que já têm pickle saem na hora; os demais são devolvidos para
+        `_write_spills` gravar fora do lock.
+        """
+        spills = []
+        for dataset_id in list(self._entries.keys()):
+            if self._memory_bytes - self._spilling_bytes <= self.max_memory_bytes:
+                break
+            entry = self._entries[dataset_id]
+            if dataset_id == keep or entry['df'] is None or entry['spilling']:
+                continue
+            if entry['path'] is not None:
+                self._drop_frame(entry)
+            else:
+                entry['spilling'] = True
+                self._spilling_bytes += entry['bytes']
+                spills.append((dataset_id, entry, entry['df']))
+
+        self._evict_disk(keep)
+        return spills
+
+    def _evict_disk(self, keep: str):
+        """Descarta os mais antigos do disco (chamado com o lock)"""
+        for dataset_id in list(self._entries.keys()):
+            if self._disk_bytes <= self.max_disk_bytes:
+                break
+            entry = self._entries[dataset_id]
+            if dataset_id == keep or entry['df'] is not None:
+                continue
+            del self._entries[dataset_id]
+            self._release(entry)
+            self.stats['evictions'] += 1
+
+    def _write_spills(self, spills: List[Tuple[str, Dict[str, Any], pd.DataFrame]]):
+        """Grava os pickles sem segurar o lock (get/info/put dos outros seguem)"""
+        for dataset_id, entry, df in spills:
+            path = os.path.join(self.spill_dir, f'{dataset_id}.pkl')
+            try:
+                df.to_pickle(path)
+                written = True
+            except Exception as e:
+                print(f"⚠️ Spill do dataset {dataset_id} falhou: {e}")
+                written = False
+
+            with self._lock:
+                entry['spilling'] = False
+                self._spilling_bytes -= entry['bytes']
+                if not written or self._entries.get(dataset_id) is not entry:
+                    # Falhou (fica em memória) ou foi removido enquanto gravava
+                    _unlink(path)
+                    continue
+                entry['path'] = path
+                self._disk_bytes += entry['bytes']
+                if entry['df'] is not None:
+                    self._drop_frame(entry)
+                self._evict_disk(keep=dataset_id)
+
+    def _drop_frame(self, entry: Dict[str, Any]):
+        entry['df'] = None
+        entry['indexes'].clear()
+        self._memory_bytes -= entry['bytes']
+        self.stats['spills'] += 1
+
+    def _release(self, entry: Dict[str, Any]):
+        if entry['df'] is not None:
+            self._memory_bytes -= entry['bytes']
+            entry['df'] = None
+        if entry['path'] is not None:
+            _unlink(entry['path'])
+            self._disk_bytes -= entry['bytes']
+            entry['path'] = None
+
+
+def _unlink(path: str):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def frame_from_payload(payload: Dict[str, Any],
+                       copy: bool = True) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+    """DataFrame de entrada: pelo `dataset_id` (se houver) ou pelo campo `data`
+
+    Com `copy=True` o dataset vem numa cópia rasa: as colunas são as mesmas
+    do armazenado e só as que o comando substitui (`df[col] = ...`) ganham
+    array novo, sem duplicar a planilha inteira. Por isso os comandos não
+    escrevem dentro de colunas (`.loc[...] = `, `inplace=True`): sempre
+    atribuem a coluna inteira. `copy=False` devolve o próprio DataFrame do
+    dataset (só leitura, ex.: exportação).
+    """
+    dataset_id = payload.get('dataset_id')
+    if dataset_id:
+        try:
+            df = dataset_store.get(dataset_id)
+            return (df.copy(deep=False) if copy else df), dataset_id
+        except KeyError:
+            raise HTTPException(status_code=404, detail="Dataset não encontrado")
+
+    data = payload.get('data', [])
+    if isinstance(data, pd.DataFrame):
+        # Corpo em Arrow: já chega como DataFrame
+        return (data if len(data) else None), None
+    if not data:
+        return None, None
+    return pd.DataFrame(data), None
+
+
+def dataset_response(df: pd.DataFrame, parent_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+    """Registra o resultado como nova versão e devolve só o ID + preview"""
+    new_id = dataset_store.put(df, parent_id=parent_id)
+    body.update({
+        "dataset_id": new_id,
+        "parent_id": parent_id,
+        "rows": len(df),
+        "columns": list(df.columns),
+        "preview": frame_records(df.head(PREVIEW_ROWS)),
+    })
+    return body
+
+
+# Instância global
+dataset_store = DatasetStore(DATASET_MEMORY_BYTES, DATASET_DISK_BYTES, DATASET_SPILL_DIR)
@@ -0,0 +1,83 @@
+"""
+Extração vetorizada de dígitos
+
+Equivalente colunar de `re.sub(r'[^0-9]', '', texto)`: os valores da coluna
+são unidos em um único buffer, os bytes que não são dígitos ASCII são
+removidos com `bytes.translate` (uma passada em C) e o resultado é separado
+de volta em uma matriz de bytes de largura fixa, pronta para operações NumPy.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+
+SEP = '\x00'
+ROW_SEP = '\x01'
+ROW_SEP_BYTE = ord(ROW_SEP)
+_NON_DIGITS = bytes(c for c in range(128) if not (48 <= c <= 57) and c != 0)
+
+
+def _join(values: np.ndarray) -> str:
+    items = values.tolist()
+    try:
+        blob = SEP.join(items)
+    except TypeError:
+        items = list(map(str, items))
+        blob = SEP.join(items)
+
+    if blob.count(SEP) != max(len(items) - 1, 0):
+        # NUL dentro de algum valor: não é dígito, pode ser descartado
+        blob = SEP.join(v.replace(SEP, '') for v in items)
+    return blob
+
+
+def digit_matrix(values, max_digits: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Dígitos de cada valor (até `max_digits`) e a contagem total de dígitos
+
+    Retorna `(digits, counts)`: `digits` é uma matriz uint8 (n, max_digits)
+    com os dígitos em ASCII (b'0'..b'9') e 0 após o último dígito; `counts`
+    é o número total de dígitos de cada valor, mesmo acima do limite.
+    Sem `max_digits`, a largura é a do valor com mais dígitos.
+    Valores que não são str passam por str() (None -> 'None', sem dígitos).
+    """
+    values = np.asarray(values, dtype=object)
+    n = len(values)
+    if n == 0:
+        return np.zeros((0, max_digits or 0), dtype=np.uint8), np.zeros(0, dtype=np.int64)
+
+    # Caracteres não-ASCII nunca são [0-9]: podem sair no encode
+    only_digits = _join(values).encode('ascii', 'ignore').translate(None, _NON_DIGITS)
+    packed = np.array(only_digits.split(SEP.encode()), dtype='S')
+
+    width = packed.dtype.itemsize
+    matrix = packed.view(np.uint8).reshape(n, width) if width else np.zeros((n, 0), np.uint8)
+    counts = (matrix != 0).sum(axis=1)
+    if max_digits is None:
+        return matrix, counts
+
+    digits = np.zeros((n, max_digits), dtype=np.uint8)
+    keep = min(width, max_digits)
+    digits[:, :keep] = matrix[:, :keep]
+    return digits, counts
+
+
+def digits_to_strings(digits: np.ndarray, lengths: Optional[np.ndarray] = None) -> list:
+    """Matriz de dígitos ASCII -> lista de str com `lengths[i]` dígitos cada
+
+    Sem `lengths`, cada linha vira uma str com seus dígitos até o primeiro NUL
+    (a largura inteira da matriz quando não há preenchimento).
+    """
+    n, width = digits.shape
+    if n == 0:
+        return []
+
+    # Uma coluna extra com ROW_SEP fecha cada linha: o buffer inteiro é
+    # decodificado e separado de uma vez, sem um objeto bytes por linha
+    chars = np.empty((n, width + 1), dtype=np.uint8)
+    chars[:, :width] = digits
+    chars[:, width] = ROW_SEP_BYTE
+    if lengths is not None:
+        # Posições além do tamanho viram NUL, removido antes de separar
+        chars[:, :width][np.arange(width) >= np.asarray(lengths)[:, None]] = 0
+
+    text = chars.tobytes().decode('ascii').replace(SEP, '')
+    return text.split(ROW_SEP)[:-1]
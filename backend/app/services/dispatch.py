@@ -0,0 +1,209 @@
+"""
+Despacho do trabalho pesado das rotas (pandas fora do event loop)
+
+As rotas são `async def`, mas parse de planilha, presets e templates são
+pandas síncrono: rodando direto no event loop, um MULTIONE de 5 s trava o
+`/health` e o chat de todos os outros usuários. As rotas leem o corpo da
+requisição (I/O assíncrono) e entregam a parte síncrona a este despachante:
+
+- no máximo DISPATCH_WORKERS tarefas rodando ao mesmo tempo (threads; o
+  paralelismo de CPU dentro de uma tarefa fica com `app.services.parallel`)
+- no máximo DISPATCH_QUEUE_DEPTH esperando; acima disso a requisição é
+  recusada na hora com 503 + Retry-After, em vez de acumular latência
+- tempo de fila e de execução ficam em métricas (`/metrics`)
+- respostas em streaming (`stream`) ocupam a vaga até o último bloco (ou
+  até o cliente desconectar), não só enquanto a resposta é montada
+"""
+import asyncio
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator
+
+from fastapi import HTTPException
+
+from app.core.config import (
+    DISPATCH_WORKERS, DISPATCH_QUEUE_DEPTH, DISPATCH_RETRY_AFTER, DISPATCH_SAMPLES
+)
+
+
+def _summary(samples: deque) -> Dict[str, float]:
+    """Contagem, média, p50, p95 e máximo (ms) das últimas amostras"""
+    if not samples:
+        return {'count': 0, 'avg_ms': 0.0, 'p50_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0}
+    ordered = sorted(samples)
+    n = len(ordered)
+    return {
+        'count': n,
+        'avg_ms': round(sum(ordered) / n * 1000, 2),
+        'p50_ms': round(ordered[n // 2] * 1000, 2),
+        'p95_ms': round(ordered[min(n - 1, int(n * 0.95))] * 1000, 2),
+        'max_ms': round(ordered[-1] * 1000, 2),
+    }
+
+
+_DONE = object()
+
+
+def _close(iterator: Iterator):
+    close = getattr(iterator, 'close', None)
+    if close is not None:
+        close()
+
+
+class _Slot:
+    """Vaga de um `stream`: sai da fila no primeiro bloco, liberada uma vez só"""
+
+    def __init__(self, dispatcher: 'WorkDispatcher'):
+        self.dispatcher = dispatcher
+        self.submitted = time.perf_counter()
+        self.started = None
+        self.released = False
+
+    def start(self):
+        d = self.dispatcher
+        self.started = time.perf_counter()
+        with d._lock:
+            d._waiting -= 1
+            d._running += 1
+            d._wait_times.append(self.started - self.submitted)
+
+    def release(self, outcome: str):
+        d = self.dispatcher
+        with d._lock:
+            if self.released:
+                return
+            self.released = True
+            if self.started is None:
+                # Resposta descartada antes do primeiro bloco
+                d._waiting -= 1
+                d._counters['cancelled'] += 1
+                return
+            d._running -= 1
+            d._run_times.append(time.perf_counter() - self.started)
+            d._counters[outcome] += 1
+
+
+class WorkDispatcher:
+    def __init__(self, workers: int, queue_depth: int, retry_after: int, samples: int):
+        self.workers = max(1, workers)
+        self.queue_depth = max(0, queue_depth)
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='dispatch')
+        self._lock = threading.Lock()
+        self._running = 0
+        self._waiting = 0
+
+        self._wait_times = deque(maxlen=samples)
+        self._run_times = deque(maxlen=samples)
+        self._counters = {'accepted': 0, 'rejected': 0, 'completed': 0, 'failed': 0, 'cancelled': 0}
+
+    def _admit(self):
+        with self._lock:
+            if self._running + self._waiting >= self.workers + self.queue_depth:
+                self._counters['rejected'] += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="Servidor ocupado, tente novamente em instantes",
+                    headers={'Retry-After': str(self.retry_after)},
+                )
+            self._waiting += 1
+            self._counters['accepted'] += 1
+
+    def _call(self, submitted: float, func: Callable, args: tuple, kwargs: dict) -> Any:
+        started = time.perf_counter()
+        with self._lock:
+            self._waiting -= 1
+            self._running += 1
+            self._wait_times.append(started - submitted)
+        outcome = 'failed'
+        try:
+            result = func(*args, **kwargs)
+            outcome = 'completed'
+            return result
+        except HTTPException:
+            # Resposta de erro da própria rota (400/404...), não falha do worker
+            outcome = 'completed'
+            raise
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._run_times.append(time.perf_counter() - started)
+                self._counters[outcome] += 1
+
+    def _forget(self, future):
+        # Cancelada antes de começar (cliente desistiu): sai da fila
+        if future.cancelled():
+            with self._lock:
+                self._waiting -= 1
+                self._counters['cancelled'] += 1
+
+    async def run(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Roda `func(*args, **kwargs)` no pool e espera sem bloquear o event loop
+
+        Levanta HTTPException 503 (com Retry-After) se a fila estiver cheia.
+        """
+        self._admit()
+        future = self._executor.submit(self._call, time.perf_counter(), func, args, kwargs)
+        future.add_done_callback(self._forget)
+        return await asyncio.wrap_future(future)
+
+    def stream(self, func: Callable[..., Iterator], *args: Any, **kwargs: Any) -> AsyncIterator:
+        """Como `run`, para uma função que devolve um iterador (StreamingResponse)
+
+        A vaga é reservada já (503 aqui mesmo, antes de a resposta começar)
+        e fica ocupada até o iterador terminar ou o cliente desconectar;
+        `func` e cada próximo bloco rodam no pool.
+        """
+        self._admit()
+        slot = _Slot(self)
+        chunks = self._stream(slot, func, args, kwargs)
+        # Se a resposta nunca for iterada, o gerador não chega ao finally
+        weakref.finalize(chunks, slot.release, 'cancelled')
+        return chunks
+
+    async def _stream(self, slot: _Slot, func: Callable, args: tuple, kwargs: dict) -> AsyncIterator:
+        slot.start()
+        outcome = 'failed'
+        iterator = step = None
+        try:
+            step = self._executor.submit(lambda: iter(func(*args, **kwargs)))
+            iterator = await asyncio.wrap_future(step)
+            while True:
+                step = self._executor.submit(next, iterator, _DONE)
+                chunk = await asyncio.wrap_future(step)
+                if chunk is _DONE:
+                    break
+                yield chunk
+            outcome = 'completed'
+        except (asyncio.CancelledError, GeneratorExit):
+            outcome = 'cancelled'
+            raise
+        finally:
+            if iterator is not None:
+                # Fecha o iterador (limpeza dele) depois do bloco em andamento
+                step.add_done_callback(lambda _: _close(iterator))
+            slot.release(outcome)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'queue_depth': self.queue_depth,
+                'running': self._running,
+                'waiting': self._waiting,
+                **self._counters,
+                'queue_wait': _summary(self._wait_times),
+                'run_time': _summary(self._run_times),
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Instância global
+work_dispatcher = WorkDispatcher(
+    DISPATCH_WORKERS, DISPATCH_QUEUE_DEPTH, DISPATCH_RETRY_AFTER, DISPATCH_SAMPLES
+)
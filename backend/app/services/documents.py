@@ -0,0 +1,139 @@
+"""
+CNPJ e CPF vetorizados
+
+A coluna passa uma única vez pela extração de dígitos (`digit_matrix`) e
+todas as colunas derivadas saem da mesma matriz: dígitos, base/filial/DV,
+número formatado e validação dos dois dígitos verificadores (módulo 11).
+
+Regras mantidas dos antigos helpers por linha:
+- `digits`: só os dígitos, ou None se não houver nenhum
+- com o tamanho exato (14 no CNPJ, 11 no CPF): formatado e separado em partes
+- com outro tamanho: `formatted`/`base` ficam com os dígitos crus e
+  `branch`/`check_digits` ficam None
+"""
+from typing import Iterable, Sequence
+
+import numpy as np
+import pandas as pd
+
+from app.services.digits import digit_matrix, digits_to_strings
+
+CNPJ_DIGITS = 14
+CPF_DIGITS = 11
+
+CNPJ_FIELDS = ('digits', 'base', 'branch', 'check_digits', 'formatted', 'valid')
+CPF_FIELDS = ('digits', 'formatted', 'valid')
+
+# Pesos do módulo 11 (1º DV usa os últimos pesos, 2º DV usa todos)
+CNPJ_WEIGHTS = np.array([6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2], dtype=np.int64)
+CPF_WEIGHTS = np.arange(11, 1, -1, dtype=np.int64)
+
+# Máscaras: '#' é posição de dígito
+CNPJ_MASK = '##.###.###/####-##'
+CPF_MASK = '###.###.###-##'
+
+
+def check_digits(digits: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Os dois DVs esperados para cada linha de uma matriz de dígitos (0-9)
+
+    `digits` tem só o corpo do documento (12 colunas no CNPJ, 9 no CPF).
+    float32 usa o produto de matrizes do BLAS; as somas são inteiros exatos.
+    """
+    body = digits.astype(np.float32)
+    w = weights.astype(np.float32)
+    # 1º DV: pesos sem o primeiro; 2º DV: pesos completos sobre corpo + 1º DV
+    first = _mod11(body @ w[1:])
+    second = _mod11(body @ w[:-1] + first * w[-1])
+    return np.column_stack([first, second]).astype(np.int8)
+
+
+def _mod11(total: np.ndarray) -> np.ndarray:
+    rest = total.astype(np.int32) % 11
+    return np.where(rest < 2, 0, 11 - rest)
+
+
+def _validate(matrix: np.ndarray, exact: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    size = len(weights) + 1
+    numbers = matrix[:, :size].view(np.int8) - ord('0')
+    expected = check_digits(numbers[:, :size - 2], weights)
+    valid = exact & (expected[:, 0] == numbers[:, -2]) & (expected[:, 1] == numbers[:, -1])
+
+    # 000.000.000-00, 111.111.111-11... passam no módulo 11 mas não existem
+    repeated = np.ones(len(numbers), dtype=bool)
+    for i in range(1, size):
+        repeated &= numbers[:, i] == numbers[:, 0]
+    return valid & ~repeated
+
+
+def _apply_mask(matrix: np.ndarray, mask: str) -> list:
+    """Insere a pontuação da máscara em uma matriz de dígitos ASCII"""
+    slots = [i for i, c in enumerate(mask) if c == '#']
+    out = np.empty((len(matrix), len(mask)), dtype=np.uint8)
+    out[:] = np.frombuffer(mask.encode('ascii'), dtype=np.uint8)
+    out[:, slots] = matrix[:, :len(slots)]
+    return digits_to_strings(out)
+
+
+def _parse(values: pd.Series, size: int, mask: str, weights: np.ndarray,
+           parts: Sequence[tuple], fields: Iterable[str]) -> pd.DataFrame:
+    fields = list(fields)
+    matrix, counts = digit_matrix(values.to_numpy(dtype=object))
+    n = len(matrix)
+
+    if matrix.shape[1] < size:
+        matrix = np.pad(matrix, ((0, 0), (0, size - matrix.shape[1])))
+
+    has_digits = counts > 0
+    exact = counts == size
+    other = has_digits & ~exact
+
+    def column():
+        return np.full(n, None, dtype=object)
+
+    result = {}
+    # Dígitos crus: em `digits` para todas as linhas; nas demais colunas só
+    # para as linhas fora do tamanho padrão
+    raw = column()
+    if any(f in fields for f in ('digits', 'base', 'formatted')):
+        raw_rows = has_digits if 'digits' in fields else other
+        raw[raw_rows] = digits_to_strings(matrix[raw_rows], counts[raw_rows])
+
+    if 'digits' in fields:
+        result['digits'] = raw
+
+    for name, start, stop in parts:
+        if name not in fields:
+            continue
+        out = column()
+        out[exact] = digits_to_strings(matrix[exact, start:stop])
+        if start == 0:
+            # Tamanho fora do padrão: a primeira parte leva todos os dígitos
+            out[other] = raw[other]
+        result[name] = out
+
+    if 'formatted' in fields:
+        out = raw.copy()
+        out[exact] = _apply_mask(matrix[exact], mask)
+        result['formatted'] = out
+
+    if 'valid' in fields:
+        result['valid'] = _validate(matrix, exact, weights)
+
+    # dtype explícito: colunas só com None continuam object (não viram NaN)
+    return pd.DataFrame({
+        f: pd.Series(result[f], index=values.index, dtype=result[f].dtype) for f in fields
+    })
+
+
+def parse_cnpj(values: pd.Series, fields: Iterable[str] = CNPJ_FIELDS) -> pd.DataFrame:
+    """Colunas derivadas do CNPJ (`fields` escolhe quais, na ordem pedida)
+
+    base = 8 primeiros dígitos, branch = filial (4), check_digits = DV (2).
+    """
+    parts = [('base', 0, 8), ('branch', 8, 12), ('check_digits', 12, 14)]
+    return _parse(values, CNPJ_DIGITS, CNPJ_MASK, CNPJ_WEIGHTS, parts, fields)
+
+
+def parse_cpf(values: pd.Series, fields: Iterable[str] = CPF_FIELDS) -> pd.DataFrame:
+    """Colunas derivadas do CPF: dígitos, formatado (000.000.000-00) e validade"""
+    return _parse(values, CPF_DIGITS, CPF_MASK, CPF_WEIGHTS, [], fields)
@@ -0,0 +1,143 @@
+"""
+Leitura de planilhas Excel em streaming (memória limitada)
+
+O upload é copiado em blocos para um arquivo temporário e lido linha a linha
+com o openpyxl em modo read-only. As colunas são montadas em blocos de
+`UPLOAD_CHUNK_ROWS` linhas, então na leitura o pico de memória acompanha o
+tamanho do bloco, não o tamanho do arquivo (sem o workbook inteiro do
+openpyxl nem o arquivo em memória).
+
+Isso vale para o resumo (linhas, colunas, preview). Registrar o dataset
+(`summarize_excel(collect=True)`, o padrão do upload) guarda a planilha
+inteira como DataFrame: aí a memória é a do próprio dataset.
+"""
+import os
+import tempfile
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+import pandas as pd
+from fastapi import UploadFile
+from openpyxl import load_workbook
+
+from app.core.config import UPLOAD_CHUNK_ROWS, UPLOAD_SPOOL_BYTES, PREVIEW_ROWS
+
+
+@asynccontextmanager
+async def spool_upload(file: UploadFile, suffix: str = '.xlsx'):
+    """Copia o upload para um arquivo temporário sem carregar tudo em memória"""
+    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+    try:
+        with tmp:
+            while True:
+                block = await file.read(UPLOAD_SPOOL_BYTES)
+                if not block:
+                    break
+                tmp.write(block)
+        yield tmp.name
+    finally:
+        try:
+            os.unlink(tmp.name)
+        except OSError:
+            pass
+
+
+def _build_header(raw: tuple) -> List[Any]:
+    """Cabeçalho no mesmo padrão do pd.read_excel (Unnamed: N, nomes .1, .2...)"""
+    values = list(raw)
+    while values and values[-1] is None:
+        values.pop()
+
+    header = []
+    seen: Dict[Any, int] = {}
+    for i, value in enumerate(values):
+        name = f"Unnamed: {i}" if value is None else value
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        seen.setdefault(name, 0)
+        header.append(name)
+    return header
+
+
+def iter_excel_chunks(source, chunk_rows: int = UPLOAD_CHUNK_ROWS,
+                      sheet_name: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """Lê a primeira aba (ou `sheet_name`) em blocos de DataFrame"""
+    wb = load_workbook(source, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet_name] if sheet_name else wb.worksheets[0]
+        rows = ws.iter_rows(values_only=True)
+
+        header = None
+        for raw in rows:
+            if any(v is not None for v in raw):
+                header = _build_header(raw)
+                break
+
+        if not header:
+            return
+
+        width = len(header)
+        buffer = []
+        yielded = False
+        for raw in rows:
+            # Linhas totalmente vazias são ignoradas, como no pd.read_excel
+            if not any(v is not None for v in raw):
+                continue
+            row = raw[:width]
+            if len(row) < width:
+                row = row + (None,) * (width - len(row))
+            buffer.append(row)
+
+            if len(buffer) >= chunk_rows:
+                yield pd.DataFrame.from_records(buffer, columns=header)
+                yielded = True
+                buffer = []
+
+        if buffer:
+            yield pd.DataFrame.from_records(buffer, columns=header)
+        elif not yielded:
+            # Planilha só com cabeçalho (um bloco vazio a mais no fim
+            # deixaria todas as colunas object no concat)
+            yield pd.DataFrame(columns=header)
+    finally:
+        wb.close()
+
+
+def summarize_excel(source, chunk_rows: int = UPLOAD_CHUNK_ROWS,
+                    preview_rows: int = PREVIEW_ROWS, collect: bool = False) -> Dict[str, Any]:
+    """Conta linhas/colunas e monta o preview em uma única passada
+
+    Com `collect=True` os blocos também são concatenados em `frame`, para
+    registrar o dataset no servidor sem reler o arquivo; nesse caso a
+    planilha inteira fica em memória (os blocos e, no concat, o resultado).
+    """
+    total = 0
+    columns: List[Any] = []
+    preview_parts = []
+    preview_count = 0
+    chunks = []
+
+    for chunk in iter_excel_chunks(source, chunk_rows):
+        if collect:
+            chunks.append(chunk)
+        if not columns:
+            columns = list(chunk.columns)
+        if preview_count < preview_rows:
+            part = chunk.head(preview_rows - preview_count)
+            preview_parts.append(part)
+            preview_count += len(part)
+        total += len(chunk)
+
+    preview = pd.concat(preview_parts) if preview_parts else pd.DataFrame(columns=columns)
+
+    result = {
+        "rows": total,
+        "columns": columns,
+        "preview": preview,
+    }
+    if collect:
+        result["frame"] = (
+            pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=columns)
+        )
+    return result
@@ -0,0 +1,600 @@
+"""
+Avaliação vetorizada de fórmulas Excel sobre a planilha (coluna calculada)
+
+`ExcelAssistant.suggest_formula` sugere modelos como
+`=DIREITA({col}; NÚM.CARACT({col}) - LOCALIZAR("@"; {col}))`, mas o backend
+não sabia aplicá-los: para ter a coluna derivada o usuário exportava para o
+Excel e voltava.
+
+Aqui o AST de `formulas.parse` é compilado uma vez (cache LRU por texto)
+numa árvore de funções que opera em colunas inteiras (arrays NumPy /
+métodos `.str` do pandas), não célula a célula:
+
+- cada valor intermediário é (tipo, dados, máscara de erro): 'text'
+  (array object de str), 'number' (float64), 'bool' ou 'mixed' (SE com
+  ramos de tipos diferentes); o erro do Excel (#VALOR!, #DIV/0!) é uma
+  máscara booleana que se propaga pelas operações, e SEERRO a consome
+- referências: `[Coluna]`, nome solto igual ao de uma coluna (`Email`) e
+  célula A1 (`A2` = coluna A desta linha; a linha escrita é ignorada)
+- funções: ESQUERDA, DIREITA, EXT.TEXTO, LOCALIZAR, PROCURAR, NÚM.CARACT,
+  CONCATENAR, MAIÚSCULA, MINÚSCULA, ARRUMAR, SE, SEERRO, E, OU, NÃO (e os
+  nomes em inglês), aritmética (+ - * / ^ %), & e comparações (texto sem
+  diferenciar maiúsculas; número < texto < lógico, como no Excel)
+- recortes com limites diferentes por linha (DIREITA com NÚM.CARACT -
+  LOCALIZAR) viram uma matriz de code points por bloco de linhas e um
+  gather, sem laço Python por célula
+- célula vazia vale "" em coluna de texto; em coluna numérica a linha
+  fica sem resultado
+
+Linhas com erro saem vazias (None / NaN) na coluna calculada.
+"""
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import FORMULA_CACHE_SIZE
+from app.services.formulas import (
+    Array, Binary, Bool, Call, Column, ErrorValue, Missing, Name, Node, Number,
+    Percent, Ref, Text, Unary, function_key, parse
+)
+from app.services.text import normalize_text
+
+SLICE_CHARS = 1 << 20   # caracteres por bloco da matriz de code points
+MAX_INT = 2 ** 31
+
+TRUE_WORDS = {'VERDADEIRO': True, 'TRUE': True, 'FALSO': False, 'FALSE': False}
+
+
+class EvaluationError(ValueError):
+    """Fórmula válida que o motor não sabe avaliar (função, referência ou coluna)"""
+
+
+class Values(NamedTuple):
+    kind: str           # 'text' | 'number' | 'bool' | 'mixed'
+    data: Any           # escalar ou array com uma posição por linha
+    error: Any          # bool ou array de bool: linhas com erro do Excel
+
+
+def _is_array(value) -> bool:
+    return isinstance(value, np.ndarray)
+
+
+class _Context:
+    """Planilha da avaliação: número de linhas e colunas já convertidas"""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.rows = len(df)
+        self._columns: Dict[Any, Values] = {}
+        self._normalized: Optional[Dict[str, Any]] = None
+
+    def resolve(self, name: str) -> Any:
+        if name in self.df.columns:
+            return name
+        if self._normalized is None:
+            self._normalized = {}
+            for col in self.df.columns:
+                self._normalized.setdefault(normalize_text(str(col)).strip(), col)
+        col = self._normalized.get(normalize_text(name).strip())
+        if col is None:
+            raise EvaluationError(f"coluna '{name}' não encontrada")
+        return col
+
+    def column(self, col: Any) -> Values:
+        values = self._columns.get(col)
+        if values is None:
+            values = self._columns[col] = _leaf(self.df[col])
+        return values
+
+    def position(self, index: int) -> Values:
+        if index >= len(self.df.columns):
+            raise EvaluationError(f"a planilha não tem a coluna {index + 1}")
+        return self.column(self.df.columns[index])
+
+    def array(self, value, dtype) -> np.ndarray:
+        if _is_array(value):
+            return value.astype(dtype, copy=False)
+        result = np.empty(self.rows, dtype=dtype)
+        result[:] = value
+        return result
+
+
+def _leaf(series: pd.Series) -> Values:
+    """Coluna do DataFrame como valor da fórmula"""
+    missing = series.isna().to_numpy()
+    if pd.api.types.is_bool_dtype(series.dtype):
+        return Values('bool', series.to_numpy(dtype=bool, na_value=False), missing)
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return Values('number', series.to_numpy(dtype=np.float64, na_value=0.0), missing)
+
+    inferred = pd.api.types.infer_dtype(series, skipna=True)
+    if inferred in ('integer', 'floating', 'mixed-integer-float', 'decimal'):
+        numbers = pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64, na_value=0.0)
+        return Values('number', numbers, missing)
+    if inferred == 'boolean':
+        return Values('bool', np.where(missing, False, series.to_numpy(dtype=object)).astype(bool), missing)
+    data = series.to_numpy(dtype=object, na_value='')
+    return Values('text' if inferred in ('string', 'empty') else 'mixed', data, False)
+
+
+# ==================== CONVERSÕES ====================
+
+def _scalar_text(value) -> str:
+    if isinstance(value, (bool, np.bool_)):
+        return 'VERDADEIRO' if value else 'FALSO'
+    if isinstance(value, (int, float, np.number)):
+        return '%.15g' % value
+    return str(value)
+
+
+def _scalar_number(value) -> float:
+    if isinstance(value, (bool, np.bool_, int, float, np.number)):
+        return np.float64(value)
+    try:
+        return np.float64(str(value).strip().replace(',', '.'))
+    except ValueError:
+        return np.float64('nan')
+
+
+def _scalar_bool(value):
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, float, np.number)):
+        return value != 0
+    return TRUE_WORDS.get(str(value).strip().upper())
+
+
+def _number_texts(data: np.ndarray) -> np.ndarray:
+    """Números como texto do Excel (15 dígitos significativos; inteiros sem ',0')"""
+    result = np.empty(len(data), dtype=object)
+    integral = (np.trunc(data) == data) & (np.abs(data) < 1e15)
+    result[integral] = data[integral].astype(np.int64).astype(str).astype(object)
+    rest = data[~integral]
+    result[~integral] = np.fromiter(map('%.15g'.__mod__, rest.tolist()), dtype=object, count=len(rest))
+    return result
+
+
+_TEXTS = np.frompyfunc(_scalar_text, 1, 1)
+_NUMBERS = np.frompyfunc(_scalar_number, 1, 1)
+_BOOLS = np.frompyfunc(_scalar_bool, 1, 1)
+
+
+def _text(value: Values) -> Values:
+    if value.kind == 'text':
+        return value
+    data = value.data
+    if not _is_array(data):
+        return Values('text', _scalar_text(data), value.error)
+    if value.kind == 'number':
+        return Values('text', _number_texts(data), value.error)
+    if value.kind == 'bool':
+        return Values('text', np.where(data, 'VERDADEIRO', 'FALSO').astype(object), value.error)
+    return Values('text', _TEXTS(data).astype(object), value.error)
+
+
+def _number(value: Values) -> Values:
+    if value.kind == 'number':
+        return value
+    data = value.data
+    if not _is_array(data):
+        number = _scalar_number(data)
+        return Values('number', number, value.error | bool(np.isnan(number)))
+    if value.kind == 'bool':
+        return Values('number', data.astype(np.float64), value.error)
+    if value.kind == 'text':
+        numbers = pd.to_numeric(pd.Series(data, dtype=object).str.strip().str.replace(',', '.', regex=False),
+                                errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    else:
+        numbers = _NUMBERS(data).astype(np.float64)
+    invalid = np.isnan(numbers)
+    return Values('number', np.where(invalid, 0.0, numbers), value.error | invalid)
+
+
+def _bool(value: Values) -> Values:
+    if value.kind == 'bool':
+        return value
+    data = value.data
+    if value.kind == 'number':
+        return Values('bool', data != 0, value.error)
+    if not _is_array(data):
+        result = _scalar_bool(data)
+        return Values('bool', bool(result), value.error | (result is None))
+    results = _BOOLS(data)
+    invalid = np.equal(results, None)
+    return Values('bool', np.where(invalid, False, results).astype(bool), value.error | invalid)
+
+
+def _integer(value: Values) -> Values:
+    number = _number(value)
+    data = np.clip(np.trunc(number.data), -MAX_INT, MAX_INT)
+    return Values('number', data.astype(np.int64) if _is_array(data) else int(data), number.error)
+
+
+def _finite(data, error) -> Values:
+    invalid = ~np.isfinite(data)
+    if _is_array(data):
+        return Values('number', np.where(invalid, 0.0, data), error | invalid)
+    return Values('number', np.float64(0.0) if invalid else data, error | bool(invalid))
+
+
+# ==================== TEXTO ====================
+
+def _lengths(texts: np.ndarray) -> np.ndarray:
+    return np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+
+
+def _blocks(texts: np.ndarray):
+    """(início, fim, bloco como array de largura fixa) em blocos de até SLICE_CHARS caracteres"""
+    width = int(_lengths(texts).max()) if len(texts) else 0
+    step = max(1, SLICE_CHARS // max(width, 1))
+    for lo in range(0, len(texts), step):
+        hi = min(lo + step, len(texts))
+        yield lo, hi, texts[lo:hi].astype(str)
+
+
+def _slice_rows(texts: np.ndarray, start, stop) -> np.ndarray:
+    """texto[start:stop] de cada linha, com limites por linha (matriz de code points + gather)"""
+    rows = len(texts)
+    start = np.broadcast_to(start, (rows,))
+    stop = np.broadcast_to(stop, (rows,))
+    result = np.empty(rows, dtype=object)
+    for lo, hi, block in _blocks(texts):
+        width = block.dtype.itemsize // 4
+        if width == 0:
+            result[lo:hi] = ''
+            continue
+        codes = block.view(np.uint32).reshape(hi - lo, width)
+        first = np.clip(start[lo:hi], 0, width)[:, None]
+        last = np.clip(stop[lo:hi], 0, width)[:, None]
+        positions = first + np.arange(width)
+        taken = np.take_along_axis(codes, np.minimum(positions, width - 1), axis=1)
+        taken[positions >= last] = 0   # NUL no fim some na volta para str
+        result[lo:hi] = taken.view(block.dtype).ravel().astype(object)
+    return result
+
+
+def _slice(ctx: _Context, text: Values, start: Values, stop: Values, error) -> Values:
+    data = text.data
+    if not any(_is_array(v.data) for v in (text, start, stop)):
+        return Values('text', data[start.data:stop.data], error)
+    if _is_array(start.data) or _is_array(stop.data):
+        return Values('text', _slice_rows(ctx.array(data, object), start.data, stop.data), error)
+    sliced = pd.Series(data, dtype=object).str.slice(start.data, stop.data)
+    return Values('text', sliced.to_numpy(dtype=object), error)
+
+
+def _text_lengths(ctx: _Context, text: Values):
+    return _lengths(text.data) if _is_array(text.data) else len(text.data)
+
+
+def fn_left(ctx, text, count=Values('number', 1, False)):
+    text, count = _text(text), _integer(count)
+    error = text.error | count.error | (count.data < 0)
+    return _slice(ctx, text, Values('number', 0, False), count, error)
+
+
+def fn_right(ctx, text, count=Values('number', 1, False)):
+    text, count = _text(text), _integer(count)
+    error = text.error | count.error | (count.data < 0)
+    if not _is_array(count.data):
+        if count.data <= 0:
+            return Values('text', '', error)
+        return _slice(ctx, text, Values('number', -count.data, False), Values('number', MAX_INT, False), error)
+    lengths = _text_lengths(ctx, text)
+    start = np.maximum(lengths - count.data, 0)
+    return _slice(ctx, text, Values('number', start, False), Values('number', MAX_INT, False), error)
+
+
+def fn_mid(ctx, text, start, count):
+    text, start, count = _text(text), _integer(start), _integer(count)
+    error = text.error | start.error | count.error | (start.data < 1) | (count.data < 0)
+    first = start.data - 1
+    return _slice(ctx, text, Values('number', first, False), Values('number', first + count.data, False), error)
+
+
+def fn_len(ctx, text):
+    text = _text(text)
+    lengths = _text_lengths(ctx, text)
+    return Values('number', np.asarray(lengths, dtype=np.float64) if _is_array(lengths) else np.float64(lengths),
+                  text.error)
+
+
+def _wildcards(pattern: str) -> re.Pattern:
+    # ? = um caractere, * = qualquer sequência, ~ escapa o seguinte
+    parts = re.findall(r'~.|[?*]|[^?*~]+|~', pattern)
+    regex = ''.join('.' if p == '?' else '.*' if p == '*' else re.escape(p[1:] if p.startswith('~') and len(p) > 1 else p)
+                    for p in parts)
+    return re.compile(regex, re.IGNORECASE | re.DOTALL)
+
+
+def _find(ctx, find, within, start, case: bool):
+    find, within, start = _text(find), _text(within), _integer(start)
+    error = find.error | within.error | start.error | (start.data < 1)
+    needle, haystack, offset = find.data, within.data, start.data - 1
+    if not case and not _is_array(needle) and needle.lower() == needle.upper():
+        case = True   # "@", "(", " ": sem letras, maiúscula não importa
+    if not case:
+        needle = needle.lower() if not _is_array(needle) else np.char.lower(needle.astype(str)).astype(object)
+
+    if not _is_array(needle) and not _is_array(offset) and not case and any(c in needle for c in '?*~'):
+        pattern = _wildcards(find.data)
+        match = lambda text: (lambda m: m.start() if m else -1)(pattern.search(text, offset))
+        positions = np.frompyfunc(match, 1, 1)(haystack) if _is_array(haystack) else match(haystack)
+    elif not any(_is_array(v) for v in (needle, haystack, offset)):
+        positions = (haystack if case else haystack.lower()).find(needle, offset)
+    else:
+        texts = ctx.array(haystack, object)
+        needles = ctx.array(needle, object) if _is_array(needle) else needle
+        offsets = np.maximum(offset, 0)
+        positions = np.empty(ctx.rows, dtype=np.int64)
+        for lo, hi, block in _blocks(texts):
+            if not case:
+                block = np.char.lower(block)
+            positions[lo:hi] = np.char.find(
+                block,
+                needles[lo:hi].astype(str) if _is_array(needles) else needles,
+                offsets[lo:hi] if _is_array(offsets) else offsets
+            )
+
+    if _is_array(positions):
+        positions = positions.astype(np.int64)
+        return Values('number', (positions + 1).astype(np.float64), error | (positions < 0))
+    return Values('number', np.float64(positions + 1), error | (positions < 0))
+
+
+def fn_search(ctx, find, within, start=Values('number', 1, False)):
+    return _find(ctx, find, within, start, case=False)
+
+
+def fn_find(ctx, find, within, start=Values('number', 1, False)):
+    return _find(ctx, find, within, start, case=True)
+
+
+def fn_concat(ctx, *parts):
+    parts = [_text(part) for part in parts]
+    data, error = '', False
+    for part in parts:
+        data = data + part.data
+        error = error | part.error
+    return Values('text', data, error)
+
+
+def _string_method(method: str, *args):
+    def apply(ctx, text):
+        text = _text(text)
+        if not _is_array(text.data):
+            return Values('text', getattr(text.data, method)(*args), text.error)
+        data = getattr(pd.Series(text.data, dtype=object).str, method)(*args)
+        return Values('text', data.to_numpy(dtype=object), text.error)
+    return apply
+
+
+def fn_trim(ctx, text):
+    # ARRUMAR: tira espaços das pontas e deixa um só entre palavras
+    text = _text(text)
+    if not _is_array(text.data):
+        return Values('text', re.sub(' +', ' ', text.data.strip(' ')), text.error)
+    data = pd.Series(text.data, dtype=object).str.strip(' ').str.replace(' +', ' ', regex=True)
+    return Values('text', data.to_numpy(dtype=object), text.error)
+
+
+# ==================== LÓGICA ====================
+
+def _merge(ctx, mask, yes: Values, no: Values) -> Values:
+    """yes onde mask, no no resto (SE / SEERRO)"""
+    if not _is_array(mask):
+        return yes if mask else no
+    if yes.kind == no.kind:
+        kind = yes.kind
+        dtype = {'number': np.float64, 'bool': bool}.get(kind, object)
+    else:
+        kind, dtype = 'mixed', object
+    data = np.where(mask, ctx.array(yes.data, dtype), ctx.array(no.data, dtype))
+    return Values(kind, data, np.where(mask, yes.error, no.error))
+
+
+def fn_if(ctx, condition, yes=Values('bool', True, False), no=Values('bool', False, False)):
+    condition = _bool(condition)
+    result = _merge(ctx, condition.data, yes, no)
+    return Values(result.kind, result.data, condition.error | result.error)
+
+
+def fn_iferror(ctx, value, fallback):
+    return _merge(ctx, value.error, fallback, value)
+
+
+def fn_and(ctx, *values):
+    values = [_bool(value) for value in values]
+    data, error = True, False
+    for value in values:
+        data = data & value.data
+        error = error | value.error
+    return Values('bool', data, error)
+
+
+def fn_or(ctx, *values):
+    values = [_bool(value) for value in values]
+    data, error = False, False
+    for value in values:
+        data = data | value.data
+        error = error | value.error
+    return Values('bool', data, error)
+
+
+def fn_not(ctx, value):
+    value = _bool(value)
+    return Values('bool', ~value.data if _is_array(value.data) else not value.data, value.error)
+
+
+# Chave (function_key) -> (função, mínimo, máximo de argumentos; None = sem limite)
+FUNCTIONS: Dict[str, Tuple[Callable, int, Optional[int]]] = {}
+
+for _names, _spec in (
+    (('ESQUERDA', 'LEFT'), (fn_left, 1, 2)),
+    (('DIREITA', 'RIGHT'), (fn_right, 1, 2)),
+    (('EXT.TEXTO', 'MID'), (fn_mid, 3, 3)),
+    (('LOCALIZAR', 'SEARCH'), (fn_search, 2, 3)),
+    (('PROCURAR', 'FIND'), (fn_find, 2, 3)),
+    (('NÚM.CARACT', 'LEN'), (fn_len, 1, 1)),
+    (('CONCATENAR', 'CONCATENATE', 'CONCAT'), (fn_concat, 1, None)),
+    (('MAIÚSCULA', 'UPPER'), (_string_method('upper'), 1, 1)),
+    (('MINÚSCULA', 'LOWER'), (_string_method('lower'), 1, 1)),
+    (('ARRUMAR', 'TRIM'), (fn_trim, 1, 1)),
+    (('SE', 'IF'), (fn_if, 1, 3)),
+    (('SEERRO', 'IFERROR'), (fn_iferror, 2, 2)),
+    (('E', 'AND'), (fn_and, 1, None)),
+    (('OU', 'OR'), (fn_or, 1, None)),
+    (('NÃO', 'NOT'), (fn_not, 1, 1)),
+):
+    for _name in _names:
+        FUNCTIONS[function_key(_name)] = _spec
+
+
+# ==================== OPERADORES ====================
+
+_ARITHMETIC = {
+    '+': np.add, '-': np.subtract, '*': np.multiply, '/': np.divide, '^': np.power,
+}
+_COMPARE = {
+    '=': np.equal, '<>': np.not_equal, '<': np.less, '>': np.greater, '<=': np.less_equal, '>=': np.greater_equal,
+}
+_RANK = {'number': 0, 'text': 1, 'bool': 2}
+
+
+def _arithmetic(op: str, left: Values, right: Values) -> Values:
+    left, right = _number(left), _number(right)
+    with np.errstate(all='ignore'):
+        data = _ARITHMETIC[op](np.float64(left.data) if not _is_array(left.data) else left.data, right.data)
+    return _finite(data, left.error | right.error)
+
+
+def _compare(ctx, op: str, left: Values, right: Values) -> Values:
+    if 'mixed' in (left.kind, right.kind):
+        left, right = _text(left), _text(right)
+    error = left.error | right.error
+    if left.kind != right.kind:
+        # Tipos diferentes nunca são iguais: número < texto < lógico
+        return Values('bool', bool(_COMPARE[op](_RANK[left.kind], _RANK[right.kind])), error)
+    a, b = left.data, right.data
+    if left.kind == 'text':
+        a = pd.Series(a, dtype=object).str.lower().to_numpy() if _is_array(a) else a.lower()
+        b = pd.Series(b, dtype=object).str.lower().to_numpy() if _is_array(b) else b.lower()
+    data = _COMPARE[op](a, b)
+    return Values('bool', np.asarray(data, dtype=bool) if _is_array(data) else bool(data), error)
+
+
+def _binary(ctx, op: str, left: Values, right: Values) -> Values:
+    if op == '&':
+        return fn_concat(ctx, left, right)
+    if op in _COMPARE:
+        return _compare(ctx, op, left, right)
+    return _arithmetic(op, left, right)
+
+
+# ==================== COMPILAÇÃO ====================
+
+_CELL = re.compile(r"\$?([A-Za-z]{1,3})\$?\d+")
+
+
+def _column_number(letters: str) -> int:
+    index = 0
+    for char in letters.upper():
+        index = index * 26 + ord(char) - 64
+    return index - 1
+
+
+def _constant(value: Values) -> Callable:
+    return lambda ctx: value
+
+
+def _compile(node: Node) -> Callable:
+    if isinstance(node, Number):
+        return _constant(Values('number', np.float64(node.value), False))
+    if isinstance(node, Text):
+        return _constant(Values('text', node.value, False))
+    if isinstance(node, Bool):
+        return _constant(Values('bool', node.value, False))
+    if isinstance(node, ErrorValue):
+        return _constant(Values('number', np.float64(0.0), True))
+    if isinstance(node, Missing):
+        return _constant(Values('number', np.float64(0.0), False))
+    if isinstance(node, (Column, Name)):
+        name = node.name
+        return lambda ctx: ctx.column(ctx.resolve(name))
+    if isinstance(node, Ref):
+        cell = _CELL.fullmatch(node.text)
+        if cell is None:
+            raise EvaluationError(f"referência '{node.text}' não suportada (use uma célula da linha, como A2)")
+        index = _column_number(cell.group(1))
+        return lambda ctx: ctx.position(index)
+    if isinstance(node, Unary):
+        operand = _compile(node.operand)
+        if node.op == '+':
+            return operand
+        return lambda ctx: (lambda v: Values('number', -v.data, v.error))(_number(operand(ctx)))
+    if isinstance(node, Percent):
+        operand = _compile(node.operand)
+        return lambda ctx: (lambda v: Values('number', v.data / 100, v.error))(_number(operand(ctx)))
+    if isinstance(node, Binary):
+        op, left, right = node.op, _compile(node.left), _compile(node.right)
+        return lambda ctx: _binary(ctx, op, left(ctx), right(ctx))
+    if isinstance(node, Call):
+        spec = FUNCTIONS.get(function_key(node.name))
+        if spec is None:
+            raise EvaluationError(f"função {node.name} não suportada no servidor")
+        func, low, high = spec
+        if len(node.args) < low or (high is not None and len(node.args) > high):
+            limits = f"{low}" if low == high else f"{low} a {high}" if high else f"pelo menos {low}"
+            raise EvaluationError(f"{node.name} espera {limits} argumento(s), recebeu {len(node.args)}")
+        args = [_compile(arg) for arg in node.args]
+        return lambda ctx: func(ctx, *(arg(ctx) for arg in args))
+    if isinstance(node, Array):
+        raise EvaluationError("constantes de matriz ({...}) não são suportadas")
+    raise EvaluationError(f"expressão não suportada: {type(node).__name__}")
+
+
+class CompiledFormula:
+    def __init__(self, formula: str):
+        self.formula = formula
+        try:
+            self._run = _compile(parse(formula))
+        except RecursionError:
+            raise EvaluationError("fórmula aninhada demais para avaliar")
+
+    def __call__(self, df: pd.DataFrame) -> pd.Series:
+        """Coluna calculada (linhas com erro ficam vazias)"""
+        ctx = _Context(df)
+        try:
+            result = self._run(ctx)
+        except RecursionError:
+            raise EvaluationError("fórmula aninhada demais para avaliar")
+
+        dtype = {'number': np.float64, 'bool': bool}.get(result.kind, object)
+        data = ctx.array(result.data, dtype)
+        error = np.broadcast_to(result.error, (ctx.rows,))
+        if error.any():
+            data = data.astype(object if result.kind != 'number' else np.float64)
+            data[error] = None if result.kind != 'number' else np.nan
+        return pd.Series(data, index=df.index)
+
+
+@lru_cache(maxsize=FORMULA_CACHE_SIZE)
+def compile_formula(formula: str) -> CompiledFormula:
+    """Fórmula compilada (em cache por texto); FormulaError / EvaluationError se não der"""
+    return CompiledFormula(formula)
+
+
+def evaluate(df: pd.DataFrame, formula: str) -> pd.Series:
+    """Resultado da fórmula para cada linha da planilha"""
+    return compile_formula(formula)(df)
+
+
+def bind_template(template: str, column: Any) -> str:
+    """Modelo de `suggest_formula` com `{col}` trocado pela coluna ([Nome da coluna])"""
+    name = str(column)
+    if '[' in name or ']' in name:
+        raise EvaluationError(f"coluna '{name}' não pode ser citada numa fórmula (tem colchetes)")
+    return template.replace('{col}', f'[{name}]')
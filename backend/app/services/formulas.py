@@ -0,0 +1,365 @@
+"""
+Analisador de fórmulas Excel (lexer + parser com AST em cache)
+
+`ExcelAssistant.explain_formula` procurava cada função da base com
+`func_name in formula.upper()`: custo de (funções x tamanho da fórmula) e
+falsos positivos ("SE" dentro de "SEERRO", "MÉDIASE", "CONT.SE").
+
+Aqui a fórmula passa por um lexer de uma passada (uma regex com um grupo
+nomeado por tipo de token) e por um parser descendente recursivo com
+precedência de operadores:
+
+- separador pt-BR (`;`, vírgula decimal) ou en-US (`,`, ponto decimal):
+  se aparece `;` fora de texto a fórmula é pt-BR; sem `;`, também é pt-BR
+  quando há vírgula entre dígitos e nenhuma vírgula separando argumentos
+  (`=[Valor]*1,5`)
+- textos com aspas duplicadas (`"5"" de tela"`), referências (`A1`,
+  `$B$2:C10`, `Plan1!A1`, `'Minha aba'!A:A`), colunas de tabela
+  (`[Email]`), erros (`#N/D`), VERDADEIRO/FALSO, constantes `{1;2;3}`,
+  argumentos vazios (`SE(A1;;0)`) e chamadas aninhadas
+- o AST é feito de tuplas imutáveis (NamedTuple) e fica num cache LRU por
+  texto da fórmula (`parse`), então explicar ou avaliar a mesma fórmula
+  de novo não refaz nada
+
+O nome de cada função vira uma chave (`function_key`: sem acento, em
+maiúscula, sem o prefixo `_xlfn.`) para busca por hash na base.
+"""
+import re
+from functools import lru_cache
+from typing import Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from app.core.config import FORMULA_CACHE_SIZE
+from app.services.text import normalize_text
+
+MAX_DEPTH = 64   # limite de aninhamento do próprio Excel
+
+
+class FormulaError(ValueError):
+    """Fórmula que não pôde ser analisada (com a posição do problema)"""
+
+    def __init__(self, message: str, position: int):
+        super().__init__(f"{message} (posição {position})")
+        self.position = position
+
+
+# ==================== AST ====================
+
+class Number(NamedTuple):
+    value: float
+
+
+class Text(NamedTuple):
+    value: str
+
+
+class Bool(NamedTuple):
+    value: bool
+
+
+class ErrorValue(NamedTuple):
+    code: str
+
+
+class Ref(NamedTuple):
+    text: str           # como escrita (A1, $B$2:C10, Plan1!A:A)
+
+
+class Column(NamedTuple):
+    name: str           # [Nome da coluna]
+
+
+class Name(NamedTuple):
+    name: str           # nome definido / identificador solto
+
+
+class Missing(NamedTuple):
+    pass                # argumento vazio: SE(A1;;0)
+
+
+class Array(NamedTuple):
+    items: Tuple
+
+
+class Call(NamedTuple):
+    name: str           # como escrito, em maiúscula
+    args: Tuple
+
+
+class Unary(NamedTuple):
+    op: str
+    operand: 'Node'
+
+
+class Percent(NamedTuple):
+    operand: 'Node'
+
+
+class Binary(NamedTuple):
+    op: str
+    left: 'Node'
+    right: 'Node'
+
+
+Node = Union[Number, Text, Bool, ErrorValue, Ref, Column, Name, Missing, Array, Call, Unary, Percent, Binary]
+
+
+class Token(NamedTuple):
+    kind: str
+    text: str
+    position: int
+
+
+# ==================== LEXER ====================
+
+_CELL = r"\$?[A-Za-z]{1,3}\$?\d+"
+_COLS = r"\$?[A-Za-z]{1,3}:\$?[A-Za-z]{1,3}"
+_ROWS = r"\$?\d+:\$?\d+"
+_SHEET = r"(?:'(?:[^']|'')+'|[^\W\d][\w.]*)!"
+_END = r"(?![\w.(])"
+
+_PATTERNS = [
+    ('SPACE', r'\s+'),
+    ('STRING', r'"(?:[^"]|"")*"'),
+    ('COLUMN', r'\[@?[^\[\]]+\]'),
+    ('ERROR', r'#(?:N/D|N/A|DIV/0!|VALOR!|VALUE!|REF!|NOME\?|NAME\?|NÚM!|NUM!|NULO!|NULL!)'),
+    ('REF', rf'(?:{_SHEET})?(?:{_CELL}(?::{_CELL})?|{_COLS}|{_ROWS}){_END}'),
+    ('BOOL', rf'(?i:VERDADEIRO|FALSO|TRUE|FALSE){_END}'),
+    ('FUNC', r'[^\W\d][\w.]*(?=\s*\()'),
+    ('NAME', r'[^\W\d][\w.]*'),
+    ('NUMBER', None),   # depende do separador decimal
+    ('OP', r'<=|>=|<>|[-+*/^&=<>%]'),
+    ('SEP', None),
+    ('LPAREN', r'\('),
+    ('RPAREN', r'\)'),
+    ('LBRACE', r'\{'),
+    ('RBRACE', r'\}'),
+]
+
+
+def _lexer(decimal: str, separators: str) -> re.Pattern:
+    number = rf'(?:\d+(?:{re.escape(decimal)}\d*)?|{re.escape(decimal)}\d+)(?:[eE][-+]?\d+)?'
+    parts = {'NUMBER': number, 'SEP': f'[{re.escape(separators)}]'}
+    return re.compile('|'.join(f'(?P<{kind}>{pattern or parts[kind]})' for kind, pattern in _PATTERNS))
+
+
+_LEXER_PT = _lexer(',', ';')
+_LEXER_EN = _lexer('.', ',;')
+_SEPARATORS = re.compile(
+    r'"(?:[^"]|"")*"|\[[^\[\]]*\]|\'(?:[^\']|\'\')*\''     # texto, [coluna], 'aba'
+    r'|(?P<sep>[;,])|(?P<call>[^\W\d][\w.]*\s*\(|\{)|(?P<open>\()|(?P<close>[)}])'
+)
+
+
+def is_pt_br(formula: str) -> bool:
+    """Separador pt-BR (`;`, vírgula decimal)?
+
+    `;` fora de texto decide. Sem `;`, uma vírgula entre dois dígitos conta
+    como decimal (`=[Valor]*1,5`), a não ser que alguma vírgula esteja
+    separando argumentos de função ou itens de `{...}` (aí é en-US).
+    """
+    arguments = []          # por parêntese/chave aberto: lista de argumentos?
+    decimal_comma = argument_comma = False
+    for match in _SEPARATORS.finditer(formula):
+        separator = match.group('sep')
+        if separator == ';':
+            return True
+        if separator:
+            if arguments and arguments[-1]:
+                argument_comma = True
+            elif formula[match.start() - 1:match.start()].isdigit() and formula[match.end():match.end() + 1].isdigit():
+                decimal_comma = True
+        elif match.group('call'):
+            arguments.append(True)
+        elif match.group('open'):
+            arguments.append(False)
+        elif match.group('close') and arguments:
+            arguments.pop()
+    return decimal_comma and not argument_comma
+
+
+def tokenize(formula: str) -> Iterator[Token]:
+    """Tokens da fórmula (sem o `=` inicial e sem espaços)"""
+    text = formula[1:] if formula.startswith('=') else formula
+    offset = len(formula) - len(text)
+    lexer = _LEXER_PT if is_pt_br(text) else _LEXER_EN
+    position = 0
+    while position < len(text):
+        match = lexer.match(text, position)
+        if match is None:
+            raise FormulaError(f"caractere inesperado {text[position]!r}", position + offset)
+        kind = match.lastgroup
+        if kind != 'SPACE':
+            yield Token(kind, match.group(), position + offset)
+        position = match.end()
+
+
+def function_key(name: str) -> str:
+    """Chave de busca do nome da função (MÉDIA, média, _xlfn.MEDIA -> MEDIA)"""
+    key = normalize_text(name).upper()
+    return key[6:] if key.startswith('_XLFN.') else key
+
+
+# ==================== PARSER ====================
+
+# Operadores binários: precedência (maior liga mais forte)
+# (o sinal unário liga mais que ^, como no Excel: -2^2 = 4)
+_BINARY = {'=': 1, '<>': 1, '<': 1, '>': 1, '<=': 1, '>=': 1, '&': 2, '+': 3, '-': 3, '*': 4, '/': 4, '^': 5}
+
+
+class _Parser:
+    def __init__(self, formula: str):
+        self.tokens: List[Token] = list(tokenize(formula))
+        self.index = 0
+        self.depth = 0
+        self.end = len(formula)
+
+    def peek(self) -> Optional[Token]:
+        return self.tokens[self.index] if self.index < len(self.tokens) else None
+
+    def take(self, kind: Optional[str] = None, text: Optional[str] = None) -> Token:
+        token = self.peek()
+        if token is None:
+            raise FormulaError("fórmula incompleta", self.end)
+        if (kind and token.kind != kind) or (text and token.text != text):
+            raise FormulaError(f"esperava {text or kind}, veio {token.text!r}", token.position)
+        self.index += 1
+        return token
+
+    def parse(self) -> 'Node':
+        if not self.tokens:
+            raise FormulaError("fórmula vazia", 0)
+        node = self.expression(0)
+        token = self.peek()
+        if token is not None:
+            raise FormulaError(f"sobrou {token.text!r}", token.position)
+        return node
+
+    def expression(self, min_precedence: int) -> 'Node':
+        # Precedence climbing: uma chamada por nível de parênteses, não por operador
+        left = self.unary()
+        while True:
+            token = self.peek()
+            if token is None or token.kind != 'OP' or token.text not in _BINARY:
+                return left
+            precedence = _BINARY[token.text]
+            if precedence < min_precedence:
+                return left
+            self.index += 1
+            # Todos associativos à esquerda (no Excel 2^3^2 = 64)
+            right = self.expression(precedence + 1)
+            left = Binary(token.text, left, right)
+
+    def unary(self) -> 'Node':
+        token = self.peek()
+        if token is not None and token.kind == 'OP' and token.text in '+-':
+            # Cada sinal é um nível de recursão: conta no limite de aninhamento
+            self.nested(token)
+            self.index += 1
+            node = Unary(token.text, self.unary())
+            self.depth -= 1
+            return node
+        node = self.primary()
+        while self.peek() is not None and self.peek().text == '%':
+            self.index += 1
+            node = Percent(node)
+        return node
+
+    def nested(self, token: Token):
+        self.depth += 1
+        if self.depth > MAX_DEPTH:
+            raise FormulaError(f"mais de {MAX_DEPTH} níveis de aninhamento", token.position)
+
+    def primary(self) -> 'Node':
+        token = self.take()
+        kind = token.kind
+        if kind == 'NUMBER':
+            return Number(float(token.text.replace(',', '.')))
+        if kind == 'STRING':
+            return Text(token.text[1:-1].replace('""', '"'))
+        if kind == 'BOOL':
+            return Bool(token.text.upper() in ('VERDADEIRO', 'TRUE'))
+        if kind == 'ERROR':
+            return ErrorValue(token.text.upper())
+        if kind == 'REF':
+            return Ref(token.text)
+        if kind == 'COLUMN':
+            return Column(token.text[1:-1].lstrip('@'))
+        if kind == 'NAME':
+            return Name(token.text)
+        if kind == 'FUNC':
+            return self.call(token)
+        if kind == 'LPAREN':
+            self.nested(token)
+            node = self.expression(0)
+            self.take('RPAREN')
+            self.depth -= 1
+            return node
+        if kind == 'LBRACE':
+            self.nested(token)
+            items = [self.expression(0)]
+            while self.peek() is not None and self.peek().kind == 'SEP':
+                self.index += 1
+                items.append(self.expression(0))
+            self.take('RBRACE')
+            self.depth -= 1
+            return Array(tuple(items))
+        raise FormulaError(f"inesperado {token.text!r}", token.position)
+
+    def argument(self) -> 'Node':
+        token = self.peek()
+        if token is not None and token.kind in ('SEP', 'RPAREN'):
+            return Missing()
+        return self.expression(0)
+
+    def call(self, name: Token) -> Call:
+        self.nested(name)
+        self.take('LPAREN')
+        args = []
+        if self.peek() is not None and self.peek().kind == 'RPAREN':
+            self.index += 1
+        else:
+            args.append(self.argument())
+            while self.take().kind == 'SEP':
+                args.append(self.argument())
+            if self.tokens[self.index - 1].kind != 'RPAREN':
+                raise FormulaError("esperava ; ou )", self.tokens[self.index - 1].position)
+        self.depth -= 1
+        return Call(name.text.upper(), tuple(args))
+
+
+@lru_cache(maxsize=FORMULA_CACHE_SIZE)
+def parse(formula: str) -> 'Node':
+    """AST da fórmula (em cache por texto); FormulaError se não for válida"""
+    return _Parser(formula).parse()
+
+
+def walk(node: 'Node') -> Iterator['Node']:
+    """Todos os nós do AST (pré-ordem), sem recursão"""
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        yield node
+        if isinstance(node, Call):
+            stack.extend(reversed(node.args))
+        elif isinstance(node, Binary):
+            stack.extend((node.right, node.left))
+        elif isinstance(node, (Unary, Percent)):
+            stack.append(node.operand)
+        elif isinstance(node, Array):
+            stack.extend(reversed(node.items))
+
+
+@lru_cache(maxsize=FORMULA_CACHE_SIZE)
+def functions_used(formula: str) -> Tuple[str, ...]:
+    """Nomes das funções da fórmula, na ordem em que aparecem (sem repetir; em cache)
+
+    Usa o AST; se a fórmula não é válida, os tokens de função do lexer.
+    """
+    try:
+        names = [node.name for node in walk(parse(formula)) if isinstance(node, Call)]
+    except FormulaError:
+        try:
+            names = [token.text.upper() for token in tokenize(formula) if token.kind == 'FUNC']
+        except FormulaError:
+            names = []
+    return tuple(dict.fromkeys(names))
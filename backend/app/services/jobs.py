@@ -0,0 +1,313 @@
+"""
+Jobs em segundo plano para transformações longas
+
+MULTIONE/COMERCIAL e templates em planilhas grandes passam do timeout do
+proxy como chamadas HTTP síncronas. Como job: o cliente envia o comando,
+recebe um `job_id`, acompanha o progresso por etapa (polling ou SSE) e busca
+o resultado no fim.
+
+- Execução: threads deste processo (JOB_WORKERS); os datasets vivem no
+  `dataset_store` local, então o job roda onde a planilha está
+- Estado (status, etapa, progresso, resultado, chave de deduplicação):
+  Redis quando REDIS_URL responde (visível para todos os processos do
+  servidor), senão um dict em memória com a mesma interface. O cliente
+  Redis é síncrono e tem timeout (REDIS_TIMEOUT): as rotas chamam o
+  JobQueue por `asyncio.to_thread`, nunca direto do event loop
+- Deduplicação: o mesmo (dataset, comando) enviado enquanto um job igual
+  ainda está na fila ou rodando devolve o job existente
+- Cancelamento: na fila o job nem começa; rodando, para no próximo
+  `report_progress` (checkpoints entre blocos)
+- TTL: jobs terminados somem JOB_RESULT_TTL segundos depois
+"""
+import hashlib
+import json
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException
+
+from app.core.config import REDIS_URL, REDIS_TIMEOUT, JOB_WORKERS, JOB_QUEUE_MAX, JOB_RESULT_TTL
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - Redis é opcional
+    redis = None
+
+FINISHED = ('done', 'failed', 'cancelled')
+PUBLIC_FIELDS = ('id', 'kind', 'dataset_id', 'status', 'stage', 'progress', 'error',
+                 'created_at', 'started_at', 'finished_at')
+
+
+class JobCancelled(Exception):
+    """Levantada em `report_progress` quando o job foi cancelado"""
+
+
+class MemoryJobStore:
+    """Estado dos jobs em memória (um processo)"""
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._keys: Dict[str, str] = {}
+        self._cancel = set()
+        self._lock = threading.Lock()
+
+    def _purge(self):
+        now = time.time()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job['finished_at'] and job['finished_at'] + self.ttl < now]
+        for job_id in expired:
+            del self._jobs[job_id]
+            self._cancel.discard(job_id)
+
+    def create(self, job: Dict[str, Any], key: str) -> Optional[str]:
+        """Grava o job; se já houver um ativo com a mesma chave, retorna o ID dele"""
+        with self._lock:
+            self._purge()
+            existing = self._keys.get(key)
+            if existing in self._jobs:
+                return existing
+            self._keys[key] = job['id']
+            self._jobs[job['id']] = job
+            return None
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._purge()
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def update(self, job_id: str, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def release_key(self, key: str, job_id: str):
+        with self._lock:
+            if self._keys.get(key) == job_id:
+                del self._keys[key]
+
+    def request_cancel(self, job_id: str):
+        with self._lock:
+            self._cancel.add(job_id)
+
+    def cancel_requested(self, job_id: str) -> bool:
+        with self._lock:
+            return job_id in self._cancel
+
+
+# Troca a chave de deduplicação só se ela ainda aponta para o job expirado
+_TAKE_ORPHAN_KEY = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+end
+return false
+"""
+
+
+class RedisJobStore:
+    """Mesma interface do MemoryJobStore, com o estado no Redis
+
+    Cada job é um JSON em `jobs:job:<id>`; a chave de deduplicação usa
+    SET NX (e um script Lua para assumir uma chave órfã) e o pedido de cancelamento é uma chave à parte (não se perde em
+    atualizações concorrentes do job). Tudo expira sozinho pelo TTL.
+    """
+    PREFIX = 'jobs:'
+
+    def __init__(self, client, ttl: int):
+        self.client = client
+        self.ttl = ttl
+
+    def _job_key(self, job_id: str) -> str:
+        return f'{self.PREFIX}job:{job_id}'
+
+    def _save(self, job: Dict[str, Any]):
+        self.client.set(self._job_key(job['id']), json.dumps(job, default=str), ex=self.ttl)
+
+    def create(self, job: Dict[str, Any], key: str) -> Optional[str]:
+        dedup_key = f'{self.PREFIX}key:{key}'
+        # O job é gravado antes da chave: quem perde o SET NX e lê a chave
+        # sempre encontra o job dela (senão a trataria como órfã e
+        # dispararia um job duplicado)
+        self._save(job)
+        while not self.client.set(dedup_key, job['id'], nx=True, ex=self.ttl):
+            existing = self.client.get(dedup_key)
+            if existing is None:
+                continue    # liberada entre o SET NX e o GET
+            existing = existing.decode()
+            if self.get(existing):
+                self.client.delete(self._job_key(job['id']))
+                return existing
+            # Chave órfã (job expirou): assume, se ninguém assumiu antes
+            if self.client.eval(_TAKE_ORPHAN_KEY, 1, dedup_key, existing, job['id'], self.ttl):
+                break
+        return None
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raw = self.client.get(self._job_key(job_id))
+        return json.loads(raw) if raw else None
+
+    def update(self, job_id: str, **fields):
+        job = self.get(job_id)
+        if job is not None:
+            job.update(fields)
+            self._save(job)
+
+    def release_key(self, key: str, job_id: str):
+        dedup_key = f'{self.PREFIX}key:{key}'
+        if (self.client.get(dedup_key) or b'').decode() == job_id:
+            self.client.delete(dedup_key)
+
+    def request_cancel(self, job_id: str):
+        self.client.set(f'{self.PREFIX}cancel:{job_id}', 1, ex=self.ttl)
+
+    def cancel_requested(self, job_id: str) -> bool:
+        return bool(self.client.exists(f'{self.PREFIX}cancel:{job_id}'))
+
+
+def _make_store(ttl: int):
+    if REDIS_URL and redis is not None:
+        try:
+            # Sem timeout um Redis travado prenderia a thread (e o SSE) para sempre
+            client = redis.Redis.from_url(REDIS_URL, socket_connect_timeout=REDIS_TIMEOUT,
+                                          socket_timeout=REDIS_TIMEOUT)
+            client.ping()
+            print("🧵 Jobs: estado no Redis")
+            return RedisJobStore(client, ttl)
+        except redis.RedisError as e:
+            print(f"⚠️ Redis indisponível ({e}), jobs com estado em memória")
+    return MemoryJobStore(ttl)
+
+
+# Job da thread atual (para report_progress)
+_current = threading.local()
+
+
+def report_progress(stage: str, done: Optional[int] = None, total: Optional[int] = None):
+    """Etapa (e fração concluída) do job que roda nesta thread
+
+    Fora de um job não faz nada. Também é o ponto de cancelamento: levanta
+    JobCancelled se o job foi cancelado.
+    """
+    job_id = getattr(_current, 'job_id', None)
+    if job_id is None:
+        return
+    queue = _current.queue
+    if queue.store.cancel_requested(job_id):
+        raise JobCancelled()
+    fields = {'stage': stage}
+    if done is not None and total:
+        fields['progress'] = round(min(done / total, 1.0), 4)
+    queue.store.update(job_id, **fields)
+
+
+def job_key(kind: str, dataset_id: str, command: str) -> str:
+    """Chave de deduplicação de (tipo, dataset, comando normalizado)"""
+    raw = f'{kind}\x00{dataset_id}\x00{" ".join(command.lower().split())}'
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def public_view(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: job.get(field) for field in PUBLIC_FIELDS}
+
+
+class JobQueue:
+    def __init__(self, workers: int, max_queued: int, ttl: int):
+        self.max_queued = max_queued
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='job')
+        self._store = None
+        self._store_lock = threading.Lock()
+        self._futures: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+        self.stats = {'submitted': 0, 'deduplicated': 0, 'done': 0, 'failed': 0, 'cancelled': 0}
+
+    @property
+    def store(self):
+        # Criado no primeiro uso: conectar no Redis não atrasa o import
+        if self._store is None:
+            with self._store_lock:
+                if self._store is None:
+                    self._store = _make_store(self.ttl)
+        return self._store
+
+    def submit(self, kind: str, dataset_id: str, command: str,
+               func: Callable[[Dict[str, Any]], Any], payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Enfileira `func(payload)`; devolve a visão pública do job (novo ou o ativo igual)"""
+        key = job_key(kind, dataset_id, command)
+        job = {
+            'id': uuid.uuid4().hex, 'kind': kind, 'dataset_id': dataset_id, 'key': key,
+            'status': 'queued', 'stage': 'na fila', 'progress': 0.0, 'error': None,
+            'result': None, 'created_at': time.time(), 'started_at': None, 'finished_at': None,
+        }
+
+        with self._lock:
+            if len(self._futures) >= self.max_queued:
+                raise HTTPException(
+                    status_code=503, detail="Fila de jobs cheia, tente novamente em instantes",
+                    headers={'Retry-After': '30'},
+                )
+            existing = self.store.create(job, key)
+            if existing is not None:
+                self.stats['deduplicated'] += 1
+                return {**public_view(self.store.get(existing) or job), 'deduplicated': True}
+
+            self.stats['submitted'] += 1
+            self._futures[job['id']] = self._executor.submit(self._execute, job['id'], key, func, payload)
+        return {**public_view(job), 'deduplicated': False}
+
+    def _finish(self, job_id: str, key: str, status: str, **fields):
+        self.store.update(job_id, status=status, finished_at=time.time(), **fields)
+        self.store.release_key(key, job_id)
+        with self._lock:
+            self._futures.pop(job_id, None)
+            self.stats[status] += 1
+
+    def _execute(self, job_id: str, key: str, func: Callable, payload: Dict[str, Any]):
+        if self.store.cancel_requested(job_id):
+            self._finish(job_id, key, 'cancelled', stage='cancelado')
+            return
+
+        self.store.update(job_id, status='running', stage='iniciando', started_at=time.time())
+        _current.job_id, _current.queue = job_id, self
+        try:
+            result = func(payload)
+        except JobCancelled:
+            self._finish(job_id, key, 'cancelled', stage='cancelado')
+        except HTTPException as e:
+            self._finish(job_id, key, 'failed', stage='erro', error=str(e.detail))
+        except Exception as e:
+            print(f"❌ JOB {job_id}: {traceback.format_exc()}")
+            self._finish(job_id, key, 'failed', stage='erro', error=str(e))
+        else:
+            self._finish(job_id, key, 'done', stage='concluído', progress=1.0, result=result)
+        finally:
+            _current.job_id = _current.queue = None
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancela um job na fila ou rodando; terminados ficam como estão"""
+        job = self.store.get(job_id)
+        if job is None or job['status'] in FINISHED:
+            return job
+
+        self.store.request_cancel(job_id)
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            self._finish(job_id, job['key'], 'cancelled', stage='cancelado')
+        return self.store.get(job_id)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Instância global
+job_queue = JobQueue(JOB_WORKERS, JOB_QUEUE_MAX, JOB_RESULT_TTL)
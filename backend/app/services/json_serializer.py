@@ -0,0 +1,155 @@
+"""
+Serializador JSON de DataFrames (coluna a coluna, direto dos buffers NumPy)
+
+Substitui o epílogo `replace(...)` / `where(...)` / `to_dict('records')`:
+cada coluna é codificada uma vez como fragmentos JSON (`"col":valor`) e as
+linhas são só a junção desses fragmentos. Valores ausentes viram `null` sem
+criar cópias intermediárias do DataFrame nem um dict por linha.
+
+Respostas grandes saem em streaming (blocos de linhas), então o envio
+começa antes de a planilha inteira ter sido codificada.
+"""
+import json
+import math
+from datetime import date, datetime
+from json.encoder import encode_basestring
+from typing import Any, Dict, Iterator, List
+
+import numpy as np
+import pandas as pd
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+
+from app.core.config import JSON_STREAM_ROWS, JSON_BATCH_ROWS
+
+NULL = 'null'
+
+
+def _encode_value(value: Any) -> str:
+    """Fallback para colunas object com tipos misturados"""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, str):
+        return encode_basestring(value)
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return repr(value) if math.isfinite(value) else NULL
+    if isinstance(value, (datetime, date)):
+        return encode_basestring(value.isoformat())
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return encode_basestring(str(value))
+
+
+def _datetime_fragments(values: np.ndarray, mask: np.ndarray) -> List[str]:
+    # Mesmo formato de Timestamp.isoformat(): sem fração quando não há
+    fraction = (values - values.astype('datetime64[s]'))[~mask]
+    unit = 's' if (fraction == np.timedelta64(0)).all() else 'us'
+    text = np.datetime_as_string(values, unit=unit).tolist()
+    return ['"' + t + '"' for t in text]
+
+
+def _with_nulls(fragments: List[str], mask: np.ndarray) -> List[str]:
+    if not mask.any():
+        return fragments
+    out = np.array(fragments, dtype=object)
+    out[mask] = NULL
+    return out.tolist()
+
+
+def encode_column(series: pd.Series) -> List[str]:
+    """Fragmentos JSON de uma coluna (`null` nos ausentes)"""
+    dtype = series.dtype
+    kind = dtype.kind if isinstance(dtype, np.dtype) else None
+
+    if kind == 'b':
+        return np.where(series.to_numpy(), 'true', 'false').tolist()
+
+    if kind in ('i', 'u'):
+        return list(map(str, series.to_numpy().tolist()))
+
+    if kind == 'f':
+        values = series.to_numpy()
+        fragments = list(map(float.__repr__, values.astype(np.float64).tolist()))
+        return _with_nulls(fragments, ~np.isfinite(values))
+
+    if kind == 'M':
+        values = series.to_numpy()
+        mask = np.isnat(values)
+        return _with_nulls(_datetime_fragments(values, mask), mask)
+
+    # object, string, extensões (Int64, boolean, tz-aware...)
+    values = series.to_numpy(dtype=object)
+    mask = pd.isna(values)
+    if not mask.any():
+        present = values
+    else:
+        present = values[~mask]
+
+    if pd.api.types.infer_dtype(present, skipna=False) == 'string':
+        encoded = list(map(encode_basestring, present))
+    else:
+        encoded = [_encode_value(v) for v in present]
+
+    if present is values:
+        return encoded
+    fragments = np.full(len(values), NULL, dtype=object)
+    fragments[~mask] = encoded
+    return fragments.tolist()
+
+
+def _encode_rows(df: pd.DataFrame) -> List[str]:
+    if not len(df.columns):
+        return ['{}'] * len(df)
+
+    # Chaves codificadas uma vez; cada linha é um único `template % valores`
+    keys = [encode_basestring(str(col)).replace('%', '%%') + ':%s' for col in df.columns]
+    template = '{' + ','.join(keys) + '}'
+    columns = [encode_column(df.iloc[:, i]) for i in range(len(df.columns))]
+    return [template % row for row in zip(*columns)]
+
+
+def iter_json_rows(df: pd.DataFrame, batch_rows: int = JSON_BATCH_ROWS) -> Iterator[str]:
+    """Blocos `obj,obj,...` de linhas, na ordem do DataFrame"""
+    for start in range(0, len(df), batch_rows):
+        yield ','.join(_encode_rows(df.iloc[start:start + batch_rows]))
+
+
+def records_json(df: pd.DataFrame) -> str:
+    """Array JSON de registros (equivalente a to_dict('records') + json.dumps)"""
+    return '[' + ','.join(iter_json_rows(df)) + ']'
+
+
+def frame_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Registros prontos para JSON (ausentes como None), para respostas em dict"""
+    return json.loads(records_json(df))
+
+
+def _envelope(body: Dict[str, Any], key: str):
+    head = json.dumps(body, ensure_ascii=False, default=str)[:-1]
+    if body:
+        head += ','
+    return head + encode_basestring(key) + ':[', ']}'
+
+
+def frame_json_response(body: Dict[str, Any], df: pd.DataFrame, key: str = 'data',
+                        stream_rows: int = JSON_STREAM_ROWS) -> Response:
+    """`body` + planilha em `key`; acima de `stream_rows` linhas vai em streaming"""
+    head, tail = _envelope(body, key)
+
+    if len(df) <= stream_rows:
+        content = head + ','.join(iter_json_rows(df)) + tail
+        return Response(content=content.encode('utf-8'), media_type='application/json')
+
+    def generate():
+        yield head.encode('utf-8')
+        first = True
+        for block in iter_json_rows(df):
+            yield (block if first else ',' + block).encode('utf-8')
+            first = False
+        yield tail.encode('utf-8')
+
+    return StreamingResponse(generate(), media_type='application/json')
@@ -0,0 +1,187 @@
+"""
+Base de conhecimento do Excel compilada num snapshot binário
+
+`excel_assistant = ExcelAssistant()` lia `excel_knowledge.json`, tokenizava
+tudo e montava o índice (BM25 + variantes de erro de digitação) no import,
+antes de o app servir qualquer coisa, e cada worker do uvicorn repetia o
+trabalho e guardava a sua cópia.
+
+Agora a base é compilada uma vez (no build da imagem:
+`python -m app.services.knowledge_base`) num snapshot (`snapshot.py`) com:
+
+- o índice BM25 inteiro em arrays: vocabulário normalizado, postings com
+  os pesos, variantes do symmetric delete
+- categoria, nome e dados (JSON) de cada função, decodificados só quando
+  a função aparece num resultado
+- as chaves das funções para explicar fórmulas (`function_key` -> função)
+
+Os workers abrem o arquivo com mmap: nada é recalculado e as páginas são
+as mesmas para todos os processos. O snapshot guarda o SHA-256 do JSON de
+origem; se o JSON mudou (ou o snapshot não existe / é de outra versão), a
+base é montada do JSON em memória, como antes.
+"""
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import EXCEL_KNOWLEDGE_SNAPSHOT
+from app.services.formulas import function_key
+from app.services.search import Bm25Index, tokenize
+from app.services.snapshot import StringTable, read_snapshot, write_snapshot
+
+SNAPSHOT_VERSION = 1
+TIPS = 'dicas_avancadas'
+
+KNOWLEDGE_PATH = Path(__file__).resolve().parent.parent / 'excel_knowledge.json'
+SNAPSHOT_PATH = Path(EXCEL_KNOWLEDGE_SNAPSHOT) if EXCEL_KNOWLEDGE_SNAPSHOT else KNOWLEDGE_PATH.with_suffix('.snapshot')
+
+
+class KnowledgeBase:
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict[str, Any], source: str):
+        self.arrays = arrays
+        self.meta = meta
+        self.source = source                                        # 'snapshot' ou 'json'
+        self.categories = StringTable.from_arrays(arrays, 'categories')
+        self.names = StringTable.from_arrays(arrays, 'names')
+        self.records = StringTable.from_arrays(arrays, 'records')
+        self.keys = StringTable.from_arrays(arrays, 'keys')
+        self.key_docs = memoryview(arrays['key_docs'])
+        self.index = Bm25Index.from_arrays({name[6:]: array for name, array in arrays.items()
+                                            if name.startswith('index.')})
+        self.tips: List[str] = meta['tips']
+        self._records: Dict[int, Dict[str, Any]] = {}               # decodificados (só os já usados)
+        self._knowledge: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def build(cls, knowledge: Dict[str, Any], source_hash: str = '') -> 'KnowledgeBase':
+        """Monta a base a partir do dict do JSON (um documento por função)"""
+        functions: List[Tuple[str, str, Dict[str, Any]]] = []
+        documents = []
+        for categoria, funcoes in knowledge.items():
+            if categoria == TIPS:
+                continue
+            for func_name, func_data in funcoes.items():
+                terms = tokenize(func_name)
+                for palavra in func_data.get('pt', []):
+                    terms.extend(tokenize(palavra))
+                functions.append((categoria, func_name, func_data))
+                documents.append(terms)
+
+        # Nome da função (sem acento, maiúsculo) -> documento; repetido vale o último
+        keys = {function_key(func_name): doc for doc, (_, func_name, _) in enumerate(functions)}
+
+        index = Bm25Index(documents, [func_name for _, func_name, _ in functions])
+        arrays = {f'index.{name}': array for name, array in index.arrays.items()}
+        arrays.update(StringTable.build((c for c, _, _ in functions), hashed=False).arrays('categories'))
+        arrays.update(StringTable.build((f for _, f, _ in functions), hashed=False).arrays('names'))
+        arrays.update(StringTable.build((json.dumps(d, ensure_ascii=False) for _, _, d in functions),
+                                        hashed=False).arrays('records'))
+        arrays.update(StringTable.build(keys).arrays('keys'))
+        arrays['key_docs'] = np.array(list(keys.values()), dtype=np.int32)
+        meta = {
+            'version': SNAPSHOT_VERSION,
+            'source_sha256': source_hash,
+            'category_order': list(knowledge),
+            'tips': knowledge.get(TIPS, []),
+        }
+        return cls(arrays, meta, 'json')
+
+    @classmethod
+    def from_json(cls, path: Path = KNOWLEDGE_PATH) -> 'KnowledgeBase':
+        raw = Path(path).read_bytes()
+        return cls.build(json.loads(raw), hashlib.sha256(raw).hexdigest())
+
+    @classmethod
+    def load(cls, path: Path) -> 'KnowledgeBase':
+        """Abre um snapshot (mmap, sem copiar); ValueError se não for desta versão"""
+        arrays, meta = read_snapshot(str(path))
+        if meta.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"snapshot versão {meta.get('version')}, esperada {SNAPSHOT_VERSION}")
+        return cls(arrays, meta, 'snapshot')
+
+    def save(self, path: Path):
+        write_snapshot(str(path), dict(self.arrays), self.meta)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def function(self, doc: int) -> Tuple[str, str]:
+        """(categoria, nome) da função"""
+        return self.categories[doc], self.names[doc]
+
+    def record(self, doc: int) -> Dict[str, Any]:
+        """Dados da função (sintaxe, descrição, exemplos...); não alterar o dict devolvido"""
+        record = self._records.get(doc)
+        if record is None:
+            record = self._records[doc] = json.loads(self.records[doc])
+        return record
+
+    def find_key(self, key: str) -> Optional[int]:
+        """Documento da função com essa chave (`function_key`)"""
+        i = self.keys.find(key)
+        return self.key_docs[i] if i >= 0 else None
+
+    @property
+    def knowledge(self) -> Dict[str, Any]:
+        """O dict do JSON de origem (remontado na primeira vez)"""
+        if self._knowledge is None:
+            knowledge: Dict[str, Any] = {categoria: {} for categoria in self.meta['category_order']}
+            for doc in range(len(self)):
+                categoria, func_name = self.function(doc)
+                knowledge[categoria][func_name] = self.record(doc)
+            if TIPS in knowledge:
+                knowledge[TIPS] = list(self.tips)
+            self._knowledge = knowledge
+        return self._knowledge
+
+
+def source_hash(path: Path = KNOWLEDGE_PATH) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def load_knowledge(path: Path = KNOWLEDGE_PATH, snapshot: Path = SNAPSHOT_PATH) -> KnowledgeBase:
+    """O snapshot, se existir e for do JSON atual; senão compila um novo
+
+    O snapshot do build some quando a pasta é montada por cima (volume
+    `./backend:/app` do docker-compose): aí o primeiro worker a carregar
+    compila e grava, e os outros abrem o arquivo. Sem permissão de escrita,
+    fica a base montada do JSON em memória.
+    """
+    if os.path.exists(snapshot):
+        try:
+            base = KnowledgeBase.load(snapshot)
+            if base.meta.get('source_sha256') == source_hash(path):
+                return base
+            print(f"⚠️ Snapshot {snapshot} desatualizado, compilando de novo")
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Snapshot {snapshot} inválido, compilando de novo: {e}")
+    else:
+        print(f"⚠️ Snapshot {snapshot} não encontrado, compilando do JSON")
+
+    try:
+        compile_snapshot(path, snapshot)
+        return KnowledgeBase.load(snapshot)
+    except OSError as e:
+        print(f"⚠️ Não foi possível gravar o snapshot {snapshot}, base do JSON em memória: {e}")
+        return KnowledgeBase.from_json(path)
+
+
+def compile_snapshot(path: Path = KNOWLEDGE_PATH, snapshot: Path = SNAPSHOT_PATH) -> KnowledgeBase:
+    """Compila o JSON no snapshot (troca atômica do arquivo)"""
+    base = KnowledgeBase.from_json(path)
+    base.save(snapshot)
+    return base
+
+
+if __name__ == '__main__':
+    # Uso (na pasta backend): python -m app.services.knowledge_base [json] [snapshot]
+    origem = Path(sys.argv[1]) if len(sys.argv) > 1 else KNOWLEDGE_PATH
+    destino = Path(sys.argv[2]) if len(sys.argv) > 2 else SNAPSHOT_PATH
+    base = compile_snapshot(origem, destino)
+    print(f"✅ Snapshot {destino}: {len(base)} funções, {len(base.index.vocabulary)} termos, "
+          f"{os.path.getsize(destino)} bytes")
@@ -0,0 +1,210 @@
+"""
+Write-behind das escritas do aprendizado da IA
+
+Cada mensagem do chat gravava direto no banco: insert em `ai_learning` e,
+para cada palavra-chave, SELECT + UPDATE/INSERT em `ai_vocabulary`; o
+`/feedback` e o `/learn` faziam ler-somar-gravar nos contadores. Além da
+latência no caminho do chat, dois workers somando o mesmo contador perdiam
+um dos incrementos.
+
+Aqui as rotas só registram em memória (sem I/O):
+
+- padrões e feedbacks novos entram numa lista
+- frequência do vocabulário e contadores viram deltas agregados por chave
+  (palavra, id do padrão, texto do comando)
+
+e o buffer grava tudo numa chamada só (`rpc('apply_learning_batch')`, ver
+`app/db/sql/apply_learning_batch.sql`) a cada LEARNING_FLUSH_INTERVAL
+segundos ou quando acumula LEARNING_FLUSH_SIZE entradas. No banco os deltas
+viram `coluna = coluna + delta`, então lotes de workers diferentes não se
+atropelam. Acima de LEARNING_BUFFER_MAX entradas as novas são descartadas.
+
+Cada lote leva um `batch_id`. Se o banco falhar (ou a resposta se perder
+num timeout depois do commit), o lote fica guardado como está e é
+reenviado com o mesmo id no próximo flush, antes do que chegou depois; a
+função SQL registra os ids aplicados e não soma o mesmo lote duas vezes.
+"""
+import asyncio
+import uuid
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from app.core.config import LEARNING_FLUSH_INTERVAL, LEARNING_FLUSH_SIZE, LEARNING_BUFFER_MAX
+from app.services.similarity import similarity_index
+from app.supabase_client import get_supabase
+
+
+class LearningBuffer:
+    def __init__(self, interval: float, flush_size: int, max_size: int):
+        self.interval = interval
+        self.flush_size = flush_size
+        self.max_size = max_size
+        self._patterns: List[Dict[str, Any]] = []
+        self._feedback: List[Dict[str, Any]] = []
+        self._vocabulary: Dict[str, Dict[str, Any]] = {}
+        self._counters: Dict[Any, Dict[str, Any]] = {}
+        self._commands: Dict[str, Dict[str, Any]] = {}
+        self._retry: Optional[Dict[str, Any]] = None     # lote não confirmado
+        self._timer: Optional[asyncio.Task] = None
+        self._flushing: Optional[asyncio.Task] = None
+        self._busy = False
+        self.stats = {'flushes': 0, 'failed': 0, 'written': 0, 'dropped': 0}
+
+    @property
+    def pending(self) -> int:
+        return (len(self._patterns) + len(self._feedback) + len(self._vocabulary)
+                + len(self._counters) + len(self._commands) + _batch_size(self._retry))
+
+    def _accept(self, is_new: bool) -> bool:
+        # Deltas em chaves que já estão no buffer não ocupam espaço
+        if is_new and self.pending >= self.max_size:
+            self.stats['dropped'] += 1
+            return False
+        return True
+
+    # ==================== REGISTRO (só memória) ====================
+
+    def add_pattern(self, data: Dict[str, Any], keywords: List[str], intent: str):
+        """Padrão novo + frequência das palavras-chave no vocabulário"""
+        if self._accept(True):
+            self._patterns.append(data)
+        for palavra, vezes in Counter(keywords).items():
+            if not self._accept(palavra not in self._vocabulary):
+                continue
+            entry = self._vocabulary.setdefault(palavra, {
+                'word': palavra, 'synonyms': [], 'related_intents': [], 'frequency': 0
+            })
+            entry['frequency'] += vezes
+            if intent not in entry['related_intents']:
+                entry['related_intents'].append(intent)
+        self._recorded()
+
+    def add_feedback(self, row: Dict[str, Any]):
+        if self._accept(True):
+            self._feedback.append(row)
+        self._recorded()
+
+    def bump_pattern(self, pattern_id: Any, success: int = 0, fail: int = 0, confidence: float = 0.0):
+        """Soma aos contadores / confiança de um padrão já gravado"""
+        if self._accept(pattern_id not in self._counters):
+            entry = self._counters.setdefault(pattern_id, {
+                'id': pattern_id, 'success_count': 0, 'fail_count': 0, 'confidence': 0.0
+            })
+            entry['success_count'] += success
+            entry['fail_count'] += fail
+            entry['confidence'] = round(entry['confidence'] + confidence, 6)
+        self._recorded()
+
+    def pending_confidence(self, pattern_id: Any) -> float:
+        """Delta de confiança do padrão que ainda está no buffer (não gravado)"""
+        entry = self._counters.get(pattern_id)
+        return entry['confidence'] if entry else 0.0
+
+    def add_command(self, command: str, intent: str, success: bool, columns: list):
+        """Uso de um comando (`ai_commands.usage_count`)"""
+        if self._accept(command not in self._commands):
+            entry = self._commands.setdefault(command, {
+                'command_text': command,
+                'intent_detected': intent,
+                'success': success,
+                'columns_available': columns,
+                'usage_count': 0
+            })
+            entry['usage_count'] += 1
+        self._recorded()
+
+    def _recorded(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Fora do event loop (scripts): grava só no flush() explícito
+            return
+        if self._timer is None or self._timer.done() or self._timer.get_loop() is not loop:
+            self._timer = loop.create_task(self._tick())
+        if self.pending >= self.flush_size and (self._flushing is None or self._flushing.done()):
+            self._flushing = loop.create_task(self.flush())
+
+    async def _tick(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    # ==================== FLUSH ====================
+
+    def _take(self) -> Dict[str, Any]:
+        batch = {
+            'batch_id': str(uuid.uuid4()),
+            'patterns': self._patterns,
+            'feedback': self._feedback,
+            'vocabulary': list(self._vocabulary.values()),
+            'counters': list(self._counters.values()),
+            'commands': list(self._commands.values()),
+        }
+        self._patterns, self._feedback = [], []
+        self._vocabulary, self._counters, self._commands = {}, {}, {}
+        return batch
+
+    async def flush(self) -> Dict[str, Any]:
+        """Grava o que está no buffer (lote pendente primeiro); retorna as linhas por tabela"""
+        if self._busy or not self.pending:
+            return {}
+
+        self._busy = True
+        try:
+            if self._retry is not None:
+                # Reenvia com o mesmo batch_id: se já tinha sido aplicado, o banco ignora
+                batch, self._retry = self._retry, None
+                if not await self._send(batch):
+                    return {}
+            if not self.pending:
+                return {}
+            return await self._send(self._take())
+        finally:
+            self._busy = False
+
+    async def _send(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            result = await get_supabase().rpc('apply_learning_batch', {'batch': batch}).execute()
+        except asyncio.CancelledError:
+            self._retry = batch
+            raise
+        except Exception as e:
+            print(f"⚠️ Falha ao gravar lote do aprendizado (tenta de novo no próximo flush): {e}")
+            self.stats['failed'] += 1
+            self._retry = batch
+            return {}
+
+        self.stats['flushes'] += 1
+        self.stats['written'] += _batch_size(batch)
+        data = result.data or {}
+        # Padrões gravados entram no índice de similaridade com o id do banco
+        similarity_index.add([
+            dict(pattern, id=pattern_id)
+            for pattern, pattern_id in zip(batch['patterns'], data.get('pattern_ids') or [])
+        ])
+        return data
+
+    async def close(self):
+        """Para o timer e grava o que sobrou (shutdown do servidor)"""
+        loop = asyncio.get_running_loop()
+        for task in (self._timer, self._flushing):
+            # Tasks de outro event loop (já encerrado) só são esquecidas
+            if task is None or task.done() or task.get_loop() is not loop:
+                continue
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._timer = self._flushing = None
+        await self.flush()
+
+
+def _batch_size(batch: Optional[Dict[str, Any]]) -> int:
+    if batch is None:
+        return 0
+    return sum(len(rows) for key, rows in batch.items() if key != 'batch_id')
+
+
+# Instância global
+learning_buffer = LearningBuffer(LEARNING_FLUSH_INTERVAL, LEARNING_FLUSH_SIZE, LEARNING_BUFFER_MAX)
@@ -0,0 +1,55 @@
+"""
+Limpeza de nomes de contatos (modo MULTIONE)
+
+Mesmo resultado do antigo `limpar_nome` por linha, aplicado à coluna:
+os padrões são compilados uma vez no import e cada nome distinto é limpo
+uma única vez (listas de contatos repetem muito os mesmos nomes).
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_NAME = 'Contato'
+
+TERMS_TO_REMOVE = ['Mycontacts', 'myContacts', 'None', 'nan', '*', ':::']
+EMPTY_VALUES = {'none', 'nan', ''}
+
+# Números/símbolos no início
+RE_LEADING = re.compile(r'^[0-9\W_]+')
+# Emojis e caracteres especiais (mantém letras, espaços e acentos)
+RE_SPECIAL = re.compile(r'[^\w\s\-áéíóúâêôãõàèìòùçÁÉÍÓÚÂÊÔÃÕÀÈÌÒÙÇ]')
+# Números isolados
+RE_NUMBERS = re.compile(r'\b\d+\.?\d*\b')
+# Sequências de 4+ dígitos
+RE_LONG_DIGITS = re.compile(r'\d{4,}')
+RE_SPACES = re.compile(r'\s+')
+
+
+def clean_name(nome) -> str:
+    """Limpa um único nome (mesmas regras de antes, padrões pré-compilados)"""
+    if pd.isna(nome) or str(nome).lower() in EMPTY_VALUES:
+        return DEFAULT_NAME
+
+    nome = str(nome)
+    for termo in TERMS_TO_REMOVE:
+        nome = nome.replace(termo, '')
+
+    nome = RE_LEADING.sub('', nome)
+    nome = RE_SPECIAL.sub('', nome)
+    nome = RE_NUMBERS.sub('', nome)
+    nome = RE_LONG_DIGITS.sub('', nome)
+    nome = RE_SPACES.sub(' ', nome).strip()
+
+    if len(nome) < 2 or nome.isdigit():
+        return DEFAULT_NAME
+
+    return nome.title()
+
+
+def clean_names(values: pd.Series) -> pd.Series:
+    """Limpa a coluna inteira, processando cada valor distinto uma vez"""
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    cleaned = np.array([clean_name(v) for v in uniques] + [DEFAULT_NAME], dtype=object)
+    # código -1 (ausente) cai no último item: 'Contato'
+    return pd.Series(cleaned[codes], index=values.index, dtype=object)
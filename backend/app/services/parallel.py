@@ -0,0 +1,284 @@
+"""
+Execução paralela de etapas por linha (pool de processos)
+
+Etapas que não dependem de outras linhas (ver `app.services.transforms` e
+as etapas por bloco dos presets) podem rodar em partições da planilha em
+vários núcleos. Os dados não passam por pickle: cada partição é gravada
+como arquivo Arrow IPC em memória compartilhada (/dev/shm), o worker lê
+com memory map, aplica a etapa e devolve o resultado do mesmo jeito. Só o
+nome da função, os argumentos e os caminhos trafegam pelo pool.
+
+Os resultados voltam na ordem das partições, então etapas globais
+(deduplicação, ordenação) feitas depois sobre eles são determinísticas.
+
+`map_ranges` usa o mesmo transporte para tarefas que produzem outra coisa
+(ex.: um arquivo por faixa de linhas na exportação dividida): o worker
+devolve só o resultado da função, que precisa ser pequeno.
+
+Planilhas pequenas (abaixo de PARALLEL_MIN_ROWS), máquinas com um núcleo,
+ausência do pyarrow ou colunas que o Arrow não representa (tipos
+misturados) ficam no caminho em processo, sem custo de serialização.
+"""
+import multiprocessing
+import os
+import tempfile
+import threading
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+
+import pandas as pd
+
+from app.core.config import PARALLEL_WORKERS, PARALLEL_MIN_ROWS, PARALLEL_SHM_DIR
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - Arrow é opcional
+    pa = None
+
+ARROW_ERRORS = (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) if pa else ()
+# /dev/shm cheio (64 MB por padrão no Docker) também cai no caminho local
+WRITE_ERRORS = ARROW_ERRORS + (OSError,)
+
+
+def _shm_dir() -> str:
+    if PARALLEL_SHM_DIR:
+        os.makedirs(PARALLEL_SHM_DIR, exist_ok=True)
+        return PARALLEL_SHM_DIR
+    return '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+
+
+def _write_arrow(df: pd.DataFrame, path: str):
+    table = pa.Table.from_pandas(df)
+    with pa.OSFile(path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def _read_arrow(path: str) -> pd.DataFrame:
+    with pa.memory_map(path, 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+    df = table.to_pandas()
+    # Colunas que eram object voltam como object, com os mesmos objetos
+    # Python: o pandas 3 leria texto como str, e inteiros com ausentes
+    # (int64 com nulos no Arrow) viriam como float (11987654321.0)
+    for meta in (table.schema.pandas_metadata or {}).get('columns', []):
+        name = meta['name']
+        if meta['numpy_type'] == 'object' and name in df.columns and df[name].dtype != object:
+            column = table.column(name)
+            if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+                values = column.to_numpy(zero_copy_only=False)
+            else:
+                values = column.to_pylist()
+            df[name] = pd.Series(values, index=df.index, dtype=object)
+    return df
+
+
+def _unlink(path: str):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def _arrow_safe(df: pd.DataFrame) -> bool:
+    """Arrow transforma nomes de coluna em str e recusa nomes repetidos"""
+    return all(isinstance(col, str) for col in df.columns) and df.columns.is_unique
+
+
+def _run_partition(func: Callable, in_path: str, out_path: str, args: tuple) -> bool:
+    """Roda no worker: lê a partição, aplica a etapa e grava o resultado
+
+    Retorna False se o resultado não couber em Arrow (a partição é refeita
+    no processo principal).
+    """
+    try:
+        result = func(_read_arrow(in_path), *args)
+    finally:
+        _unlink(in_path)
+    if not _arrow_safe(result):
+        return False
+    try:
+        _write_arrow(result, out_path)
+    except WRITE_ERRORS:
+        _unlink(out_path)
+        return False
+    return True
+
+
+def _run_range(func: Callable, in_path: str, args: tuple) -> Any:
+    """Roda no worker: lê a faixa de linhas e devolve `func(faixa, *args)`"""
+    try:
+        part = _read_arrow(in_path)
+    finally:
+        _unlink(in_path)
+    return func(part, *args)
+
+
+class ParallelExecutor:
+    def __init__(self, workers: int, min_rows: int):
+        self.workers = max(1, workers)
+        self.min_rows = min_rows
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        self.stats = {'parallel_runs': 0, 'local_runs': 0, 'partitions': 0, 'fallbacks': 0}
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: o servidor tem threads; fork copiaria locks no meio do uso
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+            return self._pool
+
+    def use_pool(self, df: pd.DataFrame, min_rows: Optional[int] = None) -> bool:
+        min_rows = self.min_rows if min_rows is None else min_rows
+        return (pa is not None and self.workers > 1 and len(df) >= min_rows
+                and _arrow_safe(df))
+
+    def map_partitions(self, df: pd.DataFrame, func: Callable, *args: Any,
+                       partition_rows: Optional[int] = None) -> Iterator[Tuple[int, pd.DataFrame]]:
+        """`(início, func(df[início:início + partition_rows], *args))` em ordem
+
+        No pool, no máximo 2 partições por worker ficam em andamento.
+        Sem `partition_rows`, a planilha é dividida em 2 partições por worker.
+        """
+        total = len(df)
+        if partition_rows is None:
+            partition_rows = max(1, -(-total // (self.workers * 2)))
+        starts = range(0, max(total, 1), partition_rows)
+
+        if not self.use_pool(df):
+            self.stats['local_runs'] += 1
+            for start in starts:
+                yield start, func(df.iloc[start:start + partition_rows], *args)
+            return
+
+        self.stats['parallel_runs'] += 1
+        pool = self._get_pool()
+        directory = _shm_dir()
+        pending = deque()
+
+        def submit(start):
+            part = df.iloc[start:start + partition_rows]
+            in_path = os.path.join(directory, f'part-{uuid.uuid4().hex}.arrow')
+            out_path = os.path.join(directory, f'part-{uuid.uuid4().hex}.arrow')
+            try:
+                _write_arrow(part, in_path)
+            except WRITE_ERRORS:
+                _unlink(in_path)
+                pending.append((start, part, None, None, None))
+                return
+            try:
+                future = pool.submit(_run_partition, func, in_path, out_path, args)
+            except Exception:
+                _unlink(in_path)
+                raise
+            pending.append((start, part, future, in_path, out_path))
+
+        def collect():
+            start, part, future, _, out_path = pending.popleft()
+            self.stats['partitions'] += 1
+            if future is None or not future.result():
+                self.stats['fallbacks'] += 1
+                return start, func(part, *args)
+            try:
+                return start, _read_arrow(out_path)
+            finally:
+                _unlink(out_path)
+
+        try:
+            for start in starts:
+                submit(start)
+                if len(pending) >= self.workers * 2:
+                    yield collect()
+            while pending:
+                yield collect()
+        finally:
+            # Consumidor parou no meio (erro ou generator fechado): o que
+            # não começou é cancelado e a entrada apagada aqui; o que já roda
+            # apaga a entrada no worker e a saída ao terminar
+            for _, _, future, in_path, out_path in pending:
+                if future is None:
+                    continue
+                if future.cancel():
+                    _unlink(in_path)
+                else:
+                    future.add_done_callback(lambda _, path=out_path: _unlink(path))
+
+    def map_ranges(self, df: pd.DataFrame, func: Callable, tasks: Iterable[Tuple[int, int, tuple]],
+                   min_rows: Optional[int] = None) -> Iterator[Any]:
+        """`func(df[início:fim], *args)` para cada `(início, fim, args)`, em ordem
+
+        Como em `map_partitions`, no máximo 2 tarefas por worker ficam em
+        andamento; faixas que não vão para Arrow rodam no processo principal.
+        """
+        if not self.use_pool(df, min_rows):
+            self.stats['local_runs'] += 1
+            for start, stop, args in tasks:
+                yield func(df.iloc[start:stop], *args)
+            return
+
+        self.stats['parallel_runs'] += 1
+        pool = self._get_pool()
+        directory = _shm_dir()
+        pending = deque()
+
+        def submit(start, stop, args):
+            part = df.iloc[start:stop]
+            in_path = os.path.join(directory, f'range-{uuid.uuid4().hex}.arrow')
+            try:
+                _write_arrow(part, in_path)
+            except WRITE_ERRORS:
+                _unlink(in_path)
+                pending.append((part, args, None, None))
+                return
+            try:
+                future = pool.submit(_run_range, func, in_path, args)
+            except Exception:
+                _unlink(in_path)
+                raise
+            pending.append((part, args, future, in_path))
+
+        def collect():
+            part, args, future, _ = pending.popleft()
+            self.stats['partitions'] += 1
+            if future is None:
+                self.stats['fallbacks'] += 1
+                return func(part, *args)
+            return future.result()
+
+        try:
+            for start, stop, args in tasks:
+                submit(start, stop, args)
+                if len(pending) >= self.workers * 2:
+                    yield collect()
+            while pending:
+                yield collect()
+        finally:
+            # Consumidor parou no meio: cancela o que ainda não começou
+            for _, _, future, in_path in pending:
+                if future is not None and future.cancel():
+                    _unlink(in_path)
+
+    def apply_rows(self, df: pd.DataFrame, func: Callable, *args: Any) -> pd.DataFrame:
+        """Aplica uma etapa por linha na planilha inteira (em paralelo se valer a pena)"""
+        if not self.use_pool(df):
+            self.stats['local_runs'] += 1
+            return func(df, *args)
+        parts = [part for _, part in self.map_partitions(df, func, *args)]
+        return pd.concat(parts) if len(parts) > 1 else parts[0]
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+# Instância global
+parallel_executor = ParallelExecutor(PARALLEL_WORKERS, PARALLEL_MIN_ROWS)
@@ -0,0 +1,40 @@
+"""
+Normalização vetorizada de telefones (modo MULTIONE)
+
+Mesmas regras do antigo `processar_telefone` por linha, em uma passada
+colunar:
+- só dígitos; menos de 8 dígitos -> inválido
+- começa com 55: 12-13 dígitos mantém, mais de 13 trunca em 13, senão inválido
+- não começa com 55: prefixa 55 e mantém se ficar com 12-13 dígitos
+"""
+import numpy as np
+import pandas as pd
+
+from app.services.digits import digit_matrix, digits_to_strings
+
+MAX_DIGITS = 13
+
+
+def normalize_phones(values: pd.Series) -> pd.Series:
+    """Telefones no formato 55DDDNUMERO; None onde o número é inválido"""
+    digits, counts = digit_matrix(values.to_numpy(dtype=object), MAX_DIGITS)
+
+    five = ord('5')
+    has_55 = (counts >= 2) & (digits[:, 0] == five) & (digits[:, 1] == five)
+
+    # Com 55: 12-13 dígitos, ou mais de 13 (truncado)
+    valid_55 = has_55 & (counts >= 12)
+    # Sem 55: 10-11 dígitos viram 12-13 com o prefixo
+    valid_prefixed = ~has_55 & (counts >= 10) & (counts <= 11)
+
+    out = digits.copy()
+    out[valid_prefixed, 2:] = digits[valid_prefixed, :MAX_DIGITS - 2]
+    out[valid_prefixed, 0:2] = five
+
+    lengths = np.where(valid_prefixed, counts + 2, np.minimum(counts, MAX_DIGITS))
+
+    # Só as linhas válidas viram str; as demais ficam None
+    valid = valid_55 | valid_prefixed
+    phones = np.full(len(values), None, dtype=object)
+    phones[valid] = digits_to_strings(out[valid], lengths[valid])
+    return pd.Series(phones, index=values.index, dtype=object)
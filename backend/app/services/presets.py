@@ -0,0 +1,209 @@
+"""
+Presets do assistente (MULTIONE / COMERCIAL) em execução por blocos
+
+A planilha de entrada passa em partições de `chunk_rows` linhas pelas
+etapas por linha (limpeza de telefone, nome, e-mail...). As etapas globais
+usam estruturas que transbordam para disco (`app.services.spill`):
+
+- deduplicação por telefone/e-mail: `SpillableKeySet` (keep='first')
+- ordenação por EMPRESA: `ExternalSorter` (runs + merge k-way)
+
+Assim nenhuma cópia inteira intermediária é montada: a memória de trabalho
+fica limitada por `max_bytes` (PRESET_MEMORY_BYTES) além da entrada e do
+resultado final.
+
+As etapas por bloco (`_multione_stage`, `_format_comercial`) são funções de
+módulo e passam por `parallel_executor.map_partitions`: em planilhas
+grandes rodam no pool de processos, e os blocos voltam na ordem original
+para as etapas globais.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import PRESET_CHUNK_ROWS, PRESET_MEMORY_BYTES
+from app.services.columns import column_index
+from app.services.digits import digit_matrix, digits_to_strings
+from app.services.documents import parse_cnpj
+from app.services.jobs import report_progress
+from app.services.names import clean_names, DEFAULT_NAME
+from app.services.parallel import parallel_executor
+from app.services.phones import normalize_phones
+from app.services.spill import (
+    SEQ, ChunkSpool, ExternalSorter, SpillableKeySet, spill_workdir
+)
+
+
+def _in_sorted(values: np.ndarray, sorted_values: np.ndarray) -> np.ndarray:
+    if not len(sorted_values):
+        return np.zeros(len(values), dtype=bool)
+    pos = np.searchsorted(sorted_values, values).clip(max=len(sorted_values) - 1)
+    return sorted_values[pos] == values
+
+
+def _concat(pieces: List[pd.DataFrame], columns) -> pd.DataFrame:
+    if not pieces:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(pieces, ignore_index=True)
+
+
+# ==================== MULTIONE ====================
+
+def _multione_stage(chunk: pd.DataFrame, nome_col, telefone_col) -> pd.DataFrame:
+    """Nome + Telefone normalizado das linhas com telefone válido
+
+    SEQ leva a posição dentro do bloco (o chamador soma o início do bloco).
+    """
+    limpo = pd.DataFrame({
+        'Nome': chunk[nome_col].astype(str),
+        'Telefone': normalize_phones(chunk[telefone_col].astype(str)),
+    })
+    valid = limpo['Telefone'].notna().to_numpy()
+    return limpo[valid].assign(**{SEQ: np.flatnonzero(valid)})
+
+
+def run_multione(df: pd.DataFrame, nome_col, telefone_col,
+                 chunk_rows: int = PRESET_CHUNK_ROWS,
+                 max_bytes: int = PRESET_MEMORY_BYTES) -> Tuple[pd.DataFrame, int]:
+    """Nome + Telefone (55DDDNUMERO) sem telefones inválidos ou repetidos
+
+    Retorna `(resultado, contatos_genericos)`.
+    """
+    with spill_workdir() as workdir:
+        spool = ChunkSpool(workdir, max_bytes // 2)
+        phones = SpillableKeySet(workdir, max_bytes // 4)
+
+        stages = parallel_executor.map_partitions(
+            df, _multione_stage, nome_col, telefone_col, partition_rows=chunk_rows
+        )
+        for start, limpo in stages:
+            seq = limpo[SEQ].to_numpy() + start
+            limpo[SEQ] = seq
+
+            phones.add(limpo['Telefone'], seq)
+            spool.add(limpo)
+            report_progress('multione: telefones', start + chunk_rows, len(df))
+
+        report_progress('multione: duplicatas')
+        winners = phones.first_seen()
+        pieces = []
+        report_progress('multione: nomes')
+        for chunk in spool:
+            chunk = chunk[_in_sorted(chunk[SEQ].to_numpy(), winners)]
+            # Nomes só nas linhas que sobraram
+            pieces.append(chunk.drop(columns=SEQ).assign(Nome=clean_names(chunk['Nome'])))
+
+    result = _concat(pieces, ['Nome', 'Telefone'])
+    return result, int((result['Nome'] == DEFAULT_NAME).sum())
+
+
+# ==================== COMERCIAL ====================
+
+def _only_digits(values: pd.Series) -> pd.Series:
+    """`re.sub(r'[^0-9]', '', str(x))` por valor; ausentes continuam None"""
+    digits, counts = digit_matrix(values.to_numpy(dtype=object))
+    out = np.array(digits_to_strings(digits, counts) if len(values) else [], dtype=object)
+    out[values.isna().to_numpy()] = None
+    return pd.Series(out, index=values.index, dtype=object)
+
+
+# Palavras-chave no nome da coluna -> coluna do resultado, em ordem de prioridade
+COMERCIAL_TARGETS = [({'empresa', 'company'}, 'EMPRESA'), ({'nome'}, 'NOME_CONTATO'),
+                     ({'email', 'mail'}, 'EMAIL'), ({'telefone', 'phone'}, 'TELEFONE'), ({'cnpj'}, 'CNPJ')]
+
+
+def _comercial_targets(columns) -> Dict[str, Any]:
+    """Coluna de origem de cada coluna do resultado (vale a última; a posição é a da primeira)"""
+    index = column_index(columns)
+    targets = {}
+    for col in columns:
+        found = index.keywords(col)
+        target = next((out for keywords, out in COMERCIAL_TARGETS if found & keywords), None)
+        if target:
+            targets[target] = col
+    return targets
+
+
+def _format_comercial(df: pd.DataFrame, data_cadastro: str, targets: Dict[str, Any]) -> pd.DataFrame:
+    formatted_df = pd.DataFrame()
+
+    for target, col in targets.items():
+        if target == 'EMPRESA':
+            formatted_df['EMPRESA'] = df[col].str.strip().str.upper()
+        elif target == 'NOME_CONTATO':
+            formatted_df['NOME_CONTATO'] = df[col].str.strip().str.title()
+        elif target == 'EMAIL':
+            formatted_df['EMAIL'] = df[col].str.strip().str.lower()
+        elif target == 'TELEFONE':
+            formatted_df['TELEFONE'] = _only_digits(df[col])
+        else:
+            cnpj = parse_cnpj(df[col], ('formatted',))['formatted']
+            # Preenchido sem nenhum dígito continua virando '' (não None)
+            formatted_df['CNPJ'] = cnpj.where(cnpj.notna() | df[col].isna(), '')
+
+    if 'EMPRESA' not in formatted_df.columns and len(df.columns) > 0:
+        formatted_df['EMPRESA'] = df[df.columns[0]].str.strip().str.upper()
+
+    if 'EMAIL' in formatted_df.columns:
+        email = formatted_df['EMAIL']
+        # Bloco só com e-mails vazios: split devolve float e `.str` falharia
+        formatted_df['DOMINIO'] = email.str.split('@').str[1] if email.notna().any() else email
+
+    if 'TELEFONE' in formatted_df.columns:
+        formatted_df['DDD'] = formatted_df['TELEFONE'].str[:2]
+
+    formatted_df['STATUS'] = 'ATIVO'
+    formatted_df['DATA_CADASTRO'] = data_cadastro
+    return formatted_df
+
+
+def run_comercial(df: pd.DataFrame,
+                  chunk_rows: int = PRESET_CHUNK_ROWS,
+                  max_bytes: int = PRESET_MEMORY_BYTES) -> Tuple[pd.DataFrame, int]:
+    """Base comercial padronizada, sem e-mails repetidos, ordenada por EMPRESA
+
+    Retorna `(resultado, duplicatas_removidas)`.
+    """
+    data_cadastro = datetime.now().strftime('%Y-%m-%d')
+    columns = None
+    total = 0
+
+    with spill_workdir() as workdir:
+        spool = ChunkSpool(workdir, max_bytes // 2)
+        emails = SpillableKeySet(workdir, max_bytes // 4)
+
+        stages = parallel_executor.map_partitions(
+            df, _format_comercial, data_cadastro, _comercial_targets(df.columns), partition_rows=chunk_rows
+        )
+        for start, formatted in stages:
+            columns = list(formatted.columns)
+            seq = np.arange(start, start + len(formatted))
+            formatted[SEQ] = seq
+            total += len(formatted)
+
+            if 'EMAIL' in columns:
+                emails.add(formatted['EMAIL'], seq)
+            spool.add(formatted)
+            report_progress('comercial: padronização', start + chunk_rows, len(df))
+
+        report_progress('comercial: duplicatas e ordenação')
+        winners = emails.first_seen() if 'EMAIL' in columns else None
+        kept = 0
+
+        # Mesma interface (add + iteração): ordenado por EMPRESA ou na ordem original
+        if 'EMPRESA' in columns:
+            sink = ExternalSorter(workdir, 'EMPRESA', max_bytes // 4, chunk_rows)
+        else:
+            sink = ChunkSpool(workdir, max_bytes // 4, name='resultado')
+
+        for chunk in spool:
+            if winners is not None:
+                chunk = chunk[_in_sorted(chunk[SEQ].to_numpy(), winners)]
+            kept += len(chunk)
+            sink.add(chunk.dropna(how='all', subset=columns))
+
+        pieces = [chunk.drop(columns=SEQ) for chunk in sink]
+
+    return _concat(pieces, columns), total - kept
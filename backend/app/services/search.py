@@ -0,0 +1,259 @@
+"""
+Índice invertido de termos com ranking BM25 (busca na base de conhecimento)
+
+`ExcelAssistant.search_function` percorria todas as chaves do índice a cada
+pergunta, normalizando cada uma de novo e testando substring nos dois
+sentidos: custo proporcional ao vocabulário e resultado sem ordem (os 5
+primeiros do dict).
+
+Aqui os documentos são tokenizados e normalizados uma vez na montagem:
+
+- listas de postings termo -> [(documento, peso BM25)], com o peso já
+  calculado (k1 = 1.2, b = 0.75)
+- a consulta é tokenizada do mesmo jeito; termos fora do vocabulário com
+  3+ letras valem como prefixo ("conc" -> "concatenar"), pelo vocabulário
+  ordenado (bisect)
+- os documentos que têm todos os termos reconhecidos (interseção das
+  listas) vêm primeiro, depois os que têm menos termos; dentro de cada
+  grupo, o documento cujo nome aparece inteiro na consulta ("função SE"
+  -> SE antes de CONT.SE) e depois o maior score BM25
+- termos que nem assim aparecem são procurados com tolerância a erro de
+  digitação ("procvv", "cocatenar", "medai"): índice symmetric-delete
+  (cada termo do vocabulário guardado com todas as variantes de até
+  MAX_EDITS letras apagadas); a consulta gera as próprias deleções, junta
+  os candidatos e confirma a distância de Damerau-Levenshtein. O custo
+  depende do tamanho do termo, não do vocabulário. Até 1 erro em termos
+  de 3 a 5 letras, até 2 a partir de 6, nenhum em termos com dígitos; o
+  peso cai com a distância
+- palavras vazias do português ("e", "se", "ou", "de"...) só contam se
+  escritas em maiúscula na consulta ("função SE") ou se são a consulta
+  inteira, senão toda pergunta casaria com as funções E / SE / OU
+
+A busca custa o tamanho das listas dos termos da consulta, não o tamanho
+da base. O índice inteiro fica em arrays (vocabulário e variantes em
+`StringTable`, postings em CSR), então pode ser gravado num snapshot e
+usado direto do mmap (`Bm25Index.from_arrays`).
+"""
+import heapq
+import math
+import re
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.snapshot import StringTable
+from app.services.text import normalize_text
+
+K1 = 1.2
+B = 0.75
+MIN_PREFIX = 3
+MAX_EXPANSIONS = 20
+MAX_EDITS = 2
+MIN_FUZZY = 3        # termos menores não entram na busca tolerante ("se", "ou")
+
+RE_TOKEN = re.compile(r'[a-z0-9]+')
+RE_RAW_TOKEN = re.compile(r'\w+')
+
+STOPWORDS = frozenset({
+    'a', 'o', 'as', 'os', 'e', 'ou', 'se', 'de', 'da', 'do', 'das', 'dos', 'em', 'no', 'na', 'nos', 'nas',
+    'um', 'uma', 'com', 'por', 'para', 'que', 'qual', 'como', 'eu', 'me', 'meu', 'minha', 'fazer', 'faco',
+    'usar', 'uso', 'excel', 'funcao', 'formula', 'planilha', 'celula', 'celulas', 'ao', 'quero',
+})
+
+
+def tokenize(text: str) -> List[str]:
+    """Termos normalizados (minúsculas, sem acento, só letras e dígitos)"""
+    return RE_TOKEN.findall(normalize_text(text))
+
+
+def allowed_edits(term: str) -> int:
+    """Erros tolerados para o tamanho do termo (códigos com dígitos não têm tolerância)"""
+    if len(term) < MIN_FUZZY or not term.isalpha():
+        return 0
+    return 1 if len(term) <= 5 else MAX_EDITS
+
+
+def deletes(term: str, edits: int) -> set:
+    """O termo e todas as variantes com até `edits` letras apagadas"""
+    found = {term}
+    frontier = {term}
+    for _ in range(edits):
+        frontier = {word[:i] + word[i + 1:] for word in frontier if len(word) > 1 for i in range(len(word))}
+        found |= frontier
+    return found
+
+
+def _csr(name: str, rows: List[List[int]], weights: Optional[List[List[float]]] = None) -> Dict[str, np.ndarray]:
+    """Listas de ids (e pesos) em formato CSR: offsets + ids concatenados"""
+    offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(row) for row in rows], out=offsets[1:])
+    total = int(offsets[-1])
+    arrays = {f'{name}.offsets': offsets,
+              f'{name}.ids': np.fromiter((i for row in rows for i in row), dtype=np.int32, count=total)}
+    if weights is not None:
+        arrays[f'{name}.weights'] = np.fromiter((w for row in weights for w in row), dtype=np.float64, count=total)
+    return arrays
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Damerau-Levenshtein (transposição adjacente conta 1); acima de `limit` devolve limit + 1"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous, current = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+    return min(current[len(b)], limit + 1)
+
+
+class Bm25Index:
+    def __init__(self, documents: Sequence[Iterable[str]], names: Optional[Sequence[str]] = None,
+                 fuzzy: bool = True):
+        """`documents`: termos de cada documento (já tokenizados); `names`: nome de cada um"""
+        counts: List[Dict[str, int]] = []
+        for terms in documents:
+            tf: Dict[str, int] = {}
+            for term in terms:
+                tf[term] = tf.get(term, 0) + 1
+            counts.append(tf)
+
+        size = len(counts)
+        lengths = [sum(tf.values()) for tf in counts]
+        avgdl = (sum(lengths) / size) if size else 1.0
+        df: Dict[str, int] = {}
+        for tf in counts:
+            for term in tf:
+                df[term] = df.get(term, 0) + 1
+
+        postings: Dict[str, List[Tuple[int, float]]] = {}
+        for doc, tf in enumerate(counts):
+            norm = K1 * (1 - B + B * lengths[doc] / (avgdl or 1.0))
+            for term, freq in tf.items():
+                idf = math.log(1 + (size - df[term] + 0.5) / (df[term] + 0.5))
+                postings.setdefault(term, []).append((doc, idf * freq * (K1 + 1) / (freq + norm)))
+        vocabulary = sorted(postings)
+
+        # Variante com letras apagadas -> termos do vocabulário (symmetric delete)
+        variants: Dict[str, List[int]] = {}
+        if fuzzy:
+            for term_id, term in enumerate(vocabulary):
+                for variant in deletes(term, allowed_edits(term)):
+                    variants.setdefault(variant, []).append(term_id)
+
+        # Tudo em arrays (listas CSR + tabelas de strings): é o que vai para o snapshot
+        arrays = {'size': np.array([size], dtype=np.int64)}
+        arrays.update(StringTable.build(vocabulary).arrays('vocabulary'))
+        arrays.update(_csr('postings', [[doc for doc, _ in postings[term]] for term in vocabulary],
+                           [[weight for _, weight in postings[term]] for term in vocabulary]))
+        arrays.update(StringTable.build(variants).arrays('deletes'))
+        arrays.update(_csr('variant_terms', list(variants.values())))
+        if names:
+            arrays.update(StringTable.build((' '.join(tokenize(name)) for name in names), hashed=False).arrays('names'))
+        self._attach(arrays)
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> 'Bm25Index':
+        """Índice sobre arrays já montados (ex.: views do mmap de um snapshot), sem recalcular nada"""
+        index = cls.__new__(cls)
+        index._attach(arrays)
+        return index
+
+    def _attach(self, arrays: Dict[str, np.ndarray]):
+        self.arrays = arrays
+        self.size = int(arrays['size'][0])
+        self.vocabulary = StringTable.from_arrays(arrays, 'vocabulary')
+        self._deletes = StringTable.from_arrays(arrays, 'deletes')
+        self.names = StringTable.from_arrays(arrays, 'names') if 'names.offsets' in arrays else None
+        # memoryview: fatias e itens sem criar arrays/escalares NumPy a cada termo
+        self._postings = tuple(memoryview(arrays[f'postings.{part}']) for part in ('offsets', 'ids', 'weights'))
+        self._delete_terms = tuple(memoryview(arrays[f'variant_terms.{part}']) for part in ('offsets', 'ids'))
+
+    def postings(self, term: str) -> List[Tuple[int, float]]:
+        """(documento, peso BM25) do termo; vazio se fora do vocabulário"""
+        i = self.vocabulary.find(term)
+        if i < 0:
+            return []
+        offsets, docs, weights = self._postings
+        lo, hi = offsets[i], offsets[i + 1]
+        return list(zip(docs[lo:hi].tolist(), weights[lo:hi].tolist()))
+
+    def _expand(self, term: str) -> List[Tuple[str, float]]:
+        """(termo do vocabulário, fator do peso) para um termo da consulta
+
+        O próprio termo; senão os que começam com ele; senão os que estão a
+        até `allowed_edits` erros de digitação.
+        """
+        if term in self.vocabulary:
+            return [(term, 1.0)]
+        if len(term) < MIN_PREFIX:
+            return []
+        start = bisect_left(self.vocabulary, term)
+        found = []
+        for i in range(start, min(start + MAX_EXPANSIONS, len(self.vocabulary))):
+            candidate = self.vocabulary[i]
+            if not candidate.startswith(term):
+                break
+            found.append((candidate, 1.0))
+        return found or self.fuzzy(term)
+
+    def fuzzy(self, term: str) -> List[Tuple[str, float]]:
+        """Termos do vocabulário a até `allowed_edits` erros (os mais próximos), com fator 1 / (1 + distância)"""
+        if not len(self._deletes):
+            return []
+        edits = allowed_edits(term)
+        offsets, ids = self._delete_terms
+        candidates = set()
+        for variant in deletes(term, edits):
+            i = self._deletes.find(variant)
+            if i >= 0:
+                candidates.update(ids[offsets[i]:offsets[i + 1]].tolist())
+
+        best, found = edits, []
+        for candidate in map(self.vocabulary.__getitem__, candidates):
+            limit = min(edits, allowed_edits(candidate))
+            distance = edit_distance(term, candidate, limit)
+            if distance > limit or distance > best:
+                continue
+            if distance < best:
+                best, found = distance, []
+            found.append(candidate)
+        return [(candidate, 1 / (1 + best)) for candidate in sorted(found)[:MAX_EXPANSIONS]]
+
+    def query_terms(self, query: str) -> List[str]:
+        """Termos da consulta que entram na busca (palavras vazias fora, salvo em maiúscula)"""
+        terms = tokenize(query)
+        if len(terms) <= 1:
+            return terms
+        upper = {normalize_text(word) for word in RE_RAW_TOKEN.findall(query) if word.isupper()}
+        return [term for term in terms if term not in STOPWORDS or term in upper]
+
+    def search(self, query: str, limit: int = 5) -> List[Tuple[int, float]]:
+        """(documento, score) dos melhores documentos para a consulta, maior score primeiro"""
+        groups = [self._expand(term) for term in dict.fromkeys(self.query_terms(query))]
+        groups = [group for group in groups if group]
+        if not groups:
+            return []
+
+        scores: Dict[int, float] = {}
+        matched: Dict[int, int] = {}
+        for group in groups:
+            seen = set()
+            for term, factor in group:
+                for doc, weight in self.postings(term):
+                    scores[doc] = scores.get(doc, 0.0) + weight * factor
+                    if doc not in seen:
+                        seen.add(doc)
+                        matched[doc] = matched.get(doc, 0) + 1
+
+        # Interseção (todos os termos) primeiro, depois quem casou menos termos
+        phrase = f" {' '.join(tokenize(query))} "
+        exact = (lambda doc: f' {self.names[doc]} ' in phrase) if self.names is not None else (lambda doc: False)
+        best = heapq.nsmallest(limit, scores, key=lambda doc: (-matched[doc], not exact(doc), -scores[doc], doc))
+        return [(doc, scores[doc]) for doc in best]
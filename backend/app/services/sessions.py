@@ -0,0 +1,155 @@
+"""
+Contexto de conversa por sessão (motores de IA sem estado global)
+
+`ai_engine` e `advanced_ai` são instâncias únicas do processo; o histórico
+de comandos, os padrões do usuário e o contexto da conversa ficavam nelas,
+crescendo a cada requisição (vazamento de memória num worker de longa
+duração) e misturando o contexto de usuários diferentes.
+
+Agora os motores guardam só as tabelas fixas (sinônimos, padrões) e o
+estado vai num `SessionContext` por conversa:
+
+- históricos em ring buffer (deque com maxlen SESSION_HISTORY); comandos
+  guardados com no máximo MAX_COMMAND_CHARS caracteres
+- `SessionStore` em LRU (OrderedDict): sessões paradas há mais de
+  SESSION_TTL segundos expiram, acima de SESSION_MAX sessões ou de
+  SESSION_MAX_BYTES estimados saem as menos usadas
+- tamanho e contadores de despejo vão para `/metrics`
+
+A chave é o `conversation_id` do payload (ou o `dataset_id`); sem chave a
+requisição usa um contexto descartável, que não fica guardado.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+from app.core.config import SESSION_MAX, SESSION_TTL, SESSION_MAX_BYTES, SESSION_HISTORY
+
+MAX_COMMAND_CHARS = 500
+SESSION_OVERHEAD = 2048   # bytes estimados de uma sessão vazia
+ENTRY_OVERHEAD = 200      # bytes estimados por entrada (dict/tupla + timestamp)
+
+
+class SessionContext:
+    def __init__(self, history: int = SESSION_HISTORY):
+        self.history_size = history
+        self.history = deque(maxlen=history)               # comandos (ambos os motores)
+        self.user_patterns: Dict[str, deque] = {}          # intenção -> comandos que deram certo
+        self.last_columns_created = deque(maxlen=history)
+        self.last_intent: Optional[str] = None
+        self.data_insights: Dict[str, str] = {}
+
+    def record(self, command: str, intent: str, success: Optional[bool] = None):
+        """Registra um comando no histórico (e nos padrões, se deu certo)"""
+        command = command[:MAX_COMMAND_CHARS]
+        entry = {'timestamp': datetime.now().isoformat(), 'command': command, 'intent': intent}
+        if success is not None:
+            entry['success'] = success
+        self.history.append(entry)
+        self.last_intent = intent
+        if success:
+            self.user_patterns.setdefault(intent, deque(maxlen=self.history_size)).append(command)
+
+    def estimate_bytes(self) -> int:
+        """Tamanho aproximado (o que conta para SESSION_MAX_BYTES)"""
+        size = SESSION_OVERHEAD
+        size += sum(ENTRY_OVERHEAD + len(entry['command']) for entry in self.history)
+        size += sum(ENTRY_OVERHEAD + len(c) for commands in self.user_patterns.values() for c in commands)
+        size += sum(ENTRY_OVERHEAD + len(str(c)) for c in self.last_columns_created)
+        size += sum(ENTRY_OVERHEAD + len(str(col)) for col in self.data_insights)
+        return size
+
+
+class SessionStore:
+    def __init__(self, max_sessions: int, ttl: float, max_bytes: int, history: int):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.history = history
+        self._sessions: "OrderedDict[str, SessionContext]" = OrderedDict()
+        self._touched: Dict[str, float] = {}
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evicted_ttl': 0, 'evicted_lru': 0, 'evicted_memory': 0}
+
+    def _drop(self, key: str, reason: str):
+        del self._sessions[key]
+        del self._touched[key]
+        self._bytes -= self._sizes.pop(key)
+        self.stats[reason] += 1
+
+    def _evict(self, now: float, keep: Optional[str] = None):
+        # Pela ponta LRU (mais antigas primeiro): expiradas, depois acima do número / memória
+        while self._sessions:
+            key = next(iter(self._sessions))
+            if key == keep:
+                break
+            if now - self._touched[key] > self.ttl:
+                self._drop(key, 'evicted_ttl')
+            elif len(self._sessions) > self.max_sessions:
+                self._drop(key, 'evicted_lru')
+            elif self._bytes > self.max_bytes:
+                self._drop(key, 'evicted_memory')
+            else:
+                break
+
+    def get(self, key: Optional[str]) -> SessionContext:
+        """Contexto da sessão (criado se não existe); sem chave, descartável"""
+        if not key:
+            return SessionContext(self.history)
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None and now - self._touched[key] > self.ttl:
+                self._drop(key, 'evicted_ttl')
+                session = None
+            if session is None:
+                self.stats['misses'] += 1
+                session = self._sessions[key] = SessionContext(self.history)
+                self._sizes[key] = SESSION_OVERHEAD
+                self._bytes += SESSION_OVERHEAD
+            else:
+                self.stats['hits'] += 1
+            self._sessions.move_to_end(key)
+            self._touched[key] = now
+            self._evict(now, keep=key)
+            return session
+
+    def update(self, key: Optional[str], session: SessionContext):
+        """Recalcula o tamanho depois de uma requisição e aplica os limites"""
+        if not key:
+            return
+        with self._lock:
+            if self._sessions.get(key) is not session:
+                return  # despejada enquanto a requisição rodava
+            size = session.estimate_bytes()
+            self._bytes += size - self._sizes[key]
+            self._sizes[key] = size
+            self._evict(time.monotonic(), keep=key)
+
+    @contextmanager
+    def session(self, key: Optional[str]) -> Iterator[SessionContext]:
+        session = self.get(key)
+        try:
+            yield session
+        finally:
+            self.update(key, session)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.stats, sessions=len(self._sessions), bytes=self._bytes,
+                        max_sessions=self.max_sessions, max_bytes=self.max_bytes)
+
+
+def session_key(payload: Dict[str, Any]) -> Optional[str]:
+    """Chave da sessão no payload: conversation_id ou dataset_id"""
+    key = payload.get('conversation_id') or payload.get('dataset_id')
+    return str(key) if key else None
+
+
+# Instância global
+session_store = SessionStore(SESSION_MAX, SESSION_TTL, SESSION_MAX_BYTES, SESSION_HISTORY)
@@ -0,0 +1,252 @@
+"""
+Índice de similaridade das respostas aprendidas (`/api/ai/learn`)
+
+Antes, cada mensagem buscava os 50 padrões de maior confiança no banco e
+comparava um a um com `difflib.SequenceMatcher` (quadrático no tamanho
+dos textos), sem nunca enxergar padrões fora dessa janela.
+
+Aqui todos os padrões ficam em memória como vetores TF-IDF de n-gramas de
+caracteres (2 a 4, com fronteira de palavra, sem acento), numa matriz
+esparsa com linhas normalizadas: a busca é um produto matriz x vetor
+(cosseno contra todos os padrões de uma vez) + top-k.
+
+- os n-gramas vão para colunas por hash (HashingVectorizer): não existe
+  vocabulário para refazer quando chegam padrões novos
+- padrões novos entram com o IDF atual; o IDF é recalculado para a matriz
+  inteira quando o corpus cresce REFRESH_GROWTH vezes
+- linhas novas ficam num bloco à parte até MERGE_ROWS e depois são
+  juntadas à matriz principal
+- o índice é salvo em disco (SIMILARITY_INDEX_PATH, .npz) no shutdown e
+  recarregado na subida, quando `warm()` roda `sync()` uma vez para trazer
+  do banco o que entrou depois do último sincronismo. Depois disso só
+  entram as gravações deste worker: padrões que outros workers aprendem
+  aparecem aqui no próximo restart
+- a confiança guardada aqui só recebe os ajustes deste worker; quem decide
+  com ela (`/learn`) relê o valor do banco com `refresh_confidence()`
+"""
+import asyncio
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+from app.core.config import SIMILARITY_INDEX_PATH
+
+N_FEATURES = 2 ** 18
+MERGE_ROWS = 256
+REFRESH_GROWTH = 1.2
+SYNC_PAGE = 1000
+FIELDS = ('id', 'input_text', 'response', 'intent', 'confidence')
+
+
+def _empty() -> sparse.csr_matrix:
+    return sparse.csr_matrix((0, N_FEATURES), dtype=np.float32)
+
+
+class SimilarityIndex:
+    def __init__(self, path: str):
+        self.path = path or os.path.join(tempfile.gettempdir(), 'smart_spreadsheet_similarity.npz')
+        self._vectorizer = HashingVectorizer(
+            analyzer='char_wb', ngram_range=(2, 4), n_features=N_FEATURES,
+            alternate_sign=False, norm=None, strip_accents='unicode', dtype=np.float32
+        )
+        self._lock = threading.RLock()
+        self._tf: List[sparse.csr_matrix] = []      # contagens brutas (para recalcular o IDF)
+        self._df = np.zeros(N_FEATURES, dtype=np.int64)
+        self._idf = np.ones(N_FEATURES, dtype=np.float32)
+        self._idf_docs = 0
+        self._matrix = _empty()                     # TF-IDF normalizado
+        self._pending: List[sparse.csr_matrix] = []
+        self._records: List[Dict[str, Any]] = []
+        self._positions: Dict[Any, int] = {}
+        self.synced_id = 0
+        self._dirty = False
+        self.stats = {'rows': 0, 'searches': 0, 'refreshes': 0}
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def _weigh(self, tf: sparse.csr_matrix) -> sparse.csr_matrix:
+        return normalize(sparse.csr_matrix(tf.multiply(self._idf)), copy=False)
+
+    def _refresh(self):
+        """Recalcula o IDF e a matriz inteira"""
+        n = len(self._records)
+        self._idf = (np.log((1 + n) / (1 + self._df)) + 1).astype(np.float32)
+        self._idf_docs = n
+        tf = sparse.vstack(self._tf, format='csr') if self._tf else _empty()
+        self._tf = [tf]
+        self._matrix = self._weigh(tf)
+        self._pending = []
+        self.stats['refreshes'] += 1
+
+    def add(self, records: List[Dict[str, Any]]):
+        """Inclui padrões (`id`, `input_text`, `response`, ...); ids repetidos são ignorados"""
+        with self._lock:
+            novos = []
+            for record in records:
+                if record.get('id') is None or record['id'] in self._positions or not record.get('input_text'):
+                    continue
+                self._positions[record['id']] = len(self._records) + len(novos)
+                novos.append({field: record.get(field) for field in FIELDS})
+            if not novos:
+                return
+
+            tf = self._vectorizer.transform([record['input_text'] for record in novos])
+            self._df += np.bincount(tf.indices, minlength=N_FEATURES)
+            self._tf.append(tf)
+            self._records.extend(novos)
+            self._dirty = True
+            self.stats['rows'] = len(self._records)
+
+            if len(self._records) >= self._idf_docs * REFRESH_GROWTH:
+                self._refresh()
+                return
+            self._pending.append(self._weigh(tf))
+            if sum(block.shape[0] for block in self._pending) >= MERGE_ROWS:
+                self._matrix = sparse.vstack([self._matrix] + self._pending, format='csr')
+                self._pending = []
+
+    def adjust(self, pattern_id: Any, confidence: float):
+        """Aplica no índice a mudança de confiança enviada ao banco (feedback)"""
+        with self._lock:
+            position = self._positions.get(pattern_id)
+            if position is None:
+                return
+            record = self._records[position]
+            record['confidence'] = min(1.0, max(0.1, (record['confidence'] or 0) + confidence))
+            self._dirty = True
+
+    def search(self, text: str, k: int = 5) -> List[Tuple[float, Dict[str, Any]]]:
+        """Os k padrões mais parecidos (cosseno), do maior para o menor"""
+        with self._lock:
+            self.stats['searches'] += 1
+            if not self._records or not text:
+                return []
+            # Consulta densa: CSR x vetor denso é um passe só sobre os nnz
+            query = self._weigh(self._vectorizer.transform([text]))
+            dense = np.zeros(N_FEATURES, dtype=np.float32)
+            dense[query.indices] = query.data
+            scores = np.concatenate([block @ dense for block in [self._matrix] + self._pending])
+            k = min(k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind='stable')]
+            return [(float(scores[i]), dict(self._records[i])) for i in top if scores[i] > 0]
+
+    def best(self, text: str, threshold: float, k: int = 5) -> Optional[Dict[str, Any]]:
+        """Padrão mais parecido acima do limiar (ou None)"""
+        for score, record in self.search(text, k):
+            if score > threshold:
+                return dict(record, score=score)
+        return None
+
+    # ==================== DISCO / BANCO ====================
+
+    def save(self):
+        """Grava o índice (troca atômica do arquivo); só se mudou"""
+        with self._lock:
+            if not self._dirty:
+                return
+            if len(self._tf) > 1:
+                self._tf = [sparse.vstack(self._tf, format='csr')]
+            tf = self._tf[0] if self._tf else _empty()
+            records = json.dumps(self._records, default=str)
+            synced_id = self.synced_id
+            self._dirty = False
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, data=tf.data, indices=tf.indices, indptr=tf.indptr,
+                         records=np.array(records), synced_id=np.array(synced_id))
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def load(self) -> bool:
+        """Carrega o índice salvo; arquivo ausente ou inválido começa vazio"""
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with np.load(self.path) as saved:
+                tf = sparse.csr_matrix((saved['data'], saved['indices'], saved['indptr']),
+                                       shape=(len(saved['indptr']) - 1, N_FEATURES))
+                records = json.loads(str(saved['records']))
+                synced_id = int(saved['synced_id'])
+        except Exception as e:
+            print(f"⚠️ Índice de similaridade inválido em {self.path}, reconstruindo: {e}")
+            return False
+
+        with self._lock:
+            self._tf = [tf]
+            self._df = np.bincount(tf.indices, minlength=N_FEATURES).astype(np.int64)
+            self._records = records
+            self._positions = {record['id']: i for i, record in enumerate(records)}
+            self.synced_id = synced_id
+            self.stats['rows'] = len(records)
+            self._refresh()
+        return True
+
+    async def sync(self, client) -> int:
+        """Traz do banco os padrões com id acima do último sincronismo (retorna quantos entraram)"""
+        antes = len(self)
+        while True:
+            result = await client.table('ai_learning')\
+                .select(','.join(FIELDS))\
+                .gt('id', self.synced_id)\
+                .order('id')\
+                .limit(SYNC_PAGE)\
+                .execute()
+            rows = result.data or []
+            if not rows:
+                break
+            self.add(rows)
+            self.synced_id = max(self.synced_id, max(row['id'] for row in rows))
+            self._dirty = True
+            if len(rows) < SYNC_PAGE:
+                break
+        return len(self) - antes
+
+    async def refresh_confidence(self, client, pattern_id: Any) -> Optional[float]:
+        """Confiança atual do padrão no banco (com os feedbacks de todos os workers)
+
+        Atualiza o registro no índice; None se o padrão não existe mais.
+        """
+        result = await client.table('ai_learning')\
+            .select('confidence')\
+            .eq('id', pattern_id)\
+            .limit(1)\
+            .execute()
+        rows = result.data or []
+        if not rows:
+            return None
+        confidence = rows[0]['confidence']
+        with self._lock:
+            position = self._positions.get(pattern_id)
+            if position is not None and self._records[position]['confidence'] != confidence:
+                self._records[position]['confidence'] = confidence
+                self._dirty = True
+        return confidence
+
+    async def warm(self, client):
+        """Subida: carrega do disco e completa com o banco"""
+        try:
+            loaded = await asyncio.to_thread(self.load)
+            novos = await self.sync(client)
+            print(f"🔎 Índice de similaridade: {len(self)} padrões "
+                  f"({'disco' if loaded else 'vazio'} + {novos} do banco)")
+        except Exception as e:
+            print(f"⚠️ Índice de similaridade sem sincronizar com o banco: {e}")
+
+
+# Instância global
+similarity_index = SimilarityIndex(SIMILARITY_INDEX_PATH)
@@ -0,0 +1,149 @@
+"""
+Snapshot binário de arrays NumPy (lido com mmap, compartilhado entre workers)
+
+Formato: MAGIC, tamanho do cabeçalho (uint64), cabeçalho JSON (metadados +
+dtype/forma/posição de cada array) e os arrays em sequência, alinhados em
+ALIGN bytes. A leitura não copia nada: cada array é uma view
+(`np.frombuffer`) sobre o mmap do arquivo, então N processos que abrem o
+mesmo snapshot dividem as mesmas páginas do cache do sistema.
+
+`StringTable` guarda uma lista de strings em arrays (offsets + bytes UTF-8)
+com uma tabela hash aberta (CRC32, sondagem linear): busca por valor sem
+montar dict em cada processo.
+"""
+import json
+import mmap
+import os
+import tempfile
+import zlib
+from collections.abc import Sequence
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+MAGIC = b'SSFSNAP1'
+ALIGN = 64
+
+
+def _aligned(size: int) -> int:
+    return (size + ALIGN - 1) // ALIGN * ALIGN
+
+
+def write_snapshot(path: str, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]):
+    """Grava o snapshot (arquivo temporário + troca atômica)"""
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[name] = array
+        layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset = _aligned(offset + array.nbytes)
+    header = json.dumps({'meta': meta, 'arrays': layout}, ensure_ascii=False).encode()
+    start = _aligned(len(MAGIC) + 8 + len(header))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIC + len(header).to_bytes(8, 'little') + header)
+            for name, array in arrays.items():
+                f.seek(start + layout[name]['offset'])
+                f.write(array.tobytes())
+            f.truncate(start + offset)
+        os.chmod(tmp, 0o644)   # lido por workers de outros usuários
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def read_snapshot(path: str) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """(arrays como views somente leitura sobre o mmap, metadados); ValueError se não for snapshot"""
+    with open(path, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} não é um snapshot")
+    size = int.from_bytes(data[len(MAGIC):len(MAGIC) + 8], 'little')
+    header = json.loads(data[len(MAGIC) + 8:len(MAGIC) + 8 + size])
+    start = _aligned(len(MAGIC) + 8 + size)
+
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        dtype, shape = np.dtype(spec['dtype']), tuple(spec['shape'])
+        count = int(np.prod(shape, dtype=np.int64))
+        arrays[name] = np.frombuffer(data, dtype=dtype, count=count, offset=start + spec['offset']).reshape(shape)
+    return arrays, header['meta']
+
+
+class StringTable(Sequence):
+    """Lista imutável de strings em arrays; `find` por hash, `[i]` decodifica sob demanda"""
+
+    def __init__(self, offsets: np.ndarray, blob: np.ndarray, slots: Optional[np.ndarray] = None):
+        self.offsets, self.blob, self.slots = offsets, blob, slots
+        # memoryview: acesso a um item sem criar escalares NumPy
+        self._offsets = memoryview(offsets)
+        self._blob = memoryview(blob)
+        self._slots = memoryview(slots) if slots is not None and len(slots) else None
+
+    @classmethod
+    def build(cls, strings: Iterable[str], hashed: bool = True) -> 'StringTable':
+        encoded = [s.encode() for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(s) for s in encoded], out=offsets[1:])
+        joined = b''.join(encoded)
+        blob = np.frombuffer(joined, dtype=np.uint8) if joined else np.zeros(0, dtype=np.uint8)
+        slots = None
+        if hashed:
+            size = 8
+            while size < 2 * len(encoded):
+                size *= 2
+            slots = np.full(size, -1, dtype=np.int32)
+            seen = set()
+            for i, value in enumerate(encoded):
+                if value in seen:
+                    continue   # repetida: vale a primeira
+                seen.add(value)
+                h = zlib.crc32(value) & (size - 1)
+                while slots[h] >= 0:
+                    h = (h + 1) & (size - 1)
+                slots[h] = i
+        return cls(offsets, blob, slots)
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], name: str) -> 'StringTable':
+        return cls(arrays[f'{name}.offsets'], arrays[f'{name}.blob'], arrays.get(f'{name}.slots'))
+
+    def arrays(self, name: str) -> Dict[str, np.ndarray]:
+        result = {f'{name}.offsets': self.offsets, f'{name}.blob': self.blob}
+        if self.slots is not None:
+            result[f'{name}.slots'] = self.slots
+        return result
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        return str(self._blob[self._offsets[i]:self._offsets[i + 1]], 'utf-8')
+
+    def find(self, value: str) -> int:
+        """Posição da string (a primeira, se repetida) ou -1"""
+        if self._slots is None:
+            return -1
+        data = value.encode()
+        slots, offsets, blob = self._slots, self._offsets, self._blob
+        mask = len(slots) - 1
+        h = zlib.crc32(data) & mask
+        while True:
+            i = slots[h]
+            if i < 0:
+                return -1
+            if blob[offsets[i]:offsets[i + 1]] == data:
+                return i
+            h = (h + 1) & mask
+
+    def __contains__(self, value) -> bool:
+        return isinstance(value, str) and self.find(value) >= 0
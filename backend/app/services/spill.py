@@ -0,0 +1,258 @@
+"""
+Estruturas que transbordam para disco (execução fora da memória)
+
+Usadas pelos presets (MULTIONE / COMERCIAL) para processar planilhas em
+blocos sem montar cópias inteiras do DataFrame:
+
+- `ChunkSpool`: fila de blocos em ordem; acima do orçamento os blocos vão
+  para um arquivo (sequência de pickles) e são relidos na mesma ordem
+- `SpillableKeySet`: conjunto de chaves particionado por hash que decide a
+  primeira ocorrência de cada chave (drop_duplicates keep='first'); acima
+  do orçamento as partições vão para disco e são resolvidas uma a uma
+- `ExternalSorter`: ordenação externa (runs ordenadas em disco + merge k-way)
+
+Todos os arquivos ficam em um diretório de trabalho que o chamador apaga
+no fim (ver `spill_workdir`).
+"""
+import os
+import pickle
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import DATASET_SPILL_DIR
+
+SEQ = '__seq'
+KEY_PARTITIONS = 32
+
+
+@contextmanager
+def spill_workdir():
+    """Diretório temporário de uma execução (removido ao sair)"""
+    base = DATASET_SPILL_DIR or None
+    if base:
+        os.makedirs(base, exist_ok=True)
+    path = tempfile.mkdtemp(prefix='preset-', dir=base)
+    try:
+        yield path
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def frame_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _append(path: str, df: pd.DataFrame):
+    with open(path, 'ab') as f:
+        pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _read(path: str) -> Iterator[pd.DataFrame]:
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+class ChunkSpool:
+    """Blocos de um DataFrame, em ordem, em memória até `max_bytes`"""
+
+    def __init__(self, workdir: str, max_bytes: int, name: str = 'spool'):
+        self.path = os.path.join(workdir, f'{name}.pkl')
+        self.max_bytes = max_bytes
+        self._chunks: List[pd.DataFrame] = []
+        self._bytes = 0
+        self.spilled = False
+
+    def add(self, chunk: pd.DataFrame):
+        if not len(chunk):
+            return
+        if self.spilled:
+            _append(self.path, chunk)
+            return
+
+        self._chunks.append(chunk)
+        self._bytes += frame_bytes(chunk)
+        if self._bytes > self.max_bytes:
+            for buffered in self._chunks:
+                _append(self.path, buffered)
+            self._chunks, self._bytes = [], 0
+            self.spilled = True
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        if self.spilled:
+            yield from _read(self.path)
+        else:
+            yield from self._chunks
+
+
+class SpillableKeySet:
+    """Primeira ocorrência de cada chave em um fluxo de blocos
+
+    `add(keys, seq)` recebe as chaves de um bloco e a posição global (`seq`)
+    de cada linha, em ordem crescente de `seq`. `first_seen()` devolve as
+    posições vencedoras (ordenadas) - a mesma seleção de
+    `drop_duplicates(keep='first')`, inclusive tratando NaN como uma chave.
+
+    Só pares (chave, seq) ficam guardados. Acima de `max_bytes` os pares
+    são distribuídos por hash em partições no disco; como a mesma chave cai
+    sempre na mesma partição, cada partição é resolvida sozinha.
+    """
+
+    def __init__(self, workdir: str, max_bytes: int, partitions: int = KEY_PARTITIONS):
+        self.workdir = workdir
+        self.max_bytes = max_bytes
+        self.partitions = partitions
+        self._pairs: List[pd.DataFrame] = []
+        self._bytes = 0
+        self.spilled = False
+
+    def _partition_path(self, part: int) -> str:
+        return os.path.join(self.workdir, f'keys-{part}.pkl')
+
+    def add(self, keys: pd.Series, seq: np.ndarray):
+        if not len(keys):
+            return
+        pairs = pd.DataFrame({'key': keys.to_numpy(), SEQ: seq})
+        self._pairs.append(pairs)
+        self._bytes += frame_bytes(pairs)
+        if self._bytes > self.max_bytes:
+            self._flush()
+
+    def _flush(self):
+        pairs = pd.concat(self._pairs, ignore_index=True)
+        self._pairs, self._bytes = [], 0
+        self.spilled = True
+
+        parts = self._partition_of(pairs['key'])
+        for part in np.unique(parts):
+            _append(self._partition_path(int(part)), pairs[parts == part])
+
+    def _partition_of(self, keys: pd.Series) -> np.ndarray:
+        # hash() do Python basta: as partições só vivem dentro deste processo.
+        # Ausentes (NaN/None têm hashes diferentes) vão todos para a partição 0
+        values = keys.to_numpy(dtype=object)
+        hashes = np.fromiter(map(hash, values), dtype=np.int64, count=len(values))
+        hashes[pd.isna(values)] = 0
+        return hashes % self.partitions
+
+    @staticmethod
+    def _winners(pairs: pd.DataFrame) -> np.ndarray:
+        return pairs.drop_duplicates(subset=['key'], keep='first')[SEQ].to_numpy()
+
+    def first_seen(self) -> np.ndarray:
+        if not self.spilled:
+            if not self._pairs:
+                return np.zeros(0, dtype=np.int64)
+            return np.sort(self._winners(pd.concat(self._pairs, ignore_index=True)))
+
+        if self._pairs:
+            self._flush()
+        winners = []
+        for part in range(self.partitions):
+            path = self._partition_path(part)
+            if os.path.exists(path):
+                winners.append(self._winners(pd.concat(_read(path), ignore_index=True)))
+                os.unlink(path)
+        return np.sort(np.concatenate(winners)) if winners else np.zeros(0, dtype=np.int64)
+
+
+class ExternalSorter:
+    """Ordenação estável por uma coluna, com runs em disco acima de `max_bytes`
+
+    Blocos chegam em ordem de `SEQ`; cada run é ordenada por (valor, SEQ) com
+    nulos no fim, como `sort_values(kind='stable')`. O merge k-way lê um
+    bloco de `block_rows` linhas por run por vez e intercala blocos inteiros
+    (vetorizado), não linha a linha.
+    """
+
+    def __init__(self, workdir: str, column: str, max_bytes: int, block_rows: int):
+        self.workdir = workdir
+        self.column = column
+        self.max_bytes = max_bytes
+        self.block_rows = block_rows
+        self._buffer: List[pd.DataFrame] = []
+        self._bytes = 0
+        self._runs: List[str] = []
+        self._columns = None
+
+    def add(self, chunk: pd.DataFrame):
+        if not len(chunk):
+            return
+        self._buffer.append(chunk)
+        self._bytes += frame_bytes(chunk)
+        if self._bytes > self.max_bytes:
+            self._write_run()
+
+    def _sorted_buffer(self) -> Optional[pd.DataFrame]:
+        if not self._buffer:
+            return None
+        run = pd.concat(self._buffer)
+        self._buffer, self._bytes = [], 0
+        return run.sort_values(self.column, kind='stable', na_position='last')
+
+    def _write_run(self):
+        run = self._sorted_buffer()
+        path = os.path.join(self.workdir, f'run-{len(self._runs)}.pkl')
+        self._columns = run.columns
+        for start in range(0, len(run), self.block_rows):
+            _append(path, run.iloc[start:start + self.block_rows])
+        self._runs.append(path)
+
+    def _bound(self, block: pd.DataFrame) -> tuple:
+        """Chave de ordenação da última linha do bloco"""
+        value = block[self.column].iloc[-1]
+        missing = bool(pd.isna(value))
+        return missing, '' if missing else value, int(block[SEQ].iloc[-1])
+
+    def _count_until(self, block: pd.DataFrame, bound: tuple) -> int:
+        """Quantas linhas do início do bloco (ordenado) vêm até `bound`"""
+        bound_missing, bound_value, bound_seq = bound
+        values = block[self.column]
+        missing = values.isna().to_numpy()
+        seq_ok = block[SEQ].to_numpy() <= bound_seq
+        if bound_missing:
+            until = ~missing | seq_ok
+        else:
+            before = (values < bound_value).to_numpy(dtype=bool)
+            tied = (values == bound_value).to_numpy(dtype=bool)
+            until = ~missing & (before | (tied & seq_ok))
+        return int(until.sum())
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        """Blocos já ordenados"""
+        if not self._runs:
+            run = self._sorted_buffer()
+            if run is not None:
+                yield run
+            return
+
+        if self._buffer:
+            self._write_run()
+
+        # Merge por blocos: tudo que vem até o menor "último valor" entre os
+        # blocos atuais já pode sair (o bloco dono desse limite se esgota)
+        readers = [_read(path) for path in self._runs]
+        heads = [next(reader, None) for reader in readers]
+        while any(head is not None for head in heads):
+            active = [i for i, head in enumerate(heads) if head is not None]
+            limit = min(self._bound(heads[i]) for i in active)
+
+            taken = []
+            for i in active:
+                count = self._count_until(heads[i], limit)
+                if count:
+                    taken.append(heads[i].iloc[:count])
+                    heads[i] = heads[i].iloc[count:]
+                if not len(heads[i]):
+                    heads[i] = next(readers[i], None)
+
+            merged = pd.concat(taken)
+            yield merged.sort_values([self.column, SEQ], kind='stable', na_position='last')
@@ -0,0 +1,380 @@
+"""
+Exportação dividida em N partes ("baixar dividido em N") num ZIP em streaming
+
+Antes a divisão era toda no navegador: `MultiPartDownload.jsx` fatiava os
+registros e chamava `XLSX.writeFile` N vezes na thread da interface (e o
+ChatCommand montava um ZIP de CSVs com JSZip do mesmo jeito, e o "dividir
+em 49" do MULTIONE baixava um CSV por vez); uma planilha de 500 mil linhas
+em 49 partes travava a aba.
+
+Agora o servidor:
+
+- divide as linhas em N faixas equilibradas (tamanhos diferem em no
+  máximo 1 linha, sem partes vazias no fim) ou em faixas de um número fixo
+  de linhas (`split_rows`, ex.: 49 contatos por arquivo no MULTIONE)
+- opcionalmente com uma linha vazia logo abaixo do cabeçalho em cada parte
+  (formato de importação do MULTIONE)
+- grava cada parte num arquivo temporário com escritores de memória
+  constante: o XLSX é montado aqui (o XML da planilha vai direto para o
+  zip em blocos de SPLIT_CHUNK_ROWS linhas, células codificadas coluna a
+  coluna, strings inline sem tabela compartilhada); o CSV sai em blocos
+  pelo `to_csv`
+- gera as partes em paralelo no pool de processos
+  (`parallel_executor.map_ranges`) a partir de SPLIT_PARALLEL_MIN_ROWS
+  linhas
+- passa cada parte para o ZIP da resposta assim que fica pronta, na
+  ordem, sem montar o ZIP inteiro em memória nem em disco
+"""
+import io
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from datetime import date, datetime
+from typing import Any, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import SPLIT_CHUNK_ROWS, SPLIT_PARALLEL_MIN_ROWS, SPLIT_EXPORT_DIR
+from app.services.parallel import parallel_executor
+
+FORMATS = ('xlsx', 'csv')
+EXCEL_MAX_ROWS = 1048576            # linhas por planilha no Excel (com o cabeçalho)
+COPY_BLOCK = 1024 * 1024            # bytes por bloco ao passar uma parte para o ZIP
+XLSX_COMPRESSLEVEL = 1              # deflate rápido: o XML é muito repetitivo
+
+XML = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+RELS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+DOC_RELS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+OFFICE = 'application/vnd.openxmlformats-officedocument.spreadsheetml'
+
+PACKAGE = {
+    '[Content_Types].xml': (
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        f'<Override PartName="/xl/workbook.xml" ContentType="{OFFICE}.sheet.main+xml"/>'
+        f'<Override PartName="/xl/worksheets/sheet1.xml" ContentType="{OFFICE}.worksheet+xml"/>'
+        f'<Override PartName="/xl/styles.xml" ContentType="{OFFICE}.styles+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        f'<Relationships xmlns="{RELS}">'
+        f'<Relationship Id="rId1" Type="{DOC_RELS}/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        f'<workbook xmlns="{MAIN}" xmlns:r="{DOC_RELS}">'
+        '<sheets><sheet name="Dados" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        f'<Relationships xmlns="{RELS}">'
+        f'<Relationship Id="rId1" Type="{DOC_RELS}/worksheet" Target="worksheets/sheet1.xml"/>'
+        f'<Relationship Id="rId2" Type="{DOC_RELS}/styles" Target="styles.xml"/>'
+        '</Relationships>'
+    ),
+    # Estilos: 0 = padrão, 1 = data e hora (formato 22), 2 = só data (formato 14)
+    'xl/styles.xml': (
+        f'<styleSheet xmlns="{MAIN}">'
+        '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="3"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="22" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'
+    ),
+}
+SHEET = 'xl/worksheets/sheet1.xml'
+SHEET_HEAD = f'<worksheet xmlns="{MAIN}"><sheetData>'
+SHEET_TAIL = '</sheetData></worksheet>'
+
+# Células sem o atributo `r`: a posição é a ordem dentro da linha, então
+# ausentes viram `<c/>` para não deslocar as seguintes
+EMPTY = '<c/>'
+BOOLS = ('<c t="b"><v>0</v></c>', '<c t="b"><v>1</v></c>')
+TEXT_OPEN = '<c t="inlineStr"><is><t xml:space="preserve">'
+TEXT_CLOSE = '</t></is></c>'
+DATETIME_STYLE, DATE_STYLE = 1, 2
+
+# Caracteres que o XML 1.0 não aceita (o \x00 fica de fora: é o separador
+# da codificação em bloco de `_text_cells`)
+CONTROL = re.compile('[\x01-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff\ud800-\udfff]')
+SEPARATOR = '\x00'
+
+EXCEL_EPOCH = datetime(1899, 12, 30)
+NP_EXCEL_EPOCH = np.datetime64('1899-12-30')
+ONE_DAY = np.timedelta64(1, 'D')
+
+
+def _escape(text: str) -> str:
+    text = CONTROL.sub('', text.replace(SEPARATOR, ''))
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def _text_cell(text: str) -> str:
+    return TEXT_OPEN + _escape(text) + TEXT_CLOSE
+
+
+def _text_cells(texts: List[str]) -> List[str]:
+    """Células de texto; o escape roda uma vez sobre a coluna inteira"""
+    if not texts:
+        return []
+    joined = SEPARATOR.join(texts)
+    if joined.count(SEPARATOR) != len(texts) - 1:
+        return [_text_cell(t) for t in texts]
+    joined = CONTROL.sub('', joined).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    return [TEXT_OPEN + t + TEXT_CLOSE for t in joined.split(SEPARATOR)]
+
+
+def _number_texts(values: np.ndarray) -> List[str]:
+    """Números finitos como no XML do Excel: inteiros sem '.0', o resto em repr"""
+    texts = np.array(list(map(float.__repr__, values.tolist())), dtype=object)
+    integral = (values == np.trunc(values)) & (np.abs(values) < 1e15)
+    if integral.any():
+        texts[integral] = list(map(str, values[integral].astype(np.int64).tolist()))
+    return texts.tolist()
+
+
+def _number_cells(values: np.ndarray, style: int = 0) -> List[str]:
+    open_ = f'<c s="{style}"><v>' if style else '<c><v>'
+    mask = ~np.isfinite(values)
+    if not mask.any():
+        return [open_ + t + '</v></c>' for t in _number_texts(values)]
+    cells = np.full(len(values), EMPTY, dtype=object)
+    cells[~mask] = [open_ + t + '</v></c>' for t in _number_texts(values[~mask])]
+    return cells.tolist()
+
+
+def _serial(value: Any) -> float:
+    """Data/hora como número de série do Excel (dias desde 30/12/1899)"""
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    return (value.replace(tzinfo=None) - EXCEL_EPOCH).total_seconds() / 86400
+
+
+def _cell(value: Any) -> str:
+    """Fallback para colunas object com tipos misturados"""
+    if isinstance(value, np.datetime64):
+        value = pd.Timestamp(value)
+    elif isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, str):
+        return _text_cell(value)
+    if isinstance(value, bool):
+        return BOOLS[value]
+    if isinstance(value, int):
+        return '<c><v>' + str(value) + '</v></c>'
+    if isinstance(value, float):
+        return _number_cells(np.array([value]))[0]
+    if isinstance(value, (datetime, date)):
+        style = DATETIME_STYLE if isinstance(value, datetime) else DATE_STYLE
+        return _number_cells(np.array([_serial(value)]), style)[0]
+    return _text_cell(str(value))
+
+
+def _datetimes(series: pd.Series) -> pd.Series:
+    if isinstance(series.dtype, pd.DatetimeTZDtype):
+        return series.dt.tz_localize(None)
+    return series
+
+
+def date_only_columns(df: pd.DataFrame) -> List[int]:
+    """Posições das colunas de data/hora sem hora em nenhuma linha (formato só data)"""
+    positions = []
+    for i in range(len(df.columns)):
+        series = _datetimes(df.iloc[:, i])
+        if series.dtype.kind == 'M':
+            values = series.dropna().to_numpy()
+            if (values == values.astype('datetime64[D]')).all():
+                positions.append(i)
+    return positions
+
+
+def _column_cells(series: pd.Series, date_only: bool = False) -> List[str]:
+    """Células XML de uma coluna (`<c/>` nos ausentes)"""
+    series = _datetimes(series)
+    dtype = series.dtype
+    kind = dtype.kind if isinstance(dtype, np.dtype) else None
+
+    if kind == 'b':
+        return np.where(series.to_numpy(), BOOLS[1], BOOLS[0]).tolist()
+
+    if kind in ('i', 'u'):
+        return ['<c><v>' + t + '</v></c>' for t in map(str, series.to_numpy().tolist())]
+
+    if kind == 'f':
+        return _number_cells(series.to_numpy().astype(np.float64))
+
+    if kind == 'M':
+        values = series.to_numpy()
+        mask = np.isnat(values)
+        serial = (values - NP_EXCEL_EPOCH) / ONE_DAY
+        serial[mask] = np.nan
+        return _number_cells(serial, DATE_STYLE if date_only else DATETIME_STYLE)
+
+    # object, string, extensões (Int64, boolean, category...)
+    values = series.to_numpy(dtype=object)
+    mask = pd.isna(values)
+    present = values[~mask] if mask.any() else values
+
+    if pd.api.types.infer_dtype(present, skipna=False) == 'string':
+        encoded = _text_cells(present.tolist())
+    else:
+        encoded = [_cell(v) for v in present]
+
+    if present is values:
+        return encoded
+    cells = np.full(len(values), EMPTY, dtype=object)
+    cells[~mask] = encoded
+    return cells.tolist()
+
+
+def _sheet_rows(df: pd.DataFrame, first_row: int, date_only: List[int]) -> str:
+    template = '<row r="%d">' + '%s' * len(df.columns) + '</row>'
+    columns = [_column_cells(df.iloc[:, i], i in date_only) for i in range(len(df.columns))]
+    return ''.join(template % row for row in zip(range(first_row, first_row + len(df)), *columns))
+
+
+def write_xlsx(df: pd.DataFrame, path: str, chunk_rows: int = SPLIT_CHUNK_ROWS,
+               date_only: Optional[List[int]] = None, blank_row: bool = False):
+    """XLSX de uma aba ("Dados") com cabeçalho; memória de um bloco de linhas
+
+    `date_only`: colunas de data sem hora (padrão: calculado sobre `df`;
+    na exportação dividida vem da planilha inteira, igual em todas as partes).
+    `blank_row`: uma linha vazia entre o cabeçalho e os dados.
+    """
+    if date_only is None:
+        date_only = date_only_columns(df)
+    # ZIP64 só quando o XML pode passar de 4 GB (Excel antigo estranha o extra)
+    large = len(df) * max(len(df.columns), 1) * 256 >= zipfile.ZIP64_LIMIT
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED, compresslevel=XLSX_COMPRESSLEVEL) as book:
+        for name, content in PACKAGE.items():
+            book.writestr(name, XML + content)
+        with book.open(SHEET, 'w', force_zip64=large) as sheet:
+            header = ''.join(_text_cell(str(col)) for col in df.columns)
+            sheet.write((XML + SHEET_HEAD + '<row r="1">' + header + '</row>').encode('utf-8'))
+            first = 2
+            if blank_row:
+                sheet.write(b'<row r="2"/>')
+                first = 3
+            for start in range(0, len(df), chunk_rows):
+                rows = _sheet_rows(df.iloc[start:start + chunk_rows], start + first, date_only)
+                sheet.write(rows.encode('utf-8'))
+            sheet.write(SHEET_TAIL.encode('utf-8'))
+
+
+def write_csv(df: pd.DataFrame, path: str, chunk_rows: int = SPLIT_CHUNK_ROWS,
+              blank_row: bool = False):
+    """CSV em UTF-8 com BOM (o Excel reconhece os acentos); memória de um bloco"""
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        df.iloc[:0].to_csv(f, index=False)
+        if blank_row:
+            f.write(',' * max(len(df.columns) - 1, 0) + '\n')
+        for start in range(0, len(df), chunk_rows):
+            df.iloc[start:start + chunk_rows].to_csv(f, index=False, header=False)
+
+
+def write_part(df: pd.DataFrame, path: str, fmt: str, chunk_rows: int = SPLIT_CHUNK_ROWS,
+               date_only: Optional[List[int]] = None, blank_row: bool = False) -> str:
+    """Grava uma parte (roda no worker do pool ou no processo principal)"""
+    if fmt == 'xlsx':
+        write_xlsx(df, path, chunk_rows, date_only, blank_row)
+    else:
+        write_csv(df, path, chunk_rows, blank_row)
+    return path
+
+
+def split_bounds(total: int, parts: int) -> List[Tuple[int, int]]:
+    """Faixas `(início, fim)` equilibradas; no máximo uma parte por linha"""
+    parts = max(1, min(parts, total))
+    size, extra = divmod(total, parts)
+    bounds, start = [], 0
+    for i in range(parts):
+        stop = start + size + (i < extra)
+        bounds.append((start, stop))
+        start = stop
+    return bounds
+
+
+def split_rows(total: int, rows: int) -> List[Tuple[int, int]]:
+    """Faixas `(início, fim)` de `rows` linhas (a última com o resto)"""
+    rows = max(1, rows)
+    return [(start, min(start + rows, total)) for start in range(0, max(total, 1), rows)]
+
+
+def part_filename(name: str, index: int, parts: int, fmt: str) -> str:
+    return f'{name}_parte_{index + 1}_de_{parts}.{fmt}'
+
+
+class _ZipSink(io.RawIOBase):
+    """Destino sem seek para o zipfile: cada membro leva descritor de dados
+    e os bytes escritos saem em `drain()`"""
+
+    def __init__(self):
+        super().__init__()
+        self._buffer = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer += data
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def _export_dir() -> str:
+    if SPLIT_EXPORT_DIR:
+        os.makedirs(SPLIT_EXPORT_DIR, exist_ok=True)
+        return SPLIT_EXPORT_DIR
+    return tempfile.gettempdir()
+
+
+def iter_split_zip(df: pd.DataFrame, bounds: List[Tuple[int, int]], fmt: str = 'xlsx',
+                   name: str = 'planilha', chunk_rows: int = SPLIT_CHUNK_ROWS,
+                   blank_row: bool = False) -> Iterator[bytes]:
+    """Bytes do ZIP com uma parte por faixa de `bounds`, à medida que ficam prontas
+
+    As partes XLSX já são zip (deflate) e entram sem nova compressão; as
+    CSV são comprimidas aqui. `blank_row`: linha vazia abaixo do cabeçalho.
+    """
+    date_only = date_only_columns(df) if fmt == 'xlsx' else None
+    directory = tempfile.mkdtemp(prefix='split-', dir=_export_dir())
+    tasks = [(start, stop, (os.path.join(directory, f'{i}.{fmt}'), fmt, chunk_rows, date_only, blank_row))
+             for i, (start, stop) in enumerate(bounds)]
+    paths = parallel_executor.map_ranges(df, write_part, tasks, min_rows=SPLIT_PARALLEL_MIN_ROWS)
+    sink = _ZipSink()
+    compression = zipfile.ZIP_STORED if fmt == 'xlsx' else zipfile.ZIP_DEFLATED
+    try:
+        with zipfile.ZipFile(sink, 'w', compression) as archive:
+            for i, path in enumerate(paths):
+                large = os.path.getsize(path) >= zipfile.ZIP64_LIMIT
+                with open(path, 'rb') as part, \
+                        archive.open(part_filename(name, i, len(bounds), fmt), 'w', force_zip64=large) as member:
+                    while True:
+                        block = part.read(COPY_BLOCK)
+                        if not block:
+                            break
+                        member.write(block)
+                        data = sink.drain()
+                        if data:
+                            yield data
+                os.unlink(path)
+        # Resto do último membro + diretório central
+        yield sink.drain()
+    finally:
+        # Cliente desconectou ou erro: para o pool e apaga o que sobrou
+        paths.close()
+        shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,33 @@
+"""
+Normalização de texto dos comandos + métricas do cache de intenção
+
+Os três motores (`SpreadsheetAI`, `AdvancedAI`, `ExcelAssistant`) tinham
+cada um sua cópia da normalização, com um `str.replace` por letra
+acentuada. Aqui é uma tabela só, aplicada com `str.translate` (uma passada
+em C).
+
+O resultado da normalização é a chave dos caches LRU de intenção dos
+motores (`functools.lru_cache`): comandos repetidos ("multione",
+"limpar cnpj", "baixar csv") pulam a cascata de sinônimos / regex.
+"""
+from typing import Any, Callable, Dict
+
+_ACCENTS = str.maketrans('áéíóúâêôãõçü', 'aeiouaeoaocu')
+
+
+def normalize_text(text: str) -> str:
+    """Minúsculas e sem acentos"""
+    return text.lower().translate(_ACCENTS)
+
+
+def cache_metrics(cached: Callable) -> Dict[str, Any]:
+    """Contadores de uma função com `lru_cache` (para o /metrics)"""
+    info = cached.cache_info()
+    total = info.hits + info.misses
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'hit_rate': round(info.hits / total, 4) if total else 0.0,
+        'size': info.currsize,
+        'max_size': info.maxsize,
+    }
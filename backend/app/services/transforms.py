@@ -0,0 +1,88 @@
+"""
+Etapas de transformação independentes por linha
+
+Cada função recebe um pedaço da planilha e devolve o pedaço transformado,
+sem olhar para as outras linhas. Por isso podem rodar em partições no pool
+de processos (`app.services.parallel`); etapas que dependem da planilha
+inteira (duplicatas, ordenação, colunas vazias) ficam nas rotas.
+
+Precisam ser funções de módulo (o worker as importa pelo nome).
+"""
+import re
+
+import pandas as pd
+
+from app.services.columns import column_index
+
+RE_DDD = re.compile(r'\(?(\d{2})\)?')
+
+
+def _text_columns(df: pd.DataFrame) -> list:
+    return [col for col in df.columns if df[col].dtype == 'object']
+
+
+# ==================== COMANDOS (ai_commands) ====================
+
+def upper_text(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy(deep=False)
+    for col in _text_columns(df):
+        df[col] = df[col].str.upper()
+    return df
+
+
+def lower_text(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy(deep=False)
+    for col in _text_columns(df):
+        df[col] = df[col].str.lower()
+    return df
+
+
+def _ddd(phone):
+    if pd.isna(phone):
+        return None
+    match = RE_DDD.search(str(phone))
+    return match.group(1) if match else None
+
+
+def add_ddd(df: pd.DataFrame, phone_col) -> pd.DataFrame:
+    df = df.copy(deep=False)
+    df['DDD'] = df[phone_col].map(_ddd)
+    return df
+
+
+def add_domain(df: pd.DataFrame, email_col) -> pd.DataFrame:
+    df = df.copy(deep=False)
+    df['dominio'] = df[email_col].str.split('@').str[1]
+    return df
+
+
+# ==================== TEMPLATES ====================
+
+def normalize_contact_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """normalize_contacts: e-mails em minúscula sem espaços, nomes em Title Case"""
+    df = df.copy(deep=False)
+    columns = column_index(df.columns)
+    for col in columns.find_all('email'):
+        df[col] = df[col].str.lower().str.strip()
+    for col in columns.role_columns('nome'):
+        df[col] = df[col].str.title()
+    return df
+
+
+def commercial_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """commercial_base: CNPJ só com dígitos, empresas em maiúscula sem espaços"""
+    df = df.copy(deep=False)
+    columns = column_index(df.columns)
+    for col in columns.role_columns('cnpj'):
+        df[col] = df[col].str.replace(r'[^0-9]', '', regex=True)
+    for col in columns.role_columns('empresa'):
+        df[col] = df[col].str.upper().str.strip()
+    return df
+
+
+def strip_special_chars(df: pd.DataFrame) -> pd.DataFrame:
+    """clean_all: mantém só letras ASCII, dígitos, espaços e @._-"""
+    df = df.copy(deep=False)
+    for col in _text_columns(df):
+        df[col] = df[col].str.replace(r'[^a-zA-Z0-9\s@._-]', '', regex=True)
+    return df
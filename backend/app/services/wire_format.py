@@ -0,0 +1,96 @@
+"""
+Formato de transporte das planilhas (JSON ou Arrow IPC)
+
+Clientes que enviam `Content-Type: application/vnd.apache.arrow.stream`
+mandam a planilha como um stream Arrow; os demais campos do payload
+(command, template_id...) vão como JSON no metadado `payload` do schema.
+Com `Accept: application/vnd.apache.arrow.stream` a resposta volta no mesmo
+formato: colunas tipadas uma única vez, nulos no bitmap de validade e
+message/changes/type no metadado `payload`.
+"""
+import json
+from typing import Any, Dict, Optional
+
+import pandas as pd
+from fastapi import HTTPException, Request, Response
+
+from app.services.dataset_store import dataset_response
+from app.services.json_serializer import frame_json_response
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - Arrow é opcional
+    pa = None
+
+ARROW_STREAM = 'application/vnd.apache.arrow.stream'
+
+
+def _require_arrow():
+    if pa is None:
+        raise HTTPException(status_code=415, detail="Formato Arrow indisponível (instale pyarrow)")
+
+
+async def read_payload(request: Request) -> Dict[str, Any]:
+    """Lê o corpo em JSON ou Arrow; em Arrow, `data` vira um DataFrame"""
+    content_type = request.headers.get('content-type', '')
+    if ARROW_STREAM not in content_type:
+        return await request.json()
+
+    _require_arrow()
+    body = await request.body()
+    try:
+        table = pa.ipc.open_stream(body).read_all()
+    except pa.ArrowInvalid as e:
+        raise HTTPException(status_code=400, detail=f"Stream Arrow inválido: {e}")
+
+    metadata = table.schema.metadata or {}
+    payload = json.loads(metadata.get(b'payload', b'{}'))
+    payload['data'] = table.to_pandas()
+    return payload
+
+
+def wants_arrow(request: Request) -> bool:
+    return ARROW_STREAM in request.headers.get('accept', '')
+
+
+def _to_table(df: pd.DataFrame) -> "pa.Table":
+    """DataFrame -> Table; colunas object com tipos misturados viram texto"""
+    arrays = []
+    for col in df.columns:
+        series = df[col]
+        try:
+            arrays.append(pa.array(series, from_pandas=True))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            arrays.append(pa.array(series.astype(str).where(series.notna(), None), from_pandas=True))
+    return pa.Table.from_arrays(arrays, names=[str(c) for c in df.columns])
+
+
+def arrow_response(df: pd.DataFrame, body: Dict[str, Any]) -> Response:
+    table = _to_table(df)
+    table = table.replace_schema_metadata({
+        'payload': json.dumps(body, ensure_ascii=False, default=str)
+    })
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return Response(content=sink.getvalue().to_pybytes(), media_type=ARROW_STREAM)
+
+
+def respond_frame(request: Request, df: pd.DataFrame, parent_id: Optional[str],
+                  body: Dict[str, Any]):
+    """Resposta de um comando que produz planilha
+
+    - com dataset_id: registra nova versão (só ID + preview em JSON)
+    - com Accept Arrow: stream Arrow
+    - senão: JSON com `data` em lista de registros (serializador colunar,
+      em streaming para planilhas grandes)
+    """
+    if parent_id:
+        return dataset_response(df, parent_id, body)
+
+    if wants_arrow(request):
+        _require_arrow()
+        return arrow_response(df, body)
+
+    return frame_json_response(body, df)
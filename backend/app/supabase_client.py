@@ -1,21 +1,45 @@
 """
 Cliente Supabase - Conexão com banco de dados
+
+Acesso assíncrono ao PostgREST do Supabase por um pool HTTP com keep-alive
+(`app.db.RestSupabase`): as rotas fazem `await ...execute()` e não travam o
+event loop. Com `SUPABASE_URL=memory://` o backend usa o stand-in em
+memória (`app.db.MemorySupabase`), sem banco.
 """
-from supabase import create_client, Client
 from dotenv import load_dotenv
 import os
 
+from app.core.config import SUPABASE_TIMEOUT, SUPABASE_MAX_CONNECTIONS
+from app.db import AsyncSupabase, MemorySupabase, RestSupabase
+
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError("❌ Configure SUPABASE_URL e SUPABASE_KEY no .env")
+MEMORY_URL = "memory://"
+
+_client = None
+
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+def get_supabase() -> AsyncSupabase:
+    """Cliente do processo (criado na primeira chamada)"""
+    global _client
+    if _client is None:
+        if SUPABASE_URL == MEMORY_URL:
+            _client = MemorySupabase()
+            print("🧪 Supabase em memória (stand-in local)")
+        else:
+            if not SUPABASE_URL or not SUPABASE_KEY:
+                raise ValueError("❌ Configure SUPABASE_URL e SUPABASE_KEY no .env")
+            _client = RestSupabase(SUPABASE_URL, SUPABASE_KEY, SUPABASE_TIMEOUT, SUPABASE_MAX_CONNECTIONS)
+            print(f"✅ Conectado ao Supabase: {SUPABASE_URL}")
+    return _client
 
-print(f"✅ Conectado ao Supabase: {SUPABASE_URL}")
 
-def get_supabase() -> Client:
-    return supabase
+async def close_supabase():
+    """Fecha o pool de conexões (shutdown do servidor)"""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
@@ -0,0 +1,83 @@
+"""
+Benchmark: coluna citada no comando / coluna por papel (varredura x índice)
+
+Planilha larga (colunas no estilo export do Google Contacts / CRM, N
+colunas) e comandos do chat:
+
+- antes: `col.lower() in comando` para cada coluna (primeira na ordem da
+  planilha) e `'email' in col.lower()` por palavra-chave
+- depois: `ColumnIndex` (Aho-Corasick sobre os nomes normalizados, menção
+  mais longa no início de palavra; listas por papel), montado uma vez
+
+Mostra o tempo de montagem do índice, o custo por comando e, numa planilha
+pequena, os comandos em que a coluna escolhida muda (o caminho antigo pega
+"Idade" em "filtrar por cidade" e "Nome" em "renomear coluna").
+
+Uso (na pasta backend):
+    python benchmarks/bench_columns.py [colunas]
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.services.columns import ColumnIndex
+from app.services.text import normalize_text
+
+BASE = ['First Name', 'Middle Name', 'Last Name', 'Phonetic First Name', 'Nickname', 'Organization Name',
+        'E-mail 1 - Value', 'Phone 1 - Value', 'Phone 1 - Label', 'Address 1 - City', 'Notes', 'Birthday']
+PEQUENA = ['Nome', 'Nome Empresa', 'Email', 'Telefone', 'CNPJ', 'Valor', 'Preço', 'Idade', 'Status', 'cidade', 'ID']
+COMANDOS = ['validar email da coluna E-mail 1 - Value', 'ordenar por Last Name z-a', 'filtrar por cidade',
+            'renomear coluna', 'separar nome empresa', 'média da coluna Preço', 'excluir linhas onde preço é zero',
+            'validar cnpj', 'limpar telefone', 'formatar como moeda a coluna Valor', 'multione', 'baixar csv']
+
+
+def colunas(n):
+    return [f'{nome} {i // len(BASE)}' if i >= len(BASE) else nome for i, nome in enumerate(BASE * (n // len(BASE) + 1))][:n]
+
+
+def citada_antes(columns, command):
+    cmd_lower = normalize_text(command)
+    return next((col for col in columns if col.lower() in cmd_lower), None)
+
+
+def papel_antes(columns, *palavras):
+    return next((col for col in columns if any(p in col.lower() for p in palavras)), None)
+
+
+def medir(func, repeticoes=200):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        func()
+    return (time.perf_counter() - inicio) / repeticoes
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1500
+
+    pequena = ColumnIndex(PEQUENA)
+    print("Planilha pequena, coluna citada (antes -> depois):")
+    for command in COMANDOS:
+        antes, depois = citada_antes(PEQUENA, command), pequena.mentioned(command)
+        marca = '  ' if antes == depois else '≠ '
+        print(f"  {marca}{command!r}: {antes} -> {depois}")
+
+    columns = colunas(n)
+    inicio = time.perf_counter()
+    index = ColumnIndex(columns)
+    t_build = time.perf_counter() - inicio
+    for papel, palavras in [('email', ('email', 'mail')), ('telefone', ('telefone', 'phone', 'fone'))]:
+        assert index.role(papel) == papel_antes(columns, *palavras)
+
+    t_antes = medir(lambda: [citada_antes(columns, c) for c in COMANDOS]) / len(COMANDOS)
+    t_depois = medir(lambda: [index.mentioned(c) for c in COMANDOS]) / len(COMANDOS)
+    r_antes = medir(lambda: [papel_antes(columns, 'cnpj'), papel_antes(columns, 'empresa', 'company')])
+    r_depois = medir(lambda: [index.role('cnpj'), index.role('empresa')])
+
+    print(f"\n{n} colunas: índice montado em {t_build * 1000:.1f} ms (uma vez por conjunto de colunas)")
+    print(f"  coluna citada:    antes {t_antes * 1e6:8.1f} µs/comando | depois {t_depois * 1e6:6.1f} µs/comando")
+    print(f"  coluna por papel: antes {r_antes * 1e6:8.1f} µs | depois {r_depois * 1e6:6.1f} µs (2 papéis sem coluna)")
+
+
+if __name__ == '__main__':
+    main()
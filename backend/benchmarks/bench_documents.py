@@ -0,0 +1,134 @@
+"""
+Benchmark: CNPJ/CPF (helpers por linha x módulo vetorizado)
+
+Compara SPLIT_CNPJ + CLEAN_CNPJ + validação por linha com `parse_cnpj`
+(todas as colunas derivadas em uma passada) e confere que os resultados
+são idênticos antes de medir.
+
+Uso (na pasta backend):
+    python benchmarks/bench_documents.py
+"""
+import re
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.services.documents import parse_cnpj, parse_cpf
+
+
+def extract_parts(cnpj):
+    """SPLIT_CNPJ original (por linha)"""
+    nums = re.sub(r'[^0-9]', '', str(cnpj) if pd.notna(cnpj) else '')
+    if len(nums) == 14:
+        return nums[:8], nums[8:12], nums[12:14]
+    return nums or None, None, None
+
+
+def clean_cnpj(cnpj):
+    """CLEAN_CNPJ original (por linha)"""
+    if pd.isna(cnpj): return None
+    nums = re.sub(r'[^0-9]', '', str(cnpj))
+    if len(nums) == 14:
+        return f"{nums[:2]}.{nums[2:5]}.{nums[5:8]}/{nums[8:12]}-{nums[12:14]}"
+    return nums or None
+
+
+PESOS = {14: [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2], 11: list(range(11, 1, -1))}
+
+
+def _dv(corpo: str, pesos: list) -> str:
+    resto = sum(int(d) * p for d, p in zip(corpo, pesos[-len(corpo):])) % 11
+    return '0' if resto < 2 else str(11 - resto)
+
+
+def documento_valido(valor, tamanho: int) -> bool:
+    """Validação módulo 11 clássica, um documento por vez"""
+    nums = re.sub(r'[^0-9]', '', str(valor))
+    if len(nums) != tamanho or len(set(nums)) == 1:
+        return False
+    corpo = nums[:-2]
+    primeiro = _dv(corpo, PESOS[tamanho])
+    return nums[-2:] == primeiro + _dv(corpo + primeiro, PESOS[tamanho])
+
+
+def gerar_cnpjs(n: int, seed: int = 42) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    corpo = rng.integers(0, 10, (n, 12))
+    pesos = np.array([6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+    dv1 = (corpo @ pesos[1:]) % 11
+    dv1 = np.where(dv1 < 2, 0, 11 - dv1)
+    dv2 = (np.column_stack([corpo, dv1]) @ pesos) % 11
+    dv2 = np.where(dv2 < 2, 0, 11 - dv2)
+    numeros = np.column_stack([corpo, dv1, dv2])
+    # ~10% com DV errado
+    errado = rng.random(n) < 0.1
+    numeros[errado, 13] = (numeros[errado, 13] + 1) % 10
+    texto = [''.join(map(str, linha)) for linha in numeros.tolist()]
+
+    formatos = rng.integers(0, 5, n).tolist()
+    valores = []
+    for t, f in zip(texto, formatos):
+        if f == 0:
+            valores.append(f"{t[:2]}.{t[2:5]}.{t[5:8]}/{t[8:12]}-{t[12:]}")
+        elif f == 1:
+            valores.append(t)
+        elif f == 2:
+            valores.append(t[:9])
+        elif f == 3:
+            valores.append(None)
+        else:
+            valores.append(f"CNPJ: {t} ✨")
+    return pd.Series(valores, dtype=object)
+
+
+def por_linha(cnpjs: pd.Series) -> pd.DataFrame:
+    partes = cnpjs.apply(extract_parts)
+    return pd.DataFrame({
+        'base': partes.str[0],
+        'branch': partes.str[1],
+        'check_digits': partes.str[2],
+        'formatted': cnpjs.apply(clean_cnpj),
+        'valid': cnpjs.apply(documento_valido, tamanho=14),
+    })
+
+
+def como_lista(valores: pd.Series) -> list:
+    return [None if pd.isna(v) else v for v in valores]
+
+
+def medir(func, *args, repeticoes: int = 3) -> float:
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        func(*args)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main():
+    campos = ('base', 'branch', 'check_digits', 'formatted', 'valid')
+
+    cpfs = pd.Series(['529.982.247-25', '52998224726', '111.111.111-11', None, '123'])
+    assert parse_cpf(cpfs)['valid'].tolist() == [documento_valido(v, 11) for v in cpfs]
+
+    for n in (100_000, 1_000_000):
+        cnpjs = gerar_cnpjs(n)
+
+        esperado = por_linha(cnpjs)
+        obtido = parse_cnpj(cnpjs, campos)
+        for campo in campos:
+            assert como_lista(esperado[campo]) == como_lista(obtido[campo]), f"'{campo}' diferente"
+
+        t_linha = medir(por_linha, cnpjs, repeticoes=1)
+        t_vetor = medir(parse_cnpj, cnpjs, campos)
+        t_validar = medir(parse_cnpj, cnpjs, ('valid',))
+        print(f"{n:>9} CNPJs | por linha: {t_linha:7.3f}s | vetorizado: {t_vetor:7.3f}s "
+              f"| {t_linha / t_vetor:5.1f}x | só validação: {t_validar:6.3f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark: busca de funções do ExcelAssistant (varredura do índice x BM25)
+
+- antes: lógica original de `search_function` (para cada chave do índice,
+  normaliza a chave e testa substring nos dois sentidos; os 5 primeiros na
+  ordem do dict, sem score)
+- depois: `Bm25Index` (postings com peso BM25 pré-calculado, termos da
+  consulta tokenizados, resultados ordenados por score)
+
+Mostra os resultados das duas versões para perguntas típicas do chat e o
+tempo por consulta com a base real e com uma base sintética de milhares de
+funções (mesmas perguntas).
+
+Uso (na pasta backend):
+    python benchmarks/bench_excel_search.py [funcoes_sinteticas]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.excel_assistant import ExcelAssistant
+from app.services.search import Bm25Index, tokenize
+from app.services.text import normalize_text
+
+PERGUNTAS = ['Como fazer soma no Excel?', 'como juntar nome e sobrenome', 'função SE', 'procv',
+             'extrair domínio do email', 'qual a média da coluna', 'data de hoje', 'contar valores se',
+             'como calcular a idade', 'formatar cnpj', 'primeiro nome', 'o que é concatenar?']
+
+
+def indice_antigo(knowledge):
+    index = {}
+    for categoria, funcoes in knowledge.items():
+        if categoria == 'dicas_avancadas':
+            continue
+        for func_name, func_data in funcoes.items():
+            index.setdefault(func_name.lower(), []).append((categoria, func_name))
+            for palavra in func_data.get('pt', []):
+                index.setdefault(palavra.lower(), []).append((categoria, func_name))
+    return index
+
+
+def buscar_antes(index, query):
+    query_normalized = normalize_text(query)
+    found = []
+    for keyword, functions in index.items():
+        keyword_norm = normalize_text(keyword)
+        if keyword_norm in query_normalized or query_normalized in keyword_norm:
+            found.extend(func_name for _, func_name in functions)
+    return list(dict.fromkeys(found))[:5]
+
+
+def base_sintetica(knowledge, n):
+    """Base real + n funções inventadas (nomes e palavras-chave aleatórios)"""
+    random.seed(9)
+    silabas = ['ca', 'lo', 'ter', 'mi', 'na', 'sol', 'ra', 'ven', 'di', 'po', 'tu', 'mer']
+    palavra = lambda: ''.join(random.choices(silabas, k=random.randint(2, 4)))
+    extra = {f'FUNC{i}': {'descricao': '', 'pt': [f'{palavra()} {palavra()}' for _ in range(4)]} for i in range(n)}
+    return dict(knowledge, funcoes_extras=extra)
+
+
+def medir(func, repeticoes=200):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for q in PERGUNTAS:
+            func(q)
+    return (time.perf_counter() - inicio) / repeticoes / len(PERGUNTAS)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    assistant = ExcelAssistant()
+    antigo = indice_antigo(assistant.knowledge)
+
+    for q in PERGUNTAS:
+        depois = [r['funcao'] for r in assistant.search_function(q)]
+        print(f"{q!r}\n    antes:  {buscar_antes(antigo, q)}\n    depois: {depois}")
+
+    t_antes = medir(lambda q: buscar_antes(antigo, q))
+    t_depois = medir(assistant.search_function)
+    print(f"\nbase real ({len(assistant.functions)} funções): "
+          f"antes {t_antes * 1e6:7.1f} µs/consulta | depois {t_depois * 1e6:6.1f} µs/consulta")
+
+    grande = base_sintetica(assistant.knowledge, n)
+    antigo = indice_antigo(grande)
+    funcoes = [(c, f) for c, fs in grande.items() if c != 'dicas_avancadas' for f in fs]
+    inicio = time.perf_counter()
+    index = Bm25Index([tokenize(f) + [t for p in grande[c][f].get('pt', []) for t in tokenize(p)] for c, f in funcoes],
+                      [f for _, f in funcoes])
+    t_build = time.perf_counter() - inicio
+    t_antes = medir(lambda q: buscar_antes(antigo, q), 5)
+    t_depois = medir(index.search)
+    print(f"base sintética ({len(funcoes)} funções, índice em {t_build * 1000:.0f} ms): "
+          f"antes {t_antes * 1e6:7.1f} µs/consulta | depois {t_depois * 1e6:6.1f} µs/consulta")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""
+Benchmark: coluna calculada por fórmula (célula a célula x vetorizada)
+
+Avalia os modelos de `ExcelAssistant.suggest_formula` (domínio do email,
+DDD, primeiro nome) e uma fórmula com SE / CONCATENAR / aritmética sobre
+uma planilha sintética:
+
+- antes: interpretador do AST linha a linha (o que um laço com
+  `df.apply` faria), com a semântica do Excel em Python puro
+- depois: `formula_engine.evaluate`, que compila o AST em operações
+  sobre colunas inteiras
+
+Confere que as duas colunas são iguais (erro do Excel = vazio).
+
+Uso (na pasta backend):
+    python benchmarks/bench_formula_engine.py [linhas]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.excel_assistant import excel_assistant
+from app.services.formula_engine import bind_template, compile_formula
+from app.services.formulas import Binary, Call, Column, Number, Text, function_key, parse
+
+
+class Erro(Exception):
+    pass
+
+
+def _texto(v):
+    if isinstance(v, bool):
+        return 'VERDADEIRO' if v else 'FALSO'
+    if isinstance(v, float):
+        return '%.15g' % v
+    return v
+
+
+def _numero(v):
+    if isinstance(v, (bool, int, float)):
+        return float(v)
+    try:
+        return float(v.strip().replace(',', '.'))
+    except ValueError:
+        raise Erro()
+
+
+def _inteiro(v):
+    return int(_numero(v))
+
+
+def _localizar(achar, texto, inicio=1.0):
+    inicio = _inteiro(inicio)
+    if inicio < 1:
+        raise Erro()
+    pos = _texto(texto).lower().find(_texto(achar).lower(), inicio - 1)
+    if pos < 0:
+        raise Erro()
+    return float(pos + 1)
+
+
+def _esquerda(texto, n=1.0):
+    n = _inteiro(n)
+    if n < 0:
+        raise Erro()
+    return _texto(texto)[:n]
+
+
+def _direita(texto, n=1.0):
+    n = _inteiro(n)
+    if n < 0:
+        raise Erro()
+    texto = _texto(texto)
+    return texto[max(len(texto) - n, 0):]
+
+
+def _ext_texto(texto, inicio, n):
+    inicio, n = _inteiro(inicio), _inteiro(n)
+    if inicio < 1 or n < 0:
+        raise Erro()
+    return _texto(texto)[inicio - 1:inicio - 1 + n]
+
+
+FUNCOES = {
+    'LOCALIZAR': _localizar, 'ESQUERDA': _esquerda, 'DIREITA': _direita, 'EXT.TEXTO': _ext_texto,
+    'NUM.CARACT': lambda t: float(len(_texto(t))),
+    'CONCATENAR': lambda *partes: ''.join(_texto(p) for p in partes),
+}
+
+
+def avaliar_celula(no, linha):
+    """Interpretador do AST para uma linha (o jeito célula a célula)"""
+    if isinstance(no, (Number, Text)):
+        return no.value
+    if isinstance(no, Column):
+        valor = linha[no.name]
+        if valor is None or (isinstance(valor, float) and valor != valor):
+            if isinstance(valor, float):
+                raise Erro()
+            return ''
+        return valor
+    if isinstance(no, Call):
+        args = [avaliar_celula(arg, linha) for arg in no.args]
+        if function_key(no.name) == 'SE':
+            return args[1] if args[0] else (args[2] if len(args) > 2 else False)
+        return FUNCOES[function_key(no.name)](*args)
+    if isinstance(no, Binary):
+        a, b = avaliar_celula(no.left, linha), avaliar_celula(no.right, linha)
+        if no.op == '&':
+            return _texto(a) + _texto(b)
+        if no.op == '>':
+            return _numero(a) > _numero(b)
+        a, b = _numero(a), _numero(b)
+        if no.op == '/' and b == 0:
+            raise Erro()
+        return {'+': a + b, '-': a - b, '*': a * b, '/': a / b if b else 0.0}[no.op]
+    raise NotImplementedError(type(no).__name__)
+
+
+def antes(df, formula):
+    ast = parse(formula)
+    resultado = []
+    for linha in df.to_dict('records'):
+        try:
+            resultado.append(avaliar_celula(ast, linha))
+        except Erro:
+            resultado.append(None)
+    return resultado
+
+
+def depois(df, formula):
+    return compile_formula(formula)(df).tolist()
+
+
+def planilha(n):
+    random.seed(23)
+    nomes = ['Ana', 'Bruno', 'Carla', 'Davi', 'Érica', 'Fábio']
+    dominios = ['gmail.com', 'empresa.com.br', 'uol.com.br']
+    linhas = []
+    for i in range(n):
+        nome = f"{random.choice(nomes)} {random.choice(nomes)}son" if random.random() < 0.8 else random.choice(nomes)
+        email = f"{nome.split()[0].lower()}{i}@{random.choice(dominios)}" if random.random() < 0.9 else 'sem email'
+        ddd = random.randint(11, 99)
+        telefone = f"({ddd}) 9{random.randint(1000, 9999)}-{random.randint(1000, 9999)}" if random.random() < 0.85 else None
+        linhas.append({'Nome': nome, 'Email': email, 'Telefone': telefone,
+                       'Valor': round(random.uniform(0, 5000), 2) if random.random() < 0.95 else None})
+    return pd.DataFrame(linhas)
+
+
+def formulas():
+    colunas = {'dominio': 'Email', 'ddd': 'Telefone', 'primeiro nome': 'Nome'}
+    for pedido, coluna in colunas.items():
+        sugestao = excel_assistant.suggest_formula(pedido, [coluna])
+        yield pedido, bind_template(sugestao['formula_template'], sugestao['coluna_sugerida'])
+    yield 'SE + CONCATENAR', '=SE([Valor] > 1000; CONCATENAR(ESQUERDA([Nome]; 3); " - "; [Valor] * 2); "baixo")'
+
+
+def igual(a, b):
+    vazio = lambda v: v is None or (isinstance(v, float) and v != v)
+    return (vazio(a) and vazio(b)) or a == b
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    df = planilha(n)
+    print(f"{n} linhas")
+    for nome, formula in formulas():
+        inicio = time.perf_counter()
+        esperado = antes(df, formula)
+        t_antes = time.perf_counter() - inicio
+
+        compile_formula(formula)   # compilação fica no cache, como no servidor
+        inicio = time.perf_counter()
+        obtido = depois(df, formula)
+        t_depois = time.perf_counter() - inicio
+
+        diferentes = [i for i, (a, b) in enumerate(zip(esperado, obtido)) if not igual(a, b)]
+        assert not diferentes, (nome, diferentes[:5], [(esperado[i], obtido[i]) for i in diferentes[:5]])
+        print(f"  {nome:16s} {formula}")
+        print(f"    célula a célula: {t_antes * 1000:8.1f} ms   vetorizada: {t_depois * 1000:7.1f} ms"
+              f"   ({t_antes / t_depois:.1f}x, {sum(v is None for v in esperado)} erros, iguais)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark: explain_formula (substring por função da base x lexer/parser)
+
+- antes: para cada função da base, `func_name in formula.upper()`
+- depois: `ExcelAssistant.explain_formula` (tokens -> AST em cache -> busca
+  por hash de cada função)
+
+Mostra as funções citadas pelas duas versões em fórmulas com nomes que
+contêm outros (SEERRO, MÉDIASE, CONT.SE) e o tempo por token em fórmulas
+de 250 a 8.000 caracteres (análise a frio e com a fórmula em cache). O
+caminho antigo é só `in` em C sobre 29 funções, mas cresce com
+(funções da base x tamanho da fórmula) e erra.
+
+Uso (na pasta backend):
+    python benchmarks/bench_formulas.py
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.excel_assistant import ExcelAssistant
+from app.services.formulas import functions_used, parse, tokenize
+
+EXEMPLOS = ['=SEERRO(PROCV(A2;Plan1!$A$1:$C$10;2;FALSO);"")', '=MÉDIASE(B:B;">5")',
+            '=CONT.SE(A:A;"x")+CONT.VALORES(B:B)', '=PRI.MAIÚSCULA(A2)', '=SOMA(A1:A10)/CONT.NÚM(A1:A10)',
+            '=DIREITA(A2; NÚM.CARACT(A2) - LOCALIZAR("@"; A2))']
+
+
+def explicar_antes(assistant, formula):
+    formula_upper = formula.upper()
+    return [func_name for categoria, funcoes in assistant.knowledge.items() if categoria != 'dicas_avancadas'
+            for func_name in funcoes if func_name in formula_upper]
+
+
+def explicar_depois(assistant, formula):
+    return [linha[2:].split(':')[0] for linha in assistant.explain_formula(formula).splitlines()[1:]]
+
+
+def formula_grande(tamanho):
+    partes, i = [], 0
+    while len('+'.join(partes)) < tamanho:
+        i += 1
+        partes.append(f'SE(A{i}>0;MÉDIA(B{i}:C{i});SEERRO(PROCV(D{i};Plan2!E:F;2;FALSO);CONCATENAR("x";E{i})))')
+    return '=' + '+'.join(partes)
+
+
+def medir(func, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        func()
+    return (time.perf_counter() - inicio) / repeticoes
+
+
+def main():
+    assistant = ExcelAssistant()
+    for formula in EXEMPLOS:
+        print(f"{formula}\n    antes:  {explicar_antes(assistant, formula)}\n    depois: {explicar_depois(assistant, formula)}")
+
+    print()
+    for tamanho in (250, 2000, 8000):
+        formula = formula_grande(tamanho)
+        tokens = sum(1 for _ in tokenize(formula))
+        t_antes = medir(lambda: explicar_antes(assistant, formula), 50)
+        t_frio = medir(lambda: (parse.cache_clear(), functions_used.cache_clear(), assistant.explain_formula(formula)), 20)
+        t_cache = medir(lambda: assistant.explain_formula(formula), 200)
+        print(f"{len(formula):5} caracteres, {tokens:5} tokens: antes {t_antes * 1e6:7.1f} µs | "
+              f"depois a frio {t_frio * 1e6:8.1f} µs ({t_frio / tokens * 1e6:.2f} µs/token) | "
+              f"em cache {t_cache * 1e6:5.1f} µs")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark: busca de funções com erro de digitação (recall e latência p99)
+
+Corpus de consultas com erro: as palavras-chave de cada função da base
+com 1 ou 2 edições aleatórias (apagar, inserir, trocar, inverter letras
+vizinhas, tirar acento), respeitando o limite por tamanho do termo
+(`allowed_edits`), mais uma lista escrita à mão ("procvv", "cocatenar"...).
+
+Compara, para cada consulta, se a função de origem aparece no top 5:
+
+- antes: `search_function` original (substring nos dois sentidos)
+- BM25 sem tolerância (`Bm25Index(..., fuzzy=False)`)
+- BM25 com symmetric delete (padrão)
+
+e mede a latência p50/p99. Numa base sintética com milhares de funções
+compara a expansão tolerante com a varredura de todo o vocabulário
+calculando a distância de edição (o que o índice evita).
+
+Uso (na pasta backend):
+    python benchmarks/bench_fuzzy_search.py [funcoes_sinteticas]
+"""
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.excel_assistant import ExcelAssistant
+from app.services.search import Bm25Index, tokenize, allowed_edits, edit_distance
+from bench_excel_search import indice_antigo, buscar_antes, base_sintetica
+
+MANUAIS = [('procvv', 'PROCV'), ('pocv', 'PROCV'), ('cocatenar', 'CONCATENAR'), ('concatena', 'CONCATENAR'),
+           ('medai', 'MÉDIA'), ('mèdia', 'MÉDIA'), ('maiusucla', 'MAIÚSCULA'), ('minúsula', 'MINÚSCULA'),
+           ('hje', 'HOJE'), ('somra', 'SOMA'), ('multipicar', 'MULT'), ('sobrenme', 'ultimo_nome'),
+           ('dominoi', 'extrair_dominio_email'), ('vlokup', 'PROCV'), ('conatr valores', 'CONT.VALORES')]
+
+
+def errar(palavra: str, rng: random.Random) -> str:
+    for _ in range(rng.randint(1, allowed_edits(palavra))):
+        i = rng.randrange(len(palavra))
+        op = rng.choice(['apagar', 'inserir', 'trocar', 'inverter'])
+        if op == 'apagar' and len(palavra) > 3:
+            palavra = palavra[:i] + palavra[i + 1:]
+        elif op == 'inserir':
+            palavra = palavra[:i] + rng.choice(string.ascii_lowercase) + palavra[i:]
+        elif op == 'inverter' and i + 1 < len(palavra):
+            palavra = palavra[:i] + palavra[i + 1] + palavra[i] + palavra[i + 2:]
+        else:
+            palavra = palavra[:i] + rng.choice(string.ascii_lowercase) + palavra[i + 1:]
+    return palavra
+
+
+def corpus(knowledge):
+    rng = random.Random(21)
+    consultas = list(MANUAIS)
+    for categoria, funcoes in knowledge.items():
+        if categoria == 'dicas_avancadas':
+            continue
+        for func_name, func_data in funcoes.items():
+            for termo in sorted({t for p in func_data.get("pt", []) for t in tokenize(p)} | set(tokenize(func_name))):
+                if allowed_edits(termo):
+                    for _ in range(3):
+                        consultas.append((errar(termo, rng), func_name))
+    return consultas
+
+
+def avaliar(buscar, consultas):
+    acertos, tempos = 0, []
+    for consulta, alvo in consultas:
+        inicio = time.perf_counter()
+        achadas = buscar(consulta)
+        tempos.append(time.perf_counter() - inicio)
+        acertos += alvo in achadas
+    tempos.sort()
+    p = lambda q: tempos[min(len(tempos) - 1, int(q * len(tempos)))] * 1e6
+    return acertos / len(consultas), p(0.5), p(0.99)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    assistant = ExcelAssistant()
+    consultas = corpus(assistant.knowledge)
+    antigo = indice_antigo(assistant.knowledge)
+    nomes = [f for _, f in assistant.functions]
+    docs = [tokenize(f) + [t for p in assistant.knowledge[c][f].get('pt', []) for t in tokenize(p)]
+            for c, f in assistant.functions]
+    exato = Bm25Index(docs, nomes, fuzzy=False)
+
+    print(f"{len(consultas)} consultas com erro de digitação ({len(MANUAIS)} manuais)")
+    for nome, buscar in [
+        ('antes (substring)', lambda q: buscar_antes(antigo, q)),
+        ('BM25 sem tolerância', lambda q: [nomes[d] for d, _ in exato.search(q)]),
+        ('BM25 + symmetric delete', lambda q: [r['funcao'] for r in assistant.search_function(q)]),
+    ]:
+        recall, p50, p99 = avaliar(buscar, consultas)
+        print(f"  {nome:<24} recall@5 {recall:6.1%} | p50 {p50:6.1f} µs | p99 {p99:6.1f} µs")
+
+    grande = base_sintetica(assistant.knowledge, n)
+    funcoes = [(c, f) for c, fs in grande.items() if c != 'dicas_avancadas' for f in fs]
+    inicio = time.perf_counter()
+    index = Bm25Index([tokenize(f) + [t for p in grande[c][f].get('pt', []) for t in tokenize(p)] for c, f in funcoes],
+                      [f for _, f in funcoes])
+    t_build = time.perf_counter() - inicio
+    termos = [errar(t, random.Random(i)) for i, t in enumerate(random.Random(5).sample(index.vocabulary, 300))
+              if allowed_edits(t)]
+
+    def varredura(termo):
+        limite = allowed_edits(termo)
+        return [t for t in index.vocabulary if edit_distance(termo, t, limite) <= limite]
+
+    _, p50_i, p99_i = avaliar(lambda t: index.fuzzy(t), [(t, None) for t in termos])
+    _, p50_v, p99_v = avaliar(varredura, [(t, None) for t in termos[:50]])
+    print(f"\nbase sintética: {len(funcoes)} funções, {len(index.vocabulary)} termos, "
+          f"índice em {t_build:.2f}s ({len(index._deletes)} variantes)")
+    print(f"  symmetric delete:       p50 {p50_i:8.1f} µs | p99 {p99_i:8.1f} µs")
+    print(f"  varredura do vocabulário: p50 {p50_v:8.1f} µs | p99 {p99_v:8.1f} µs")
+
+
+if __name__ == '__main__':
+    main()
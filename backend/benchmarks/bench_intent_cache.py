@@ -0,0 +1,123 @@
+"""
+Benchmark: cache de intenção por comando normalizado
+
+Para cada comando de `intent_corpus.txt` (mais variações de caixa, acento
+e espaços nas pontas):
+
+- antes: normalização original (um `str.replace` por letra acentuada) e a
+  cascata de sinônimos / regex a cada chamada
+- depois: `normalize_text` (uma tabela, `str.translate`) + cache LRU do
+  motor; só os parâmetros que dependem do texto original (valor da coluna
+  nova) ou das colunas (coluna alvo) saem fora do cache
+
+Confere que `SpreadsheetAI.extract_intent` e
+`AdvancedAI.detect_intent_advanced` devolvem o mesmo que antes e mede com
+um fluxo de comandos repetidos (distribuição Zipf, como no chat).
+
+Uso (na pasta backend):
+    python benchmarks/bench_intent_cache.py [comandos]
+"""
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.ai_engine import SpreadsheetAI
+from app.ai_engine_advanced import AdvancedAI
+from app.services.columns import column_index
+from app.services.sessions import SessionContext
+
+HERE = Path(__file__).resolve().parent
+COLUMNS = ['Nome', 'Email', 'Telefone', 'CNPJ', 'Valor', 'Preço', 'Idade', 'Status', 'cidade']
+EXTRAS = ['Criar coluna STATUS com "Ativo"', 'criar coluna total valor = 0', 'nova coluna Região com Sul',
+          'separar nome', 'Limpar CNPJ', 'remover duplicatas', 'ordenar por nome z-a',
+          'MAIÚSCULA', 'adicionar ddd', 'extrair domínio', 'multione', 'baixar csv']
+
+REPLACEMENTS = {
+    'á': 'a', 'é': 'e', 'í': 'i', 'ó': 'o', 'ú': 'u',
+    'â': 'a', 'ê': 'e', 'ô': 'o', 'ã': 'a', 'õ': 'o',
+    'ç': 'c'
+}
+
+
+def normalizar_antes(text):
+    text = text.lower()
+    for old, new in REPLACEMENTS.items():
+        text = text.replace(old, new)
+    return text
+
+
+def extract_antes(ai: SpreadsheetAI, command):
+    """extract_intent original: normaliza e roda a cascata inteira"""
+    normalized = normalizar_antes(command.strip())
+    intent, params = ai._classify_params(normalized)
+    if intent == 'CREATE_COLUMN':
+        match = re.search(r'(?:com|valor|=)\s+["\']?([^"\']+)["\']?', command)
+        if match:
+            params['value'] = match.group(1).strip()
+    return intent, params
+
+
+def detect_antes(ai: AdvancedAI, command, columns, session):
+    """detect_intent_advanced original (caminho sem amostra)"""
+    cmd_lower = normalizar_antes(command)
+    params = {}
+    found = ai.match_intent(cmd_lower)
+    if found:
+        intent, groups = found
+        if groups:
+            params['extracted'] = groups
+        target = column_index(columns).mentioned(cmd_lower)
+        if target is not None:
+            params['target_column'] = target
+        session.record(command, intent)
+        return intent, params
+    suggestions = ai._suggest_based_on_context(cmd_lower, columns, session)
+    if suggestions:
+        params['suggestions'] = suggestions
+    return 'UNKNOWN', params
+
+
+def corpus():
+    linhas = (HERE / 'intent_corpus.txt').read_text(encoding='utf-8').splitlines()
+    base = [linha for linha in linhas if not linha.startswith('#')] + EXTRAS
+    return base + [c.upper() for c in base] + [f'  {c} ' for c in base]
+
+
+def medir(func, comandos):
+    inicio = time.perf_counter()
+    for c in comandos:
+        func(c)
+    return (time.perf_counter() - inicio) / len(comandos)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    comandos = corpus()
+
+    spreadsheet, advanced, sessao = SpreadsheetAI(), AdvancedAI(), SessionContext()
+    for c in comandos:
+        assert extract_antes(spreadsheet, c) == spreadsheet.extract_intent(c), c
+        assert detect_antes(advanced, c, COLUMNS, sessao) == advanced.detect_intent_advanced(c, COLUMNS, [], sessao), c
+    print(f"✅ {len(comandos)} comandos: mesma intenção e parâmetros nos dois motores")
+
+    random.seed(7)
+    pesos = [1 / (i + 1) for i in range(len(comandos))]
+    fluxo = random.choices(comandos, weights=pesos, k=n)
+
+    spreadsheet, advanced = SpreadsheetAI(), AdvancedAI()
+    t_antes = medir(lambda c: extract_antes(spreadsheet, c), fluxo)
+    t_depois = medir(spreadsheet.extract_intent, fluxo)
+    print(f"extract_intent:         antes {t_antes * 1e6:5.2f} µs | depois {t_depois * 1e6:5.2f} µs | "
+          f"{t_antes / t_depois:4.1f}x | {spreadsheet.cache_metrics()}")
+
+    t_antes = medir(lambda c: detect_antes(advanced, c, COLUMNS, sessao), fluxo)
+    t_depois = medir(lambda c: advanced.detect_intent_advanced(c, COLUMNS, [], sessao), fluxo)
+    print(f"detect_intent_advanced: antes {t_antes * 1e6:5.2f} µs | depois {t_depois * 1e6:5.2f} µs | "
+          f"{t_antes / t_depois:4.1f}x | {advanced.cache_metrics()}")
+
+
+if __name__ == '__main__':
+    main()
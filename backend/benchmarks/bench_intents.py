@@ -0,0 +1,106 @@
+"""
+Benchmark + golden file: detect_intent_advanced (re.search por string x tabela compilada)
+
+Para cada comando de `intent_corpus.txt`:
+
+- antes: laço original (re.search padrão a padrão, na ordem da tabela,
+  coluna alvo por substring) com `_analyze_data_context` sempre rodando
+  sobre a amostra
+- depois: `AdvancedAI.detect_intent_advanced` (padrões compilados uma vez;
+  análise da amostra só quando nenhuma intenção casa)
+
+Mede também o casamento isolado contra uma regex única com uma alternativa
+nomeada por padrão (casamento mais à esquerda), que no `re` do CPython sai
+mais lenta que a tabela compilada.
+
+Confere que o caminho original reproduz o `intent_golden.json` e que o
+atual devolve o mesmo, exceto a coluna alvo corrigida pelo índice de
+colunas (a lista e o teste ficam em `tests/test_intents.py`). Com
+`--update` regrava o golden file a partir do caminho original.
+
+Uso (na pasta backend):
+    python benchmarks/bench_intents.py [--update]
+"""
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.ai_engine_advanced import AdvancedAI
+from app.services.sessions import SessionContext
+from tests.test_intents import COLUMNS, GOLDEN, SAMPLE, comandos, esperado, resultado
+
+
+def detectar_antes(ai: AdvancedAI, command, columns, data_sample, session):
+    """Laço original de detect_intent_advanced"""
+    cmd_lower = ai.normalize(command)
+    params = {}
+    ai._analyze_data_context(columns, data_sample, session)
+    for intent, patterns in ai.command_patterns.items():
+        for pattern in patterns:
+            match = re.search(pattern, cmd_lower)
+            if match:
+                if match.groups():
+                    params['extracted'] = match.groups()
+                for col in columns:
+                    if col.lower() in cmd_lower:
+                        params['target_column'] = col
+                        break
+                return intent, params
+    suggestions = ai._suggest_based_on_context(cmd_lower, columns, session)
+    if suggestions:
+        params['suggestions'] = suggestions
+    return 'UNKNOWN', params
+
+
+def medir(func, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        func()
+    return (time.perf_counter() - inicio) / repeticoes
+
+
+def main():
+    corpus = comandos()
+    antes_ai, depois_ai = AdvancedAI(), AdvancedAI()
+    antes_sessao, depois_sessao = SessionContext(), SessionContext()
+
+    antes = {c: resultado(*detectar_antes(antes_ai, c, COLUMNS, SAMPLE, antes_sessao)) for c in corpus}
+    depois = {c: resultado(*depois_ai.detect_intent_advanced(c, COLUMNS, SAMPLE, depois_sessao)) for c in corpus}
+
+    if '--update' in sys.argv:
+        GOLDEN.write_text(json.dumps(antes, ensure_ascii=False, indent=1) + '\n', encoding='utf-8')
+        print(f"📝 golden file regravado ({len(antes)} comandos)")
+    else:
+        golden = json.loads(GOLDEN.read_text(encoding='utf-8'))
+        assert golden == antes, [c for c in corpus if golden.get(c) != antes[c]]
+    alvo = esperado(antes)
+    diferentes = [c for c in corpus if alvo[c] != depois[c]]
+    assert not diferentes, [(c, alvo[c], depois[c]) for c in diferentes]
+    print(f"✅ {len(corpus)} comandos: mesma classificação "
+          f"({sum(r[0] != 'UNKNOWN' for r in depois.values())} reconhecidos)")
+
+    normalizados = [depois_ai.normalize(c) for c in corpus]
+    combinada = re.compile('|'.join(
+        f'(?P<{intent}__{i}>{pattern})'
+        for intent, patterns in depois_ai.command_patterns.items()
+        for i, pattern in enumerate(patterns)
+    ))
+    t_tabela = medir(lambda: [depois_ai.match_intent(c) for c in normalizados], 50)
+    t_combinada = medir(lambda: [combinada.search(c) for c in normalizados], 50)
+    print(f"só o casamento: tabela compilada {t_tabela / len(corpus) * 1e6:5.1f} µs/comando | "
+          f"regex única (uma passada) {t_combinada / len(corpus) * 1e6:5.1f} µs/comando")
+
+    for nome, amostra in [('sem amostra', []), ('amostra de 200 linhas', SAMPLE)]:
+        t_antes = medir(lambda: [detectar_antes(antes_ai, c, COLUMNS, amostra, antes_sessao) for c in corpus], 20)
+        t_depois = medir(lambda: [depois_ai.detect_intent_advanced(c, COLUMNS, amostra, depois_sessao)
+                                  for c in corpus], 20)
+        por = len(corpus)
+        print(f"{nome}: antes {t_antes / por * 1e6:7.1f} µs/comando | "
+              f"depois {t_depois / por * 1e6:6.1f} µs/comando | {t_antes / t_depois:4.1f}x")
+
+
+if __name__ == '__main__':
+    main()
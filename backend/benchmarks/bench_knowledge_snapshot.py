@@ -0,0 +1,111 @@
+"""
+Benchmark: subida do ExcelAssistant por worker (JSON no import x snapshot com mmap)
+
+Para a base real e para uma base sintética grande (`base_sintetica`),
+sobe processos separados, como workers do uvicorn:
+
+- antes: `KnowledgeBase.from_json` (lê o JSON, tokeniza, monta o BM25 e as
+  variantes do symmetric delete em cada processo)
+- depois: `load_knowledge` abrindo o snapshot compilado (mmap)
+
+Mede o tempo até a primeira busca respondida e a memória do processo em
+/proc/self/status: RssAnon (privada, multiplicada por worker) e RssFile
+(páginas do arquivo, divididas entre os workers). Confere que as buscas
+dão o mesmo resultado nos dois caminhos.
+
+Uso (na pasta backend):
+    python benchmarks/bench_knowledge_snapshot.py [funções extras] [workers]
+"""
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+CONSULTAS = ['Como fazer soma no Excel?', 'como juntar nome e sobrenome', 'função SE', 'procv', 'cocatenar', 'medai']
+
+
+def memoria():
+    campos = {}
+    with open('/proc/self/status') as f:
+        for linha in f:
+            nome, _, valor = linha.partition(':')
+            if nome in ('RssAnon', 'RssFile'):
+                campos[nome] = int(valor.split()[0])
+    return campos
+
+
+def worker(modo, origem, snapshot):
+    """Roda num processo novo: sobe a base, faz as buscas, imprime tempo/memória/resultados"""
+    from app.excel_assistant import ExcelAssistant
+    from app.services.knowledge_base import KnowledgeBase, load_knowledge
+
+    base_antes = memoria()
+    inicio = time.perf_counter()
+    base = KnowledgeBase.from_json(Path(origem)) if modo == 'json' else load_knowledge(Path(origem), Path(snapshot))
+    assistant = ExcelAssistant(base)
+    resultados = [[r['funcao'] for r in assistant.search_function(q)] for q in CONSULTAS]
+    tempo = time.perf_counter() - inicio
+    depois = memoria()
+    print(json.dumps({
+        'fonte': base.source, 'tempo': tempo, 'resultados': resultados,
+        'anon': depois['RssAnon'] - base_antes['RssAnon'], 'file': depois['RssFile'] - base_antes['RssFile'],
+    }))
+
+
+def subir(modo, origem, snapshot, workers):
+    saidas = []
+    for _ in range(workers):
+        saida = subprocess.run([sys.executable, __file__, '--worker', modo, str(origem), str(snapshot)],
+                               capture_output=True, text=True, check=True)
+        saidas.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+    return saidas
+
+
+def comparar(nome, origem, snapshot, workers):
+    from app.services.knowledge_base import compile_snapshot
+
+    inicio = time.perf_counter()
+    base = compile_snapshot(origem, snapshot)
+    t_build = time.perf_counter() - inicio
+
+    antes = subir('json', origem, snapshot, workers)
+    depois = subir('snapshot', origem, snapshot, workers)
+    assert all(s['fonte'] == 'snapshot' for s in depois)
+    assert all(s['resultados'] == antes[0]['resultados'] for s in antes + depois)
+
+    media = lambda saidas, campo: sum(s[campo] for s in saidas) / len(saidas)
+    print(f"\n{nome}: {len(base)} funções, {len(base.index.vocabulary)} termos, "
+          f"snapshot de {snapshot.stat().st_size / 2 ** 20:.1f} MiB compilado em {t_build:.2f}s")
+    for rotulo, saidas in (('JSON no import', antes), ('snapshot (mmap)', depois)):
+        print(f"  {rotulo:16s} {media(saidas, 'tempo') * 1000:8.1f} ms até a 1ª busca | "
+              f"privada {media(saidas, 'anon') / 1024:6.1f} MiB/worker | "
+              f"arquivo {media(saidas, 'file') / 1024:5.1f} MiB (compartilhada)")
+    print(f"  {workers} workers: privada total {sum(s['anon'] for s in antes) / 1024:.1f} MiB -> "
+          f"{sum(s['anon'] for s in depois) / 1024:.1f} MiB; mesmos resultados nas {len(CONSULTAS)} buscas")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--worker':
+        return worker(*sys.argv[2:5])
+
+    from app.services.knowledge_base import KNOWLEDGE_PATH
+    from bench_excel_search import base_sintetica
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    with tempfile.TemporaryDirectory() as pasta:
+        pasta = Path(pasta)
+        comparar('base real', KNOWLEDGE_PATH, pasta / 'real.snapshot', workers)
+
+        grande = pasta / 'grande.json'
+        grande.write_text(json.dumps(base_sintetica(json.loads(KNOWLEDGE_PATH.read_text()), n), ensure_ascii=False))
+        comparar('base sintética', grande, pasta / 'grande.snapshot', workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark: escritas do aprendizado direto no banco x write-behind em lote
+
+Usa o stand-in em memória com latência por round trip (`--latencia` ms) e
+grava N mensagens do chat, cada uma com suas palavras-chave:
+
+- antes: insert em ai_learning + SELECT e UPDATE/INSERT por palavra em
+  ai_vocabulary, no caminho da requisição (lógica original das rotas)
+- depois: `LearningBuffer` (registro em memória + um rpc por lote)
+
+Também mostra a perda de incrementos do ler-somar-gravar com dois workers
+concorrentes na mesma palavra, e confere que o lote chega ao mesmo
+vocabulário.
+
+Uso (na pasta backend):
+    python benchmarks/bench_learning.py [mensagens] [latencia_ms]
+"""
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import app.services.learning_buffer as learning_module
+from app.api.routes.ai_learning import extrair_palavras_chave
+from app.db import MemorySupabase
+from app.services.learning_buffer import LearningBuffer
+
+PALAVRAS = ['planilha', 'formatar', 'telefone', 'contatos', 'empresa', 'baixar',
+            'limpar', 'multione', 'comercial', 'dados', 'coluna', 'email']
+
+
+def mensagens(n: int):
+    random.seed(7)
+    return [' '.join(random.choices(PALAVRAS, k=random.randint(3, 8))) for _ in range(n)]
+
+
+async def aprender_antes(db: MemorySupabase, texto: str):
+    keywords = extrair_palavras_chave(texto)
+    await db.table('ai_learning').insert({'input_text': texto, 'intent': 'geral', 'keywords': keywords,
+                                          'response': 'ok', 'confidence': 0.7}).execute()
+    for palavra in keywords:
+        result = await db.table('ai_vocabulary').select('*').eq('word', palavra).execute()
+        if result.data:
+            await db.table('ai_vocabulary')\
+                .update({'frequency': result.data[0]['frequency'] + 1})\
+                .eq('word', palavra).execute()
+        else:
+            await db.table('ai_vocabulary').insert({'word': palavra, 'synonyms': [],
+                                                    'related_intents': ['geral'], 'frequency': 1}).execute()
+
+
+def vocabulario(db: MemorySupabase):
+    return {row['word']: row['frequency'] for row in db.tables['ai_vocabulary']}
+
+
+async def antes(textos, latencia):
+    db = MemorySupabase(latency=latencia)
+    inicio = time.perf_counter()
+    for texto in textos:
+        await aprender_antes(db, texto)
+    return (time.perf_counter() - inicio) / len(textos), db
+
+
+async def depois(textos, latencia):
+    db = MemorySupabase(latency=latencia)
+    learning_module.get_supabase = lambda: db
+    buffer = LearningBuffer(interval=3600, flush_size=10 ** 9, max_size=10 ** 9)
+    inicio = time.perf_counter()
+    for texto in textos:
+        keywords = extrair_palavras_chave(texto)
+        buffer.add_pattern({'input_text': texto, 'intent': 'geral', 'keywords': keywords,
+                            'response': 'ok', 'confidence': 0.7}, keywords, 'geral')
+    por_mensagem = (time.perf_counter() - inicio) / len(textos)
+    inicio = time.perf_counter()
+    await buffer.close()
+    return por_mensagem, time.perf_counter() - inicio, db
+
+
+async def corrida(latencia):
+    """Dois workers somando 50 vezes a mesma palavra"""
+    db = MemorySupabase(latency=latencia)
+    await db.table('ai_vocabulary').insert({'word': 'planilha', 'frequency': 0}).execute()
+
+    async def worker():
+        for _ in range(50):
+            result = await db.table('ai_vocabulary').select('*').eq('word', 'planilha').execute()
+            await db.table('ai_vocabulary')\
+                .update({'frequency': result.data[0]['frequency'] + 1})\
+                .eq('word', 'planilha').execute()
+
+    await asyncio.gather(worker(), worker())
+    perdido = vocabulario(db)['planilha']
+
+    learning_module.get_supabase = lambda: db
+    workers = [LearningBuffer(3600, 10 ** 9, 10 ** 9) for _ in range(2)]
+    for buffer in workers:
+        for _ in range(50):
+            buffer.add_pattern({'input_text': 'planilha'}, ['planilha'], 'geral')
+    await asyncio.gather(*(buffer.close() for buffer in workers))
+    return perdido, vocabulario(db)['planilha'] - perdido
+
+
+async def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latencia = (float(sys.argv[2]) if len(sys.argv) > 2 else 5) / 1000
+    textos = mensagens(n)
+
+    t_antes, db_antes = await antes(textos, latencia)
+    t_depois, t_flush, db_depois = await depois(textos, latencia)
+    assert vocabulario(db_antes) == vocabulario(db_depois)
+    assert len(db_antes.tables['ai_learning']) == len(db_depois.tables['ai_learning'])
+    print("✅ mesmo vocabulário e padrões")
+
+    print(f"{n} mensagens, {latencia * 1000:.0f} ms por round trip")
+    print(f"  direto no banco: {t_antes * 1000:8.2f} ms/mensagem ({db_antes.calls} chamadas)")
+    print(f"  write-behind:    {t_depois * 1000:8.3f} ms/mensagem ({db_depois.calls} chamada, flush {t_flush * 1000:.1f} ms)")
+
+    perdido, lote = await corrida(latencia)
+    print(f"  2 workers x 50 incrementos: ler-somar-gravar = {perdido}, lote atômico = {lote}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,43 @@
+"""
+Benchmark: limpeza de nomes MULTIONE (por linha x deduplicado)
+
+Mede `clean_names` contra a implementação original por linha. A
+equivalência das duas fica no teste `tests/test_names.py` (de onde vêm a
+referência e o gerador de nomes aleatórios).
+
+Uso (na pasta backend):
+    python benchmarks/bench_names.py
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.services.names import clean_names
+from tests.test_names import limpar_nome, nome_aleatorio
+
+
+def main():
+    rng = random.Random(42)
+    base = [nome_aleatorio(rng) for _ in range(20_000)]
+    for n in (100_000, 1_000_000):
+        # Listas de contatos repetem muito os mesmos nomes
+        nomes = pd.Series([base[rng.randrange(len(base))] for _ in range(n)]).astype(str)
+
+        inicio = time.perf_counter()
+        nomes.apply(limpar_nome)
+        t_apply = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        clean_names(nomes)
+        t_novo = time.perf_counter() - inicio
+
+        print(f"{n:>9} linhas | apply: {t_apply:7.3f}s | deduplicado: {t_novo:7.3f}s "
+              f"| {t_apply / t_novo:5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark + equivalência: etapas por linha no pool de processos
+
+Roda as mesmas etapas (`app.services.transforms` e a etapa por bloco do
+MULTIONE) em processo e no pool, confere que os resultados são idênticos
+(inclusive a ordem das linhas) e mede o tempo dos dois caminhos.
+
+O ganho depende do número de núcleos: com um núcleo só o pool apenas
+acrescenta o custo de gravar/ler as partições em Arrow.
+
+Uso (na pasta backend):
+    python benchmarks/bench_parallel.py [linhas] [workers]
+"""
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.services.parallel import ParallelExecutor
+from app.services.presets import _multione_stage
+from app.services.transforms import (
+    upper_text, add_ddd, normalize_contact_columns, strip_special_chars
+)
+
+NOMES = ['ana silva', 'JOÃO *', None, 'maria ✨', 'None', 'josé d\'ávila']
+TELEFONES = ['(11) 98765-4321', '5511987654321', None, '123', '21 3333-4444']
+EMAILS = [' A@B.com ', 'c@d.org', None, 'sem-arroba']
+
+
+def planilha(linhas: int, seed: int = 3) -> pd.DataFrame:
+    rng = random.Random(seed)
+    return pd.DataFrame({
+        'Nome': pd.Series([rng.choice(NOMES) for _ in range(linhas)], dtype=object),
+        'Telefone': pd.Series([rng.choice(TELEFONES) for _ in range(linhas)], dtype=object),
+        'Email': pd.Series([rng.choice(EMAILS) for _ in range(linhas)], dtype=object),
+        'Idade': [rng.randint(18, 90) for _ in range(linhas)],
+    })
+
+
+def medir(func, repeticoes: int = 3) -> float:
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        func()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def multione(executor: ParallelExecutor, df: pd.DataFrame) -> pd.DataFrame:
+    partes = []
+    for start, parte in executor.map_partitions(df, _multione_stage, 'Nome', 'Telefone',
+                                                partition_rows=50_000):
+        partes.append(parte.assign(__seq=parte['__seq'] + start))
+    return pd.concat(partes, ignore_index=True)
+
+
+def main():
+    linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else max(2, os.cpu_count() or 1)
+    df = planilha(linhas)
+
+    local = ParallelExecutor(workers=1, min_rows=0)
+    pool = ParallelExecutor(workers=workers, min_rows=0)
+
+    etapas = {
+        'maiúscula': lambda ex: ex.apply_rows(df, upper_text),
+        'ddd': lambda ex: ex.apply_rows(df, add_ddd, 'Telefone'),
+        'normalize_contacts': lambda ex: ex.apply_rows(df, normalize_contact_columns),
+        'clean_all (caracteres)': lambda ex: ex.apply_rows(df, strip_special_chars),
+        'multione (etapa por bloco)': lambda ex: multione(ex, df),
+    }
+
+    print(f"{linhas:,} linhas, {workers} workers ({os.cpu_count()} núcleos)")
+    try:
+        for nome, etapa in etapas.items():
+            pd.testing.assert_frame_equal(etapa(local), etapa(pool))
+            t_local = medir(lambda: etapa(local))
+            t_pool = medir(lambda: etapa(pool))
+            print(f"  {nome:<28} local {t_local:6.2f}s | pool {t_pool:6.2f}s "
+                  f"| {t_local / t_pool:4.1f}x")
+        print(f"✅ resultados idênticos | {pool.stats}")
+    finally:
+        pool.shutdown()
+
+
+if __name__ == '__main__':
+    main()
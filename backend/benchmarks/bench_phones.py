@@ -0,0 +1,79 @@
+"""
+Benchmark: normalização de telefones MULTIONE (apply por linha x vetorizado)
+
+Uso (na pasta backend):
+    python benchmarks/bench_phones.py
+"""
+import re
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.services.phones import normalize_phones
+
+
+def processar_telefone(telefone):
+    """Implementação original (por linha), usada como referência"""
+    if pd.isna(telefone) or str(telefone).lower() in ['none', 'nan', '']:
+        return None
+    nums = re.sub(r'[^0-9]', '', str(telefone))
+    if not nums or len(nums) < 8:
+        return None
+    if nums.startswith('55'):
+        if len(nums) >= 12 and len(nums) <= 13:
+            return nums
+        if len(nums) > 13:
+            return nums[:13]
+        return None
+    nums = '55' + nums
+    if len(nums) >= 12 and len(nums) <= 13:
+        return nums
+    return None
+
+
+def gerar_telefones(n: int, seed: int = 42) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    ddd = rng.integers(11, 99, n)
+    numero = rng.integers(10**7, 10**9, n)
+    formatos = np.array([
+        '({ddd}) 9{num}', '+55 {ddd} {num}', '{ddd}{num}', '55{ddd}9{num} ::: 55{ddd}{num}',
+        '{num}', 'nan', 'None', '', 'tel: {ddd}-{num} ✨',
+    ])
+    escolha = formatos[rng.integers(0, len(formatos), n)]
+    valores = [f.format(ddd=d, num=x) for f, d, x in zip(escolha, ddd.tolist(), numero.tolist())]
+    return pd.Series(valores).astype(str)
+
+
+def como_lista(valores: pd.Series) -> list:
+    return [None if pd.isna(v) else v for v in valores]
+
+
+def medir(func, *args, repeticoes: int = 3) -> float:
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        func(*args)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main():
+    for n in (100_000, 1_000_000):
+        telefones = gerar_telefones(n)
+
+        esperado = telefones.apply(processar_telefone)
+        obtido = normalize_phones(telefones)
+        assert como_lista(esperado) == como_lista(obtido), "Resultado diferente da implementação original"
+
+        t_apply = medir(lambda s: s.apply(processar_telefone), telefones)
+        t_vetor = medir(normalize_phones, telefones)
+        print(f"{n:>9} linhas | apply: {t_apply:7.3f}s | vetorizado: {t_vetor:7.3f}s "
+              f"| {t_apply / t_vetor:5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark: presets MULTIONE / COMERCIAL (DataFrame inteiro x execução por blocos)
+
+Confere que `run_multione` / `run_comercial` devolvem o mesmo que o código
+antigo do endpoint - inclusive com blocos pequenos e orçamento mínimo, o que
+força o spill da deduplicação e da ordenação externa - e mede tempo e pico
+de memória (tracemalloc) das duas versões.
+
+Uso (na pasta backend):
+    python benchmarks/bench_presets.py
+"""
+import re
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.services.names import clean_names
+from app.services.phones import normalize_phones
+from app.services.presets import run_multione, run_comercial
+
+
+def multione_antigo(df, nome_col, telefone_col):
+    """Versão anterior (DataFrame inteiro), usada como referência"""
+    df_limpo = pd.DataFrame()
+    df_limpo['Nome'] = df[nome_col].astype(str)
+    df_limpo['Telefone'] = df[telefone_col].astype(str)
+    df_limpo['Telefone'] = normalize_phones(df_limpo['Telefone'])
+    df_limpo = df_limpo[df_limpo['Telefone'].notna()]
+    df_limpo = df_limpo.drop_duplicates(subset=['Telefone'], keep='first')
+    df_limpo['Nome'] = clean_names(df_limpo['Nome'])
+    contatos_genericos = (df_limpo['Nome'] == 'Contato').sum()
+    return df_limpo.reset_index(drop=True), contatos_genericos
+
+
+def comercial_antigo(df):
+    """Versão anterior (DataFrame inteiro); ordenação estável nos empates"""
+    formatted_df = pd.DataFrame()
+    for col in df.columns:
+        col_lower = col.lower()
+        if 'empresa' in col_lower or 'company' in col_lower:
+            formatted_df['EMPRESA'] = df[col].str.strip().str.upper()
+        elif 'nome' in col_lower and 'empresa' not in col_lower:
+            formatted_df['NOME_CONTATO'] = df[col].str.strip().str.title()
+        elif 'email' in col_lower or 'mail' in col_lower:
+            formatted_df['EMAIL'] = df[col].str.strip().str.lower()
+        elif 'telefone' in col_lower or 'phone' in col_lower:
+            formatted_df['TELEFONE'] = df[col].apply(lambda x:
+                re.sub(r'[^0-9]', '', str(x)) if pd.notna(x) else None
+            )
+    if 'EMAIL' in formatted_df.columns:
+        formatted_df['DOMINIO'] = formatted_df['EMAIL'].str.split('@').str[1]
+    if 'TELEFONE' in formatted_df.columns:
+        formatted_df['DDD'] = formatted_df['TELEFONE'].str[:2]
+    formatted_df['STATUS'] = 'ATIVO'
+    formatted_df['DATA_CADASTRO'] = datetime.now().strftime('%Y-%m-%d')
+    antes = len(formatted_df)
+    formatted_df = formatted_df.drop_duplicates(subset=['EMAIL'], keep='first')
+    removidas = antes - len(formatted_df)
+    formatted_df = formatted_df.dropna(how='all')
+    formatted_df = formatted_df.sort_values('EMPRESA', kind='stable')
+    return formatted_df.reset_index(drop=True), removidas
+
+
+def gerar_planilha(n: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    nomes = np.array(['✨ana', 'JOÃO 123', 'None', '', 'maria*', 'José Silva', '12345', 'Mycontacts Bia'])
+    empresas = np.array([' acme ', 'Globex', 'initech', 'Umbrella ', None], dtype=object)
+    # Repetições de telefone/e-mail para a deduplicação ter trabalho
+    telefones = [f'({d}) 9{x:08d}' for d, x in zip(rng.integers(11, 99, n).tolist(),
+                                                  rng.integers(0, n // 3 + 1, n).tolist())]
+    emails = [f' User{x}@Mail{x % 7}.com ' for x in rng.integers(0, n // 2 + 1, n).tolist()]
+    emails = np.array(emails, dtype=object)
+    emails[rng.random(n) < 0.05] = None
+    return pd.DataFrame({
+        'First Name': nomes[rng.integers(0, len(nomes), n)],
+        'Phone 1 - Value': telefones,
+        'Empresa': empresas[rng.integers(0, len(empresas), n)],
+        'Email': emails,
+    })
+
+
+def como_listas(df: pd.DataFrame) -> dict:
+    return {c: [None if pd.isna(v) else v for v in df[c]] for c in df.columns}
+
+
+def medir(func, *args, **kwargs):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = func(*args, **kwargs)
+    tempo = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, tempo, pico / 1024 / 1024
+
+
+def main():
+    # Equivalência, inclusive forçando spill (blocos pequenos, 64 KB de orçamento)
+    df = gerar_planilha(20_000)
+    esperado_m = multione_antigo(df, 'First Name', 'Phone 1 - Value')
+    esperado_c = comercial_antigo(df)
+    for opcoes in ({}, {'chunk_rows': 997, 'max_bytes': 64 * 1024}):
+        obtido_m = run_multione(df, 'First Name', 'Phone 1 - Value', **opcoes)
+        obtido_c = run_comercial(df, **opcoes)
+        assert como_listas(obtido_m[0]) == como_listas(esperado_m[0]), f"MULTIONE diferente {opcoes}"
+        assert obtido_m[1] == esperado_m[1]
+        assert como_listas(obtido_c[0]) == como_listas(esperado_c[0]), f"COMERCIAL diferente {opcoes}"
+        assert obtido_c[1] == esperado_c[1]
+    print("equivalência OK (em memória e com spill)")
+
+    for n in (100_000, 1_000_000):
+        df = gerar_planilha(n)
+        for nome, antigo, novo in (
+            ('MULTIONE', lambda: multione_antigo(df, 'First Name', 'Phone 1 - Value'),
+             lambda: run_multione(df, 'First Name', 'Phone 1 - Value', max_bytes=32 * 1024 * 1024)),
+            ('COMERCIAL', lambda: comercial_antigo(df),
+             lambda: run_comercial(df, max_bytes=32 * 1024 * 1024)),
+        ):
+            _, t_antigo, m_antigo = medir(antigo)
+            _, t_novo, m_novo = medir(novo)
+            print(f"{nome:>9} {n:>9} linhas | inteiro: {t_antigo:6.2f}s pico {m_antigo:7.1f} MB "
+                  f"| blocos (32 MB): {t_novo:6.2f}s pico {m_novo:7.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
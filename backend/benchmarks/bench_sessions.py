@@ -0,0 +1,78 @@
+"""
+Benchmark: memória do contexto de conversa (estado global x sessões limitadas)
+
+Simula N comandos espalhados por várias conversas:
+
+- antes: listas globais do motor (command_history / user_patterns /
+  conversation_history), que crescem a cada comando
+- depois: `SessionStore` com ring buffer por sessão, LRU/TTL e teto de
+  memória
+
+Mede a memória alocada (tracemalloc) e mostra os contadores do store.
+
+Uso (na pasta backend):
+    python benchmarks/bench_sessions.py [comandos] [conversas]
+"""
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.services.sessions import SessionStore
+
+COMANDOS = ['validar emails', 'criar coluna STATUS', 'separar nome', 'multione',
+            'formatar como moeda', 'remover linhas com erro', 'baixar csv']
+
+
+def gerar(n, conversas):
+    random.seed(5)
+    return [(str(random.randrange(conversas)), f"{random.choice(COMANDOS)} {i}") for i in range(n)]
+
+
+def antes(eventos):
+    command_history, user_patterns, conversation_history = [], {}, []
+    for _, command in eventos:
+        entry = {'timestamp': datetime.now().isoformat(), 'command': command, 'intent': 'X', 'success': True}
+        command_history.append(entry)
+        user_patterns.setdefault('X', []).append(command)
+        conversation_history.append(dict(entry))
+    return command_history, user_patterns, conversation_history
+
+
+def depois(eventos):
+    store = SessionStore(max_sessions=1000, ttl=3600, max_bytes=8 * 1024 * 1024, history=50)
+    for key, command in eventos:
+        with store.session(key) as session:
+            session.record(command, 'X', True)
+    return store
+
+
+def medir(func, eventos):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = func(eventos)
+    tempo = time.perf_counter() - inicio
+    memoria = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return resultado, tempo, memoria
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    conversas = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+    eventos = gerar(n, conversas)
+
+    _, t_antes, m_antes = medir(antes, eventos)
+    store, t_depois, m_depois = medir(depois, eventos)
+
+    print(f"{n} comandos em {conversas} conversas")
+    print(f"  estado global:     {m_antes / 2 ** 20:7.1f} MiB ({t_antes / n * 1e6:.1f} µs/comando), cresce sem limite")
+    print(f"  sessões limitadas: {m_depois / 2 ** 20:7.1f} MiB ({t_depois / n * 1e6:.1f} µs/comando)")
+    print(f"  store: {store.metrics()}")
+
+
+if __name__ == '__main__':
+    main()
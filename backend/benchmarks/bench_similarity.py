@@ -0,0 +1,108 @@
+"""
+Benchmark: busca de resposta aprendida (top-50 + SequenceMatcher x índice TF-IDF)
+
+Monta N padrões no stand-in em memória (com latência por round trip) e o
+mesmo conjunto no `SimilarityIndex`. As consultas são variações dos
+padrões (caixa, acento, pontuação, palavra a mais):
+
+- antes: SELECT dos 50 de maior confiança + SequenceMatcher contra cada um
+  (lógica original de `buscar_resposta_similar`)
+- depois: `SimilarityIndex.best` (um produto matriz x vetor sobre todos)
+
+Mostra latência por consulta e quantas consultas acharam o padrão de
+origem (o caminho antigo não enxerga nada fora da janela de 50).
+
+Uso (na pasta backend):
+    python benchmarks/bench_similarity.py [padroes] [latencia_ms]
+"""
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.core.config import SIMILARITY_THRESHOLD
+from app.db import MemorySupabase
+from app.services.similarity import SimilarityIndex
+
+VERBOS = ['formatar', 'limpar', 'baixar', 'organizar', 'separar', 'juntar', 'validar', 'corrigir']
+OBJETOS = ['telefones', 'emails', 'nomes', 'cnpjs', 'endereços', 'datas', 'valores', 'contatos']
+LUGARES = ['da planilha', 'do arquivo', 'da aba clientes', 'do relatório', 'da base comercial']
+
+
+def padroes(n: int):
+    random.seed(3)
+    textos = set()
+    while len(textos) < n:
+        textos.add(f"como {random.choice(VERBOS)} os {random.choice(OBJETOS)} "
+                   f"{random.choice(LUGARES)} {random.randint(1, n)}")
+    return [{'input_text': texto, 'response': f'resposta {i}', 'intent': 'ajuda',
+             'confidence': round(random.uniform(0.1, 1.0), 2)}
+            for i, texto in enumerate(sorted(textos))]
+
+
+def variacao(texto: str) -> str:
+    texto = texto.replace('ç', 'c') if random.random() < 0.5 else texto.upper()
+    return 'por favor ' + texto + ' ?'
+
+
+async def antes(db: MemorySupabase, consulta: str, threshold: float = 0.7):
+    result = await db.table('ai_learning').select('*').order('confidence', desc=True).limit(50).execute()
+    melhor, melhor_score = None, 0
+    for pattern in result.data:
+        score = SequenceMatcher(None, consulta.lower(), pattern['input_text'].lower()).ratio()
+        if score > threshold and score > melhor_score:
+            melhor, melhor_score = pattern, score
+    return melhor
+
+
+async def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    latencia = (float(sys.argv[2]) if len(sys.argv) > 2 else 5) / 1000
+
+    db = MemorySupabase()
+    await db.table('ai_learning').insert(padroes(n)).execute()
+    db.latency = latencia
+
+    index = SimilarityIndex(str(Path(tempfile.gettempdir()) / 'bench_similarity.npz'))
+    inicio = time.perf_counter()
+    await index.sync(db)
+    t_build = time.perf_counter() - inicio
+
+    random.seed(11)
+    alvos = random.sample(db.tables['ai_learning'], 200)
+    consultas = [(alvo['id'], variacao(alvo['input_text'])) for alvo in alvos]
+
+    inicio = time.perf_counter()
+    acertos_antes = 0
+    for alvo, consulta in consultas:
+        achado = await antes(db, consulta)
+        acertos_antes += achado is not None and achado['id'] == alvo
+    t_antes = (time.perf_counter() - inicio) / len(consultas)
+
+    inicio = time.perf_counter()
+    acertos_depois = 0
+    for alvo, consulta in consultas:
+        achado = index.best(consulta, SIMILARITY_THRESHOLD)
+        acertos_depois += achado is not None and achado['id'] == alvo
+    t_depois = (time.perf_counter() - inicio) / len(consultas)
+
+    inicio = time.perf_counter()
+    index.save()
+    copia = SimilarityIndex(index.path)
+    copia.load()
+    t_disco = time.perf_counter() - inicio
+    assert [r['id'] for _, r in copia.search(consultas[0][1])] == [r['id'] for _, r in index.search(consultas[0][1])]
+    Path(index.path).unlink()
+
+    print(f"{n} padrões, {len(consultas)} consultas, {latencia * 1000:.0f} ms por round trip")
+    print(f"  índice montado em {t_build:.2f}s; salvar + recarregar {t_disco:.2f}s")
+    print(f"  top-50 + SequenceMatcher: {t_antes * 1000:7.2f} ms/consulta, achou {acertos_antes}/{len(consultas)}")
+    print(f"  índice TF-IDF:            {t_depois * 1000:7.2f} ms/consulta, achou {acertos_depois}/{len(consultas)}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,141 @@
+"""
+Benchmark: "baixar dividido em N" (partes montadas inteiras x ZIP em streaming)
+
+Divide uma planilha sintética em N partes, em XLSX e em CSV:
+
+- antes: o jeito direto de fazer no servidor o que o navegador fazia:
+  cada parte montada inteira (`to_excel` com openpyxl / `to_csv`) e o ZIP
+  montado em memória antes de a resposta começar
+- depois: `split_export.iter_split_zip` (escritor XLSX próprio em blocos,
+  partes no pool de processos quando há mais de um núcleo, ZIP em
+  streaming)
+
+Cada caminho roda num processo novo, que mede o tempo até o primeiro
+byte, o tempo total e o pico de memória residente acima da planilha já
+carregada (VmHWM em /proc/self/status, zerado com /proc/self/clear_refs).
+Confere que as partes lidas de volta com o pandas são iguais nos dois
+caminhos.
+
+Uso (na pasta backend):
+    python benchmarks/bench_split_export.py [linhas] [partes]
+"""
+import io
+import json
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.services.parallel import parallel_executor
+from app.services.split_export import iter_split_zip, part_filename, split_bounds
+
+
+def antes(df, partes, fmt):
+    """Cada parte inteira em memória, ZIP inteiro em memória"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        bounds = split_bounds(len(df), partes)
+        for i, (start, stop) in enumerate(bounds):
+            part = df.iloc[start:stop]
+            if fmt == 'xlsx':
+                content = io.BytesIO()
+                part.to_excel(content, index=False, sheet_name='Dados')
+                content = content.getvalue()
+            else:
+                content = part.to_csv(index=False).encode('utf-8-sig')
+            archive.writestr(part_filename('planilha', i, len(bounds), fmt), content)
+    yield buffer.getvalue()
+
+
+def depois(df, partes, fmt):
+    return iter_split_zip(df, split_bounds(len(df), partes), fmt)
+
+
+def memoria():
+    with open('/proc/self/status') as f:
+        return {nome: int(valor.split()[0]) for nome, _, valor in (linha.partition(':') for linha in f)
+                if nome in ('VmRSS', 'VmHWM')}
+
+
+def worker(modo, n, partes, fmt, destino):
+    """Roda num processo novo: gera o ZIP (gravado em `destino` como um cliente faria)"""
+    df = planilha(n)
+    gerar = antes if modo == 'antes' else depois
+    base = memoria()['VmRSS']
+    with open('/proc/self/clear_refs', 'w') as f:
+        f.write('5')   # zera o pico (VmHWM)
+    inicio = time.perf_counter()
+    primeiro = None
+    with open(destino, 'wb') as saida:
+        for bloco in gerar(df, partes, fmt):
+            if primeiro is None:
+                primeiro = time.perf_counter() - inicio
+            saida.write(bloco)
+    total = time.perf_counter() - inicio
+    parallel_executor.shutdown()
+    print(json.dumps({'tempo': total, 'primeiro': primeiro, 'pico': memoria()['VmHWM'] - base}))
+
+
+def baixar(modo, n, partes, fmt, destino):
+    saida = subprocess.run([sys.executable, __file__, '--worker', modo, str(n), str(partes), fmt, str(destino)],
+                           capture_output=True, text=True, check=True)
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def ler_partes(caminho, fmt):
+    with zipfile.ZipFile(caminho) as archive:
+        for nome in archive.namelist():
+            dados = io.BytesIO(archive.read(nome))
+            yield nome, pd.read_excel(dados) if fmt == 'xlsx' else pd.read_csv(dados, encoding='utf-8-sig')
+
+
+def planilha(n):
+    rng = np.random.default_rng(25)
+    nomes = np.array(['Ana', 'Bruno', 'Carla', 'Davi', 'Érica', 'Fábio'])
+    return pd.DataFrame({
+        'Nome': [f'{nome} & Cia <{i}>' for i, nome in enumerate(nomes[rng.integers(0, len(nomes), n)])],
+        'Email': [f'contato{i}@empresa.com.br' for i in range(n)],
+        'Telefone': [f'55119{i:08d}' if i % 10 else None for i in range(n)],
+        'Valor': np.where(rng.random(n) < 0.05, np.nan, np.round(rng.random(n) * 5000, 2)),
+        'Quantidade': rng.integers(0, 500, n),
+        'Ativo': rng.random(n) < 0.7,
+        'Cadastro': pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 2000, n), 'D'),
+    })
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--worker':
+        modo, n, partes, fmt, destino = sys.argv[2:7]
+        return worker(modo, int(n), int(partes), fmt, destino)
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    partes = int(sys.argv[2]) if len(sys.argv) > 2 else 49
+    print(f"{n} linhas em {partes} partes ({parallel_executor.workers} workers no pool)")
+    with tempfile.TemporaryDirectory() as pasta:
+        for fmt in ('xlsx', 'csv'):
+            resultados = {}
+            for modo in ('antes', 'depois'):
+                destino = Path(pasta) / f'{modo}.{fmt}.zip'
+                resultados[modo] = baixar(modo, n, partes, fmt, destino) | {'tamanho': destino.stat().st_size}
+
+            partes_antes = ler_partes(Path(pasta) / f'antes.{fmt}.zip', fmt)
+            partes_depois = ler_partes(Path(pasta) / f'depois.{fmt}.zip', fmt)
+            for (nome_a, a), (nome_d, d) in zip(partes_antes, partes_depois):
+                assert nome_a == nome_d
+                pd.testing.assert_frame_equal(a, d, check_dtype=False)
+
+            for modo, r in resultados.items():
+                print(f"  {fmt:4s} {modo:6s} {r['tempo']:6.2f}s | 1º byte {r['primeiro']:6.2f}s | "
+                      f"pico +{r['pico'] / 1024:6.1f} MiB | ZIP {r['tamanho'] / 2 ** 20:5.1f} MiB")
+            print(f"       {resultados['antes']['tempo'] / resultados['depois']['tempo']:.1f}x, "
+                  f"{partes} partes iguais")
+
+
+if __name__ == '__main__':
+    main()
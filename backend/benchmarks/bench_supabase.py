@@ -0,0 +1,146 @@
+"""
+Benchmark: acesso ao Supabase síncrono no event loop x assíncrono com pool
+
+Sobe um servidor HTTP local (keep-alive) que responde como o PostgREST
+depois de `--latencia` ms, e simula N requisições simultâneas que fazem as
+3 consultas independentes de `/api/ai/statistics`:
+
+- antes: cliente síncrono (como o supabase-py) chamado dentro das rotas
+  async: cada round trip trava o event loop, tudo vira fila única
+- depois: `RestSupabase` (httpx.AsyncClient com pool) + asyncio.gather
+
+Também confere a tradução das consultas para a URL do PostgREST.
+
+Uso (na pasta backend):
+    python benchmarks/bench_supabase.py [requisicoes] [latencia_ms]
+"""
+import asyncio
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.db import RestSupabase
+
+LATENCIA = 0.02
+PEDIDOS = []
+
+
+class PostgrestFalso(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def _responder(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        PEDIDOS.append(f'{self.command} {unquote(self.path)}')
+        time.sleep(LATENCIA)
+        body = json.dumps([{'id': 1}]).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PATCH = do_DELETE = _responder
+
+    def log_message(self, *args):
+        pass
+
+
+def subir_servidor() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PostgrestFalso)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def conferir_traducao(url: str):
+    async def consultas():
+        db = RestSupabase(url, 'chave', timeout=5, max_connections=4)
+        await db.table('conversations').select('*').eq('user_id', 'ana')\
+            .order('updated_at', desc=True).limit(50).execute()
+        await db.table('projects').select('*').order('created_at', desc=True).range(100, 199).execute()
+        await db.table('conversations').select('*')\
+            .or_('name.ilike.%x%,user_name.ilike.%x%').execute()
+        await db.table('ai_vocabulary').update({'frequency': 2}).eq('word', 'planilha').execute()
+        await db.rpc('apply_learning_batch', {'batch': {}}).execute()
+        await db.close()
+
+    PEDIDOS.clear()
+    asyncio.run(consultas())
+    esperado = [
+        'GET /rest/v1/conversations?select=*&user_id=eq.ana&order=updated_at.desc&limit=50',
+        'GET /rest/v1/projects?select=*&order=created_at.desc&limit=100&offset=100',
+        'GET /rest/v1/conversations?select=*&or=(name.ilike.%x%,user_name.ilike.%x%)',
+        'PATCH /rest/v1/ai_vocabulary?word=eq.planilha',
+        'POST /rest/v1/rpc/apply_learning_batch',
+    ]
+    assert PEDIDOS == esperado, PEDIDOS
+    print("✅ tradução PostgREST OK")
+
+
+def antes(url: str, requisicoes: int) -> float:
+    cliente = httpx.Client(base_url=url.rstrip('/') + '/rest/v1/')
+
+    async def rota():
+        # Chamadas síncronas dentro de uma rota async (travam o loop)
+        cliente.get('ai_learning', params={'select': '*'})
+        cliente.get('ai_vocabulary', params={'select': '*', 'order': 'frequency.desc', 'limit': '10'})
+        cliente.get('ai_feedback', params={'select': '*'})
+
+    async def todas():
+        await asyncio.gather(*(rota() for _ in range(requisicoes)))
+
+    inicio = time.perf_counter()
+    asyncio.run(todas())
+    cliente.close()
+    return time.perf_counter() - inicio
+
+
+def depois(url: str, requisicoes: int) -> float:
+    async def todas():
+        db = RestSupabase(url, 'chave', timeout=5, max_connections=20)
+
+        async def rota():
+            await asyncio.gather(
+                db.table('ai_learning').select('*').execute(),
+                db.table('ai_vocabulary').select('*').order('frequency', desc=True).limit(10).execute(),
+                db.table('ai_feedback').select('*').execute(),
+            )
+
+        await asyncio.gather(*(rota() for _ in range(requisicoes)))
+        await db.close()
+
+    inicio = time.perf_counter()
+    asyncio.run(todas())
+    return time.perf_counter() - inicio
+
+
+def main():
+    global LATENCIA
+    requisicoes = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    LATENCIA = (float(sys.argv[2]) if len(sys.argv) > 2 else 20) / 1000
+
+    server = subir_servidor()
+    url = f'http://127.0.0.1:{server.server_port}'
+    try:
+        conferir_traducao(url)
+        t_antes = antes(url, requisicoes)
+        t_depois = depois(url, requisicoes)
+    finally:
+        server.shutdown()
+
+    print(f"{requisicoes} requisições x 3 consultas, {LATENCIA * 1000:.0f} ms por round trip")
+    print(f"  síncrono no event loop: {t_antes:6.2f}s ({requisicoes / t_antes:7.1f} req/s)")
+    print(f"  assíncrono + pool:      {t_depois:6.2f}s ({requisicoes / t_depois:7.1f} req/s)")
+
+
+if __name__ == '__main__':
+    main()
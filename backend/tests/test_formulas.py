@@ -0,0 +1,45 @@
+"""
+Limite de aninhamento do analisador de fórmulas (`app.services.formulas`)
+
+O parser é recursivo: parênteses, chamadas, constantes `{...}` e sinais
+unários aninhados além de MAX_DEPTH têm que virar FormulaError, nunca
+RecursionError. `functions_used` cai no lexer quando o parse falha.
+
+Uso (na pasta backend):
+    python -m pytest tests
+"""
+import pytest
+
+from app.services.formulas import MAX_DEPTH, FormulaError, functions_used, parse
+
+PROFUNDO = 3000
+
+ANINHADAS = {
+    'chaves': lambda n: '=' + '{' * n + '1' + '}' * n,
+    'parenteses': lambda n: '=' + '(' * n + '1' + ')' * n,
+    'unarios': lambda n: '=' + '-' * n + '1',
+    'chamadas': lambda n: '=' + 'SOMA(' * n + '1' + ')' * n,
+}
+
+
+@pytest.mark.parametrize('tipo', ANINHADAS)
+def test_aninhamento_no_limite(tipo):
+    parse(ANINHADAS[tipo](MAX_DEPTH))
+
+
+@pytest.mark.parametrize('tipo', ANINHADAS)
+def test_aninhamento_profundo_vira_formula_error(tipo):
+    with pytest.raises(FormulaError):
+        parse(ANINHADAS[tipo](MAX_DEPTH + 1))
+    with pytest.raises(FormulaError):
+        parse(ANINHADAS[tipo](PROFUNDO))
+
+
+@pytest.mark.parametrize('tipo', ANINHADAS)
+def test_functions_used_com_aninhamento_profundo(tipo):
+    esperado = ('SOMA',) if tipo == 'chamadas' else ()
+    assert functions_used(ANINHADAS[tipo](PROFUNDO)) == esperado
+
+
+def test_constante_dentro_de_chamada():
+    assert functions_used('=SOMA({1;2;{3}};MÉDIA(A1:A3))') == ('SOMA', 'MÉDIA')
@@ -0,0 +1,82 @@
+"""
+Golden file da detecção de intenções (`AdvancedAI.detect_intent_advanced`)
+
+`benchmarks/intent_golden.json` guarda, para cada comando de
+`benchmarks/intent_corpus.txt`, a saída do laço original (re.search padrão
+a padrão, coluna alvo por substring): intenção, grupos extraídos, coluna
+alvo e sugestões. A detecção atual tem que devolver o mesmo, exceto a coluna
+alvo dos comandos em `COLUNA_ALVO_CORRIGIDA`: o laço original achava
+"Nome" dentro de "renomear" e "Idade" dentro de "cidade", e não via "Preço"
+em "preço"; o índice de colunas (`app.services.columns`) casa palavras
+inteiras e ignora caixa/acentos.
+
+Os comandos rodam em ordem, com uma sessão só, como no golden file.
+
+Uso (na pasta backend):
+    python -m pytest tests
+"""
+import json
+from pathlib import Path
+
+import pytest
+
+from app.ai_engine_advanced import AdvancedAI
+from app.services.sessions import SessionContext
+
+BENCHMARKS = Path(__file__).resolve().parent.parent / 'benchmarks'
+CORPUS = BENCHMARKS / 'intent_corpus.txt'
+GOLDEN = BENCHMARKS / 'intent_golden.json'
+
+COLUMNS = ['Nome', 'Email', 'Telefone', 'CNPJ', 'Valor', 'Preço', 'Idade', 'Status', 'cidade']
+SAMPLE = [
+    {'Nome': f'Cliente {i}', 'Email': f'c{i}@empresa.com', 'Telefone': f'11 9{i:04d}-0000',
+     'CNPJ': '11.222.333/0001-81', 'Valor': i * 10.5, 'Preço': i, 'Idade': 20 + i % 50,
+     'Status': 'ativo' if i % 3 else 'inativo', 'cidade': 'SP'}
+    for i in range(200)
+]
+
+# Comando -> coluna alvo atual (o golden file tem a do laço original)
+COLUNA_ALVO_CORRIGIDA = {
+    'média da coluna Preço': 'Preço',
+    'filtrar por cidade': 'cidade',
+    'renomear coluna': None,
+    'excluir linhas onde preço é zero': 'Preço',
+    'renomear coluna email para e-mail': 'Email',
+}
+
+
+def comandos():
+    linhas = CORPUS.read_text(encoding='utf-8').splitlines()
+    return [linha for linha in linhas if not linha.startswith('#')]
+
+
+def resultado(intent, params):
+    return [intent, params.get('extracted') and list(params['extracted']),
+            params.get('target_column'), params.get('suggestions')]
+
+
+def esperado(golden):
+    """Golden file do laço original com as correções de coluna alvo aplicadas"""
+    saida = {comando: list(r) for comando, r in golden.items()}
+    for comando, coluna in COLUNA_ALVO_CORRIGIDA.items():
+        saida[comando][2] = coluna
+    return saida
+
+
+@pytest.fixture(scope='module')
+def golden():
+    return json.loads(GOLDEN.read_text(encoding='utf-8'))
+
+
+def test_golden_cobre_o_corpus(golden):
+    assert list(golden) == comandos()
+    # Cada correção muda de fato o que o laço original devolvia
+    for comando, coluna in COLUNA_ALVO_CORRIGIDA.items():
+        assert golden[comando][2] != coluna
+
+
+def test_deteccao_igual_ao_golden(golden):
+    ai, sessao = AdvancedAI(), SessionContext()
+    atual = {c: resultado(*ai.detect_intent_advanced(c, COLUMNS, SAMPLE, sessao)) for c in comandos()}
+    alvo = esperado(golden)
+    assert [c for c in atual if atual[c] != alvo[c]] == []
@@ -0,0 +1,79 @@
+"""
+Equivalência da limpeza de nomes MULTIONE (`app.services.names`)
+
+`clean_names` (um valor distinto por vez) tem que devolver exatamente o
+mesmo que a implementação original por linha (`limpar_nome`, mantida aqui
+como referência). Os nomes são gerados aleatoriamente, com semente fixa,
+a partir dos pedaços que costumam quebrar a limpeza: emojis, termos
+removidos, números, acentos, espaços.
+
+Uso (na pasta backend):
+    python -m pytest tests
+"""
+import random
+import re
+
+import pandas as pd
+import pytest
+
+from app.services.names import clean_names
+
+
+def limpar_nome(nome):
+    """Implementação original (por linha), usada como referência"""
+    if pd.isna(nome) or str(nome).lower() in ['none', 'nan', '']:
+        return 'Contato'
+    nome = str(nome)
+    termos_remover = ['Mycontacts', 'myContacts', 'None', 'nan', '*', ':::']
+    for termo in termos_remover:
+        nome = nome.replace(termo, '')
+    nome = re.sub(r'^[0-9\W_]+', '', nome)
+    nome = re.sub(r'[^\w\s\-áéíóúâêôãõàèìòùçÁÉÍÓÚÂÊÔÃÕÀÈÌÒÙÇ]', '', nome)
+    nome = re.sub(r'\b\d+\.?\d*\b', '', nome)
+    nome = re.sub(r'\d{4,}', '', nome)
+    nome = re.sub(r'\s+', ' ', nome)
+    nome = nome.strip()
+    if len(nome) < 2:
+        return 'Contato'
+    if nome.isdigit():
+        return 'Contato'
+    return nome.title()
+
+
+PEDACOS = [
+    'ana', 'JOÃO', 'maria', 'José', "d'ávila", 'o-brien', 'Mycontacts', 'myContacts',
+    'None', 'nan', 'NaN', '*', ':::', '::', '✨', '🔥', '~', '_', '-', '.', '1', '12',
+    '2024', '12345', '3.5', '١٢', 'ß', 'ǆ', ' ', '  ', '\t', '\n', 'çã', 'Ü', 'x1y',
+]
+
+AUSENTES = [None, float('nan'), pd.NA, '', 'none', 'NaN']
+
+
+def nome_aleatorio(rng: random.Random) -> str:
+    return ''.join(rng.choice(PEDACOS) for _ in range(rng.randint(0, 6)))
+
+
+def assert_equivalente(valores):
+    obtido = clean_names(pd.Series(valores, dtype=object)).tolist()
+    divergentes = [(v, limpar_nome(v), o) for v, o in zip(valores, obtido) if limpar_nome(v) != o]
+    assert not divergentes, f"Divergências (valor, esperado, obtido): {divergentes[:5]}"
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_nomes_aleatorios(seed):
+    rng = random.Random(seed)
+    assert_equivalente([nome_aleatorio(rng) for _ in range(5000)] + AUSENTES)
+
+
+def test_valores_repetidos_e_ausentes():
+    # Listas de contatos repetem muito os mesmos nomes
+    rng = random.Random(99)
+    base = [nome_aleatorio(rng) for _ in range(50)] + AUSENTES
+    assert_equivalente([rng.choice(base) for _ in range(5000)])
+
+
+def test_mantem_indice():
+    serie = pd.Series(['ana maria', None, '12 joão'], index=[10, 5, 7], dtype=object)
+    resultado = clean_names(serie)
+    assert resultado.index.tolist() == [10, 5, 7]
+    assert resultado.tolist() == ['Ana Maria', 'Contato', 'João']
@@ -0,0 +1,63 @@
+"""
+Pool de processos (`app.services.parallel`) x caminho em processo
+
+As partições vão e voltam do worker como Arrow; o resultado tem que ser o
+mesmo do caminho local. O caso que quebrava: coluna object com inteiros e
+None (o que o `summarize_excel` monta quando um bloco vazio é concatenado
+com blocos de números) voltava como float, e '11987654321.0' não é
+telefone.
+"""
+import pandas as pd
+import pytest
+
+from app.services import presets
+from app.services.parallel import ParallelExecutor
+
+pytest.importorskip('pyarrow')
+
+
+def planilha() -> pd.DataFrame:
+    # Blocos como os de `iter_excel_chunks`: um só de linhas vazias, os
+    # outros só com números (int64), e o concat deixa tudo object
+    colunas = ['Nome', 'Telefone', 'Qtd']
+    vazio = pd.DataFrame.from_records([(None, None, None)] * 3, columns=colunas)
+    numeros = pd.DataFrame.from_records(
+        [(f'Contato {i}', 11987654321 + i, i % 3) for i in range(8)], columns=colunas
+    )
+    df = pd.concat([numeros.iloc[:4], vazio, numeros.iloc[4:]], ignore_index=True)
+    assert df['Telefone'].dtype == object
+    assert isinstance(df['Telefone'].iloc[0], int)
+    return df
+
+
+@pytest.fixture
+def pool():
+    executor = ParallelExecutor(2, 0)
+    yield executor
+    executor.shutdown()
+
+
+def test_multione_pool_igual_ao_local(monkeypatch, pool):
+    df = planilha()
+    local, genericos_local = presets.run_multione(df, 'Nome', 'Telefone', chunk_rows=6)
+
+    monkeypatch.setattr(presets, 'parallel_executor', pool)
+    paralelo, genericos_paralelo = presets.run_multione(df, 'Nome', 'Telefone', chunk_rows=6)
+
+    assert pool.stats['parallel_runs'] == 1 and pool.stats['fallbacks'] == 0
+    assert len(local) == 8
+    pd.testing.assert_frame_equal(paralelo, local)
+    assert genericos_paralelo == genericos_local
+
+
+def test_map_partitions_mantem_objetos(pool):
+    df = planilha()
+    partes = [part for _, part in pool.map_partitions(df, _identidade, partition_rows=4)]
+    volta = pd.concat(partes)
+    assert pool.stats['parallel_runs'] == 1
+    assert volta['Telefone'].tolist() == df['Telefone'].tolist()
+    assert volta['Qtd'].tolist() == df['Qtd'].tolist()
+
+
+def _identidade(df):
+    return df
@@ -0,0 +1,56 @@
+"""
+Exportação dividida (`app.services.split_export`): pool x caminho em processo
+
+Com o pool, cada parte é escrita num worker a partir da faixa em Arrow; o
+conteúdo das partes tem que ser o mesmo do caminho local (inteiros em
+colunas object continuam inteiros no CSV, não 11987654321.0).
+"""
+import io
+import zipfile
+
+import pytest
+
+from app.services import split_export
+from app.services.split_export import iter_split_zip, split_bounds
+from tests.test_parallel import planilha, pool  # noqa: F401 (fixture)
+
+pytest.importorskip('pyarrow')
+
+
+def _membros(chunks, fmt: str) -> dict:
+    """Conteúdo de cada parte (nas XLSX, os XMLs: o zip interno tem data/hora)"""
+    with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as archive:
+        membros = {nome: archive.read(nome) for nome in archive.namelist()}
+    if fmt == 'xlsx':
+        membros = {nome: _membros([conteudo], 'csv') for nome, conteudo in membros.items()}
+    return membros
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'xlsx'])
+def test_split_export_pool_igual_ao_local(monkeypatch, pool, fmt):
+    df = planilha()
+    bounds = split_bounds(len(df), 3)
+    local = _membros(iter_split_zip(df, bounds, fmt), fmt)
+
+    monkeypatch.setattr(split_export, 'parallel_executor', pool)
+    monkeypatch.setattr(split_export, 'SPLIT_PARALLEL_MIN_ROWS', 0)
+    paralelo = _membros(iter_split_zip(df, bounds, fmt), fmt)
+
+    assert pool.stats['parallel_runs'] == 1 and pool.stats['fallbacks'] == 0
+    assert paralelo == local
+    if fmt == 'csv':
+        assert b',11987654321,' in b''.join(local.values())
+
+
+def test_partes_de_49_com_linha_vazia():
+    # "Dividir em 49" do MULTIONE: 49 contatos por CSV, linha vazia abaixo do cabeçalho
+    df = planilha().dropna()
+    df = df.loc[df.index.repeat(13)].reset_index(drop=True)
+    bounds = split_export.split_rows(len(df), 49)
+    assert [stop - start for start, stop in bounds] == [49, 49, 6]
+
+    partes = _membros(iter_split_zip(df, bounds, 'csv', 'contatos_multione', blank_row=True), 'csv')
+    assert list(partes) == [f'contatos_multione_parte_{i}_de_3.csv' for i in (1, 2, 3)]
+    linhas = partes['contatos_multione_parte_1_de_3.csv'].decode('utf-8-sig').splitlines()
+    assert linhas[:2] == ['Nome,Telefone,Qtd', ',,']
+    assert len(linhas) == 2 + 49
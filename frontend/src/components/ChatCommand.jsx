@@ -2,6 +2,7 @@ import { useState, useEffect } from 'react'
 import { MessageSquare, Send, Sparkles, Loader, BookOpen, Trash2, AlertCircle, CheckCircle2, Zap, User, Save, Maximize2, Minimize2, Clock, Database, CheckSquare, Brain, TrendingUp, Search, ThumbsUp, ThumbsDown } from 'lucide-react'
 import axios from 'axios'
 import * as XLSX from 'xlsx'
+import { exportSplit, saveBlob } from '../services/api'
 
 export default function ChatCommand({ data, columns, onTransform }) {
   const [command, setCommand] = useState('')
@@ -369,66 +370,28 @@ export default function ChatCommand({ data, columns, onTransform }) {
   }
 
   const baixarZIP = async (dadosParaBaixar, numPartes = 8) => {
-    const JSZip = (await import('jszip')).default
-    const zip = new JSZip()
+    // Divisão e ZIP no servidor (em streaming), sem travar a aba
+    const { blob, partes } = await exportSplit({ data: dadosParaBaixar, partes: numPartes, formato: 'csv' })
+    saveBlob(blob, `planilhas_${numPartes}_partes.zip`)
 
-    const totalLinhas = dadosParaBaixar.length
-    const linhasPorParte = Math.ceil(totalLinhas / numPartes)
-
-    for (let i = 0; i < numPartes; i++) {
-      const inicio = i * linhasPorParte
-      const fim = Math.min((i + 1) * linhasPorParte, totalLinhas)
-      const dadosParte = dadosParaBaixar.slice(inicio, fim)
-
-      const ws = XLSX.utils.json_to_sheet(dadosParte)
-      const csv = XLSX.utils.sheet_to_csv(ws)
-      
-      zip.file(`planilha_parte_${i + 1}_de_${numPartes}.csv`, csv)
-    }
-
-    const content = await zip.generateAsync({ type: 'blob' })
-    const link = document.createElement('a')
-    link.href = URL.createObjectURL(content)
-    link.download = `planilhas_${numPartes}_partes.zip`
-    link.click()
-
-    return numPartes
+    return partes
   }
 
-  const baixarDivididoEm49 = (dadosParaBaixar) => {
+  const baixarDivididoEm49 = async (dadosParaBaixar) => {
     if (!dadosParaBaixar || dadosParaBaixar.length === 0) return 0
-    
-    console.log('INICIANDO DOWNLOAD DIVIDIDO EM 49')
-    console.log('Total de linhas:', dadosParaBaixar.length)
-    
-    const totalLinhas = dadosParaBaixar.length
-    const linhasPorParte = 49
-    const numPartes = Math.ceil(totalLinhas / linhasPorParte)
-    
-    console.log('Número de arquivos:', numPartes)
-    
-    for (let i = 0; i < numPartes; i++) {
-      const inicio = i * linhasPorParte
-      const fim = Math.min((i + 1) * linhasPorParte, totalLinhas)
-      const dadosParte = dadosParaBaixar.slice(inicio, fim)
-      
-      const dadosComLinhaVazia = [
-        { Nome: '', Telefone: '' },
-        ...dadosParte
-      ]
-      
-      setTimeout(() => {
-        const ws = XLSX.utils.json_to_sheet(dadosComLinhaVazia, { skipHeader: false })
-        const wb = XLSX.utils.book_new()
-        XLSX.utils.book_append_sheet(wb, ws, 'Contatos')
-        XLSX.writeFile(wb, `contatos_multione_parte_${i + 1}_de_${numPartes}.csv`, {
-          bookType: 'csv'
-        })
-        console.log(`Arquivo ${i + 1} de ${numPartes} baixado`)
-      }, i * 500)
-    }
-    
-    return numPartes
+
+    // Formato MULTIONE montado no servidor: CSVs de 49 contatos, cada um com
+    // uma linha vazia abaixo do cabeçalho, num ZIP só (sem travar a aba)
+    const { blob, partes } = await exportSplit({
+      data: dadosParaBaixar,
+      linhasPorParte: 49,
+      linhaVazia: true,
+      formato: 'csv',
+      nome: 'contatos_multione'
+    })
+    saveBlob(blob, `contatos_multione_${partes}_partes.zip`)
+
+    return partes
   }
 
   const processarComandoDownload = (cmd) => {
@@ -443,11 +406,17 @@ export default function ChatCommand({ data, columns, onTransform }) {
     // DIVIDIR EM 49 - PRIORIDADE MÁXIMA
     if (cmdLower.includes('49') || cmdLower.includes('dividir')) {
       console.log('✅ DETECTADO: dividir em 49')
-      setTimeout(() => {
-        const arquivosBaixados = baixarDivididoEm49(data)
-        const msg = {
-          role: 'assistant',
-          content: `Perfeito, ${userName}! ${arquivosBaixados} arquivos baixados.\n\nFormato MULTIONE:\n• Primeira linha vazia\n• 49 contatos por arquivo\n• ${data.length} linhas processadas`
+      setTimeout(async () => {
+        let msg
+        try {
+          const arquivosBaixados = await baixarDivididoEm49(data)
+          msg = {
+            role: 'assistant',
+            content: `Perfeito, ${userName}! ZIP com ${arquivosBaixados} arquivos baixado.\n\nFormato MULTIONE:\n• Primeira linha vazia\n• 49 contatos por arquivo\n• ${data.length} linhas processadas`
+          }
+        } catch (error) {
+          console.error('Erro ao dividir em 49:', error)
+          msg = { role: 'assistant', content: `Não consegui gerar os arquivos, ${userName}. Tente novamente.` }
         }
         typeMessage(msg.content, () => {
           setHistory(prev => [...prev, msg])
@@ -464,10 +433,16 @@ export default function ChatCommand({ data, columns, onTransform }) {
       const numPartes = match ? parseInt(match[1]) : 8
 
       setTimeout(async () => {
-        const arquivosBaixados = await baixarZIP(data, numPartes)
-        const msg = {
-          role: 'assistant',
-          content: `Pronto, ${userName}! Arquivo ZIP baixado.\n\nContém ${arquivosBaixados} planilhas CSV\nArquivo: planilhas_${numPartes}_partes.zip`
+        let msg
+        try {
+          const arquivosBaixados = await baixarZIP(data, numPartes)
+          msg = {
+            role: 'assistant',
+            content: `Pronto, ${userName}! Arquivo ZIP baixado.\n\nContém ${arquivosBaixados} planilhas CSV\nArquivo: planilhas_${numPartes}_partes.zip`
+          }
+        } catch (error) {
+          console.error('Erro ao gerar ZIP:', error)
+          msg = { role: 'assistant', content: `Não consegui gerar o ZIP, ${userName}. Tente novamente.` }
         }
         typeMessage(msg.content, () => {
           setHistory(prev => [...prev, msg])
@@ -574,7 +549,8 @@ export default function ChatCommand({ data, columns, onTransform }) {
         const response = await axios.post('http://localhost:8000/api/ml/ai-command', {
           command: command,
           data: data,
-          columns: columns
+          columns: columns,
+          conversation_id: conversationId
         })
 
         const aiMessage = { 
@@ -1,52 +1,42 @@
 import { useState } from 'react'
 import { Download, FileSpreadsheet, Loader, CheckCircle } from 'lucide-react'
-import * as XLSX from 'xlsx'
+import { exportSplit, saveBlob } from '../services/api'
 
 export default function MultiPartDownload({ data, columns, numPartes = 8 }) {
   const [downloading, setDownloading] = useState(false)
-  const [progress, setProgress] = useState(0)
+  const [received, setReceived] = useState(0)
   const [completed, setCompleted] = useState(false)
 
-  const dividirEBaixar = () => {
+  const dividirEBaixar = async () => {
     if (!data || data.length === 0) {
       alert('Nenhum dado para dividir!')
       return
     }
 
     setDownloading(true)
-    setProgress(0)
+    setReceived(0)
     setCompleted(false)
 
-    const totalLinhas = data.length
-    const linhasPorParte = Math.ceil(totalLinhas / numPartes)
-
-    setTimeout(() => {
-      for (let i = 0; i < numPartes; i++) {
-        const inicio = i * linhasPorParte
-        const fim = Math.min((i + 1) * linhasPorParte, totalLinhas)
-        const dadosParte = data.slice(inicio, fim)
-
-        // Criar planilha
-        const ws = XLSX.utils.json_to_sheet(dadosParte)
-        const wb = XLSX.utils.book_new()
-        XLSX.utils.book_append_sheet(wb, ws, 'Dados')
-
-        // Baixar
-        XLSX.writeFile(wb, `planilha_comercial_parte_${i + 1}_de_${numPartes}.xlsx`)
-
-        // Atualizar progresso
-        setProgress(Math.round(((i + 1) / numPartes) * 100))
-      }
-
-      setDownloading(false)
+    try {
+      // O servidor gera as partes e manda o ZIP em streaming
+      const { blob } = await exportSplit(
+        { data, partes: numPartes, formato: 'xlsx', nome: 'planilha_comercial' },
+        (event) => setReceived(event.loaded)
+      )
+      saveBlob(blob, `planilha_comercial_${numPartes}_partes.zip`)
       setCompleted(true)
 
       // Reset após 3 segundos
       setTimeout(() => {
         setCompleted(false)
-        setProgress(0)
+        setReceived(0)
       }, 3000)
-    }, 500)
+    } catch (error) {
+      console.error('Erro ao dividir:', error)
+      alert('Erro ao gerar as planilhas. Tente novamente.')
+    } finally {
+      setDownloading(false)
+    }
   }
 
   const calcularLinhasPorParte = () => {
@@ -84,13 +74,10 @@ export default function MultiPartDownload({ data, columns, numPartes = 8 }) {
             <div className="mb-4">
               <div className="flex items-center justify-between mb-2 text-sm text-slate-400">
                 <span>Gerando planilhas...</span>
-                <span>{progress}%</span>
+                <span>{(received / 1024 / 1024).toFixed(1)} MB</span>
               </div>
               <div className="w-full bg-slate-800 rounded-full h-2 overflow-hidden">
-                <div 
-                  className="bg-gradient-to-r from-green-500 to-emerald-500 h-full transition-all duration-300"
-                  style={{ width: `${progress}%` }}
-                />
+                <div className="bg-gradient-to-r from-green-500 to-emerald-500 h-full w-full animate-pulse" />
               </div>
             </div>
           )}
@@ -99,7 +86,7 @@ export default function MultiPartDownload({ data, columns, numPartes = 8 }) {
             <div className="mb-4 p-3 bg-green-500/10 border border-green-500/30 rounded-lg flex items-center gap-2 text-green-300">
               <CheckCircle className="w-5 h-5" />
               <span className="text-sm font-semibold">
-                ✅ {numPartes} planilhas baixadas com sucesso!
+                ✅ ZIP com {Math.min(numPartes, data.length)} planilhas baixado!
               </span>
             </div>
           )}
@@ -123,7 +110,7 @@ export default function MultiPartDownload({ data, columns, numPartes = 8 }) {
           </button>
 
           <div className="mt-3 text-xs text-slate-500 text-center">
-            💡 Os arquivos serão baixados automaticamente
+            💡 As planilhas vêm num único arquivo ZIP
           </div>
         </>
       ) : (
@@ -25,4 +25,30 @@ export const getMLSuggestions = async (data) => {
   return api.post('/api/ml/suggestions', data)
 }
 
+// Divide no servidor em N partes (XLSX ou CSV) e devolve o ZIP como Blob
+// (com linhasPorParte, partes de tamanho fixo; linhaVazia: linha vazia abaixo do cabeçalho)
+export const exportSplit = async (
+  { data, partes, formato = 'xlsx', nome = 'planilha', linhasPorParte, linhaVazia = false },
+  onDownloadProgress
+) => {
+  const payload = { data, partes, formato, nome, linha_vazia: linhaVazia }
+  if (linhasPorParte) payload.linhas_por_parte = linhasPorParte
+  const response = await api.post('/api/spreadsheet/split', payload, {
+    responseType: 'blob',
+    onDownloadProgress,
+  })
+  return {
+    blob: response.data,
+    partes: Number(response.headers['x-split-parts']) || partes,
+  }
+}
+
+export const saveBlob = (blob, filename) => {
+  const link = document.createElement('a')
+  link.href = URL.createObjectURL(blob)
+  link.download = filename
+  link.click()
+  setTimeout(() => URL.revokeObjectURL(link.href), 1000)
+}
+
 export default api